@@ -0,0 +1,101 @@
+"""
+Benchmark blocklist ingestion: streamed rebuild rate from a large hosts
+file and the time to apply a delta to the live index.
+
+While the delta is applied, a ticker coroutine keeps running lookups on
+the event loop and reports the longest gap between them, showing that the
+build runs off the loop and only the swap touches the live database.
+
+Usage:
+    python benchmark_blocklist_ingest.py
+    python benchmark_blocklist_ingest.py --entries 5000000 --delta 100000
+"""
+import argparse
+import asyncio
+import os
+import resource
+import tempfile
+import time
+
+from services.blocklist_ingest import BlocklistIngestor
+from services.ml_data import DomainDatabase
+
+
+def write_hosts_file(path, count):
+    with open(path, 'w') as f:
+        for i in range(count):
+            f.write(f"0.0.0.0 site-{i}.example{i % 97}.com\n")
+
+
+def write_delta_file(path, version, base, count, existing):
+    with open(path, 'w') as f:
+        f.write(f"#version {version}\n#base {base}\n")
+        for i in range(count // 2):
+            f.write(f"+new-{version}-{i}.delta{i % 31}.net\n")
+        for i in range(count - count // 2):
+            f.write(f"-site-{(i * 7919) % existing}.example{((i * 7919) % existing) % 97}.com\n")
+
+
+async def lookup_ticker(db, stop, gaps):
+    last = time.perf_counter()
+    i = 0
+    while not stop.is_set():
+        db.match(f"cdn.site-{i}.example{i % 97}.com")
+        i += 1
+        await asyncio.sleep(0)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def run(args, directory):
+    hosts = os.path.join(directory, 'hosts.txt')
+    start = time.perf_counter()
+    write_hosts_file(hosts, args.entries)
+    size_mb = os.path.getsize(hosts) / 1024 / 1024
+    print(f"[INFO] Wrote {args.entries:,} entries ({size_mb:.0f} MiB) in {time.perf_counter() - start:.1f}s")
+
+    db = DomainDatabase(populate=False)
+    ingestor = BlocklistIngestor(db, lists=[hosts], delta_dir=directory)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    stats = await ingestor.rebuild(include_database=False, version="1")
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"[INFO] Rebuild: {stats['entries_read']:,} entries in {stats['seconds']:.2f}s "
+          f"({stats['entries_per_s']:,} entries/s), {stats['rules']:,} rules, "
+          f"peak RSS +{rss_after - rss_before:.0f} MiB")
+
+    write_delta_file(os.path.join(directory, '0002.delta'), "2", "1", args.delta, args.entries)
+    await ingestor.apply_pending()
+    print(f"[INFO] Delta, idle: {args.delta:,} entries applied in {ingestor.last_delta['ms']:.0f} ms, "
+          f"{ingestor.last_delta['rules']:,} rules")
+
+    write_delta_file(os.path.join(directory, '0003.delta'), "3", "2", args.delta, args.entries)
+    stop, gaps = asyncio.Event(), []
+    ticker = asyncio.create_task(lookup_ticker(db, stop, gaps))
+    await asyncio.sleep(0.05)
+    delta_start = time.perf_counter()
+    await ingestor.apply_pending()
+    delta_s = time.perf_counter() - delta_start
+    stop.set()
+    await ticker
+
+    gaps.sort()
+    print(f"[INFO] Delta, under lookups: {args.delta:,} entries applied in {delta_s * 1000:.0f} ms")
+    print(f"[INFO] Lookups during delta: {len(gaps):,}, p99 gap {gaps[int(len(gaps) * 0.99)] * 1000:.2f} ms, "
+          f"max gap {gaps[-1] * 1000:.2f} ms")
+    assert db.version == "3" and db.is_blocked("x.new-3-7.delta7.net")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streamed blocklist ingestion and delta updates")
+    parser.add_argument('--entries', type=int, default=2000000)
+    parser.add_argument('--delta', type=int, default=100000, help="delta size (half adds, half removes)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args, directory))
+    print("\n[OK] Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Microbenchmark for the domain BloomFilter.
+
+Compares the previous hashing scheme (one SHA-256 per hash function) with
+the single-digest double hashing now used by BloomFilter, for the scalar
+add/check path and the NumPy add_many/check_many bulk path. Reports build
+time and lookups per second.
+
+Usage:
+    python benchmark_bloom_filter.py
+    python benchmark_bloom_filter.py --domains 1000000 --fp 0.001 --legacy-sample 100000
+"""
+import argparse
+import hashlib
+import time
+
+from services.ml_data import BloomFilter
+
+
+class LegacyBloomFilter(BloomFilter):
+    """The previous implementation: a full SHA-256 per hash function."""
+
+    def _hash(self, item: str, seed: int) -> int:
+        h = hashlib.sha256(item.encode('utf-8')).digest()
+        return (int.from_bytes(h[:16], 'big') + seed * int.from_bytes(h[16:], 'big')) % self.size
+
+    def _positions(self, item: str):
+        return (self._hash(item, i) for i in range(self.hash_count))
+
+
+def rate(count: int, seconds: float) -> str:
+    return f"{count / seconds:>12,.0f}/s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BloomFilter build and lookups")
+    parser.add_argument('--domains', type=int, default=1000000)
+    parser.add_argument('--fp', type=float, default=0.001)
+    parser.add_argument('--lookups', type=int, default=200000)
+    parser.add_argument('--legacy-sample', type=int, default=100000,
+                        help="domains used to time the legacy scheme (it is slow)")
+    args = parser.parse_args()
+
+    domains = [f"site-{i}.example{i % 97}.com" for i in range(args.domains)]
+    probes = [d for i in range(args.lookups // 2) for d in (f"probe-{i}.other{i % 89}.net", domains[i])]
+    print(f"[INFO] {args.domains:,} domains, fp={args.fp}, {len(probes):,} lookups (half present)\n")
+
+    legacy = LegacyBloomFilter(args.domains, args.fp)
+    sample = domains[:args.legacy_sample]
+    start = time.perf_counter()
+    for d in sample:
+        legacy.add(d)
+    legacy_build = (time.perf_counter() - start) * args.domains / len(sample)
+    start = time.perf_counter()
+    for d in probes[:args.legacy_sample]:
+        legacy.check(d)
+    legacy_check = time.perf_counter() - start
+    print(f"legacy add    (est.) {legacy_build:>8.2f}s")
+    print(f"legacy check         {rate(min(len(probes), args.legacy_sample), legacy_check)}")
+
+    scalar = BloomFilter(args.domains, args.fp)
+    start = time.perf_counter()
+    for d in domains:
+        scalar.add(d)
+    print(f"add                  {time.perf_counter() - start:>8.2f}s")
+
+    bulk = BloomFilter(args.domains, args.fp)
+    start = time.perf_counter()
+    bulk.add_many(domains)
+    print(f"add_many             {time.perf_counter() - start:>8.2f}s")
+    assert bulk.bit_array == scalar.bit_array
+
+    start = time.perf_counter()
+    scalar_hits = sum(scalar.check(d) for d in probes)
+    print(f"check                {rate(len(probes), time.perf_counter() - start)}")
+
+    start = time.perf_counter()
+    bulk_hits = int(bulk.check_many(probes).sum())
+    print(f"check_many           {rate(len(probes), time.perf_counter() - start)}")
+    assert scalar_hits == bulk_hits
+
+    false_positives = scalar_hits - len(probes) // 2
+    print(f"\n[OK] bits={scalar.size:,} k={scalar.hash_count} "
+          f"observed fp rate={false_positives / (len(probes) // 2):.5f}")
+
+
+if __name__ == "__main__":
+    main()
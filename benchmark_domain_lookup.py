@@ -0,0 +1,106 @@
+"""
+Benchmark domain blocklist lookups: Bloom filter only versus the two-tier
+Bloom filter + exact hash index used by DomainDatabase.
+
+Builds a synthetic rule set, then looks up subdomain hosts (mostly benign,
+some under blocked domains) and reports memory per tier, lookup latency
+percentiles and how many benign hosts each scheme would block.
+
+Usage:
+    python benchmark_domain_lookup.py
+    python benchmark_domain_lookup.py --rules 5000000 --lookups 200000
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from services.ml_data import DomainDatabase
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def bloom_only_match(db, host):
+    """The previous behaviour: any Bloom positive on a suffix blocks the host."""
+    suffix = host
+    while True:
+        if db.filter.check(suffix):
+            return suffix
+        dot = suffix.find('.')
+        if dot < 0:
+            return None
+        suffix = suffix[dot + 1:]
+
+
+def dict_match(rules, host):
+    suffix = host
+    while True:
+        if suffix in rules:
+            return suffix
+        dot = suffix.find('.')
+        if dot < 0:
+            return None
+        suffix = suffix[dot + 1:]
+
+
+def timed(fn, hosts):
+    latencies, blocked = [], 0
+    for host in hosts:
+        start = time.perf_counter()
+        result = fn(host)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        blocked += result is not None
+    return latencies, blocked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark two-tier domain lookups")
+    parser.add_argument('--rules', type=int, default=1000000)
+    parser.add_argument('--fp', type=float, default=DomainDatabase.FP_RATE)
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--blocked-share', type=float, default=0.1, help="share of hosts under a blocked rule")
+    args = parser.parse_args()
+
+    domains = [f"site-{i}.example{i % 97}.com" for i in range(args.rules)]
+    print(f"[INFO] {args.rules:,} rules, fp={args.fp}")
+
+    db = DomainDatabase(populate=False, capacity=args.rules, fp_rate=args.fp)
+    start = time.perf_counter()
+    db.add_many(domains)
+    print(f"[INFO] Build (Bloom + exact index): {time.perf_counter() - start:.2f}s")
+
+    tracemalloc.start()
+    rules = dict.fromkeys((d.encode().decode() for d in domains), DomainDatabase.DEFAULT_CATEGORY)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    blocked_every = max(1, int(round(1 / args.blocked_share))) if args.blocked_share > 0 else 0
+    hosts = [
+        f"cdn.{domains[(i * 7919) % args.rules]}" if blocked_every and i % blocked_every == 0
+        else f"img.host-{i}.benign{i % 89}.net"
+        for i in range(args.lookups)
+    ]
+    expected = sum(1 for i in range(args.lookups) if blocked_every and i % blocked_every == 0)
+
+    print(f"\n{'memory':<22} {'MiB':>8} {'bytes/rule':>11}")
+    for name, size in [("Bloom filter", db.filter.byte_size), ("exact hash index", db.index.nbytes),
+                       ("dict with keys", dict_bytes)]:
+        print(f"{name:<22} {size / 1024 / 1024:>8.1f} {size / args.rules:>11.1f}")
+
+    print(f"\n{'lookup':<22} {'p50 us':>8} {'p99 us':>8} {'mean us':>8} {'blocked':>9} {'wrongly':>8}")
+    for name, fn in [("bloom only", lambda h: bloom_only_match(db, h)),
+                     ("bloom + exact", db.match),
+                     ("exact only", db.index.match),
+                     ("dict suffix walk", lambda h: dict_match(rules, h))]:
+        latencies, blocked = timed(fn, hosts)
+        print(f"{name:<22} {percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f} "
+              f"{statistics.mean(latencies):>8.2f} {blocked:>9,} {blocked - expected:>8,}")
+
+    print(f"\n[OK] {expected:,} of {len(hosts):,} hosts are under a blocked rule")
+
+
+if __name__ == "__main__":
+    main()
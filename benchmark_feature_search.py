@@ -0,0 +1,96 @@
+"""
+Benchmark FeatureDatabase similarity search: exact scan versus the IVF index.
+
+Builds a clustered synthetic database, saves it, reloads it memory-mapped
+and reports recall@k against the exact scan and the query latency
+distribution for several n_probe settings.
+
+Usage:
+    python benchmark_feature_search.py
+    python benchmark_feature_search.py --vectors 1000000 --dim 128 --probes 1,4,8,16,32
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from services.ml_data import FeatureDatabase
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def clustered_vectors(n, dim, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    chunk = 100000
+    for i in range(0, n, chunk):
+        size = min(chunk, n - i)
+        vectors[i:i + size] = centers[rng.integers(0, clusters, size)] + 0.4 * rng.normal(size=(size, dim))
+    return vectors
+
+
+def timed_search(db, queries, k, n_probe):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append({r['id'] for r in db.search(query, k=k, n_probe=n_probe)})
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact vs IVF feature search")
+    parser.add_argument('--vectors', type=int, default=200000)
+    parser.add_argument('--dim', type=int, default=128)
+    parser.add_argument('--clusters', type=int, default=1000, help="clusters in the synthetic data")
+    parser.add_argument('--lists', type=int, default=0, help="IVF lists (default 4 * sqrt(n))")
+    parser.add_argument('--probes', default="1,4,8,16,32")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"[INFO] Generating {args.vectors} x {args.dim} vectors...")
+    vectors = clustered_vectors(args.vectors, args.dim, args.clusters)
+    db = FeatureDatabase(populate=False)
+    start = time.perf_counter()
+    db.add_many([f"v{i}" for i in range(args.vectors)], vectors, ["safe"] * args.vectors)
+    print(f"[INFO] Insert + normalize: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    db.build_index(n_lists=args.lists or None)
+    print(f"[INFO] IVF build ({db.index.n_lists} lists): {time.perf_counter() - start:.2f}s")
+
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(args.vectors, args.queries, replace=False)]
+    queries = queries + 0.1 * rng.normal(size=queries.shape).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db.save(directory)
+        del db
+        start = time.perf_counter()
+        db = FeatureDatabase.load(directory, mmap=True)
+        print(f"[INFO] mmap load: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+        exact_latencies, exact = timed_search(db, queries, args.k, None)
+        print(f"{'mode':<12} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+        print(f"{'exact':<12} {1.0:>10.3f} {percentile(exact_latencies, 50):>8.2f} "
+              f"{percentile(exact_latencies, 99):>8.2f} {statistics.mean(exact_latencies):>8.2f}")
+
+        for n_probe in [int(p) for p in args.probes.split(',') if p.strip()]:
+            latencies, approx = timed_search(db, queries, args.k, n_probe)
+            recall = sum(len(a & e) for a, e in zip(approx, exact)) / (args.k * len(queries))
+            print(f"{'ivf/' + str(n_probe):<12} {recall:>10.3f} {percentile(latencies, 50):>8.2f} "
+                  f"{percentile(latencies, 99):>8.2f} {statistics.mean(latencies):>8.2f}")
+        del db
+
+    print("\n[OK] Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
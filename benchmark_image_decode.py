@@ -0,0 +1,144 @@
+"""
+Benchmark the draft-mode image preprocessing path against full-resolution decode.
+
+Measures per-image preprocessing time on synthetic phone-sized JPEGs, the
+pixel difference between the two paths, and (with --scores) NSFW score
+parity through the real vision model.
+
+Usage:
+    python benchmark_image_decode.py
+    python benchmark_image_decode.py --count 20 --megapixels 12 --scores
+"""
+import argparse
+import io
+import statistics
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from services.ml_preprocess import ImagePreprocessor
+
+
+def make_photo(rng: np.random.Generator, megapixels: float) -> bytes:
+    """
+    Smooth gradients plus shapes and mild noise: compresses and decodes
+    roughly like a real photo, unlike pure noise.
+    """
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    base = np.stack([
+        255 * x * np.ones_like(y),
+        255 * y * np.ones_like(x),
+        255 * (1 - x) * y,
+    ], axis=-1)
+    base += rng.normal(0, 6, size=base.shape)
+    image = Image.fromarray(np.clip(base, 0, 255).astype(np.uint8))
+
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x0, y0 = rng.integers(0, width), rng.integers(0, height)
+        size = int(rng.integers(width // 20, width // 4))
+        color = tuple(int(c) for c in rng.integers(0, 255, size=3))
+        draw.ellipse([x0, y0, x0 + size, y0 + size], fill=color)
+    image = image.filter(ImageFilter.GaussianBlur(2))
+
+    buf = io.BytesIO()
+    image.save(buf, format='JPEG', quality=90)
+    return buf.getvalue()
+
+
+def full_decode(preprocessor: ImagePreprocessor, image_bytes: bytes, processor=None) -> np.ndarray:
+    """
+    The current path: full-resolution decode, then resize and normalize
+    (by the HF processor when one is available).
+    """
+    image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+    if processor is not None:
+        return processor(images=[image], return_tensors='np')['pixel_values'][0]
+
+    resized = np.asarray(image.resize((preprocessor.width, preprocessor.height), preprocessor.resample))
+    return resized.transpose(2, 0, 1) * preprocessor._scale + preprocessor._offset
+
+
+def time_per_image(fn, images) -> list:
+    timings = []
+    for image_bytes in images:
+        start = time.perf_counter()
+        fn(image_bytes)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def load_processor():
+    try:
+        from transformers import AutoImageProcessor
+        from services.ml_core_real import VISION_MODEL_ID
+        from services.model_store import resolve_model_source
+        source, _ = resolve_model_source('vision', VISION_MODEL_ID)
+        return AutoImageProcessor.from_pretrained(source)
+    except Exception as e:
+        print(f"[INFO] HF processor unavailable ({e}); using PIL resize as the baseline")
+        return None
+
+
+def check_scores(images) -> None:
+    from services.ml_core_real import RealNSFWImageClassifier
+    from services.ml_core_onnx import compare_scores
+    from services.ml_config import MLRuntimeConfig
+
+    model = RealNSFWImageClassifier()
+    if model.preprocessor is None:
+        print("[INFO] Model processor is not a plain resize; fast path not used")
+        return
+
+    fast = model.predict_batch(images)
+    preprocessor, model.preprocessor = model.preprocessor, None
+    reference = model.predict_batch(images)
+    model.preprocessor = preprocessor
+
+    report = compare_scores(reference, fast, MLRuntimeConfig().onnx_parity_tolerance)
+    status = "[DRIFT]" if report['drift'] else "[OK]"
+    print(f"{status} scores: max |diff| {report['max_abs_diff']:.4f}, "
+          f"mean |diff| {report['mean_abs_diff']:.4f}, "
+          f"{report['over_tolerance']}/{report['samples']} over tolerance {report['tolerance']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fast image decode")
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--megapixels', type=float, default=12.0)
+    parser.add_argument('--scores', action='store_true', help="also compare model scores (loads the model)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"[INFO] Generating {args.count} JPEGs at {args.megapixels} MP...")
+    images = [make_photo(rng, args.megapixels) for _ in range(args.count)]
+
+    processor = load_processor()
+    preprocessor = (ImagePreprocessor.from_processor(processor) if processor else None) or ImagePreprocessor()
+
+    baseline = time_per_image(lambda b: full_decode(preprocessor, b, processor), images)
+    fast = time_per_image(lambda b: preprocessor.load_batch([b]), images)
+
+    diffs = []
+    for image_bytes in images:
+        reference = full_decode(preprocessor, image_bytes, processor)
+        candidate = preprocessor.load_batch([image_bytes])[0][0]
+        diffs.append(float(np.abs(reference - candidate).mean()))
+
+    print(f"\n{'path':<12} {'median ms':>10} {'p95 ms':>10}")
+    for name, timings in (('full decode', baseline), ('draft mode', fast)):
+        p95 = sorted(timings)[max(0, int(len(timings) * 0.95) - 1)]
+        print(f"{name:<12} {statistics.median(timings):>10.1f} {p95:>10.1f}")
+    print(f"\n[OK] Speedup: {statistics.median(baseline) / statistics.median(fast):.1f}x")
+    print(f"[INFO] Mean |pixel diff| after normalization: {statistics.mean(diffs):.4f}")
+
+    if args.scores:
+        check_scores(images)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark the two-resolution vision cascade against full-resolution scoring.
+
+Scores the same images with AdvancedVisionModel at full resolution only and
+through VisionCascade (low resolution first, full resolution only when the
+low-res score is within --band of the threshold), then reports the fraction of images escalated
+and the end-to-end latency distribution of each path.
+
+Usage:
+    python benchmark_vision_cascade.py
+    python benchmark_vision_cascade.py --images ./samples --low-size 224 --band 0.2
+"""
+import argparse
+import io
+import os
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from services.ml_core import ImagePreprocessor, ModelFactory, VisionCascade
+
+
+def synthetic_images(count: int, size=(1280, 960)):
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8)
+        image = Image.fromarray(pixels).resize(size, Image.BILINEAR)
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+def load_images(path: str):
+    images = []
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+            with open(os.path.join(path, name), 'rb') as f:
+                images.append(f.read())
+    return images
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(name, latencies):
+    print(f"{name:<14} p50={percentile(latencies, 50):7.1f} ms  p95={percentile(latencies, 95):7.1f} ms  "
+          f"p99={percentile(latencies, 99):7.1f} ms  mean={statistics.mean(latencies):7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the two-resolution vision cascade")
+    parser.add_argument('--images', help="directory of JPEG/PNG images (default: synthetic)")
+    parser.add_argument('--count', type=int, default=64, help="synthetic image count")
+    parser.add_argument('--low-size', type=int, default=224)
+    parser.add_argument('--high-size', type=int, default=640)
+    parser.add_argument('--band', type=float, default=0.2)
+    args = parser.parse_args()
+
+    images = load_images(args.images) if args.images else synthetic_images(args.count)
+    if not images:
+        print("[ERROR] No images to benchmark")
+        return
+
+    model = ModelFactory.get_vision_model()
+    high_size = (args.high_size, args.high_size)
+    cascade = VisionCascade(
+        model,
+        low_size=(args.low_size, args.low_size), high_size=high_size, band=args.band
+    )
+
+    print(f"[INFO] {len(images)} images, low={args.low_size}px high={args.high_size}px "
+          f"band={args.band}")
+    model.predict(ImagePreprocessor.preprocess(images[0], high_size))
+
+    full_latencies, full_scores = [], []
+    for image_bytes in images:
+        start = time.perf_counter()
+        tensor = ImagePreprocessor.preprocess(image_bytes, high_size)
+        full_scores.append(model.predict(tensor))
+        full_latencies.append((time.perf_counter() - start) * 1000)
+
+    cascade_latencies, cascade_scores = [], []
+    for image_bytes in images:
+        start = time.perf_counter()
+        result = cascade.predict(image_bytes)
+        cascade_scores.append(result['score'])
+        cascade_latencies.append((time.perf_counter() - start) * 1000)
+
+    agreement = sum((a >= 0.5) == (b >= 0.5) for a, b in zip(full_scores, cascade_scores)) / len(images)
+    stats = cascade.get_stats()
+
+    print()
+    report("full-res", full_latencies)
+    report("cascade", cascade_latencies)
+    print(f"\n[OK] Escalated {stats['escalated']}/{stats['images']} images "
+          f"({stats['escalation_rate']:.1%}), verdict agreement {agreement:.1%}, "
+          f"speedup {statistics.mean(full_latencies) / statistics.mean(cascade_latencies):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Build the memory-mapped blocklist snapshot used by DomainDatabase.
+
+Rules are collected from data/blocklist.json, the built-in list, any
+extra list/hosts files and optionally the GlobalBlocklist table, and
+written with their categories to ML_BLOCKLIST_SNAPSHOT_PATH. A rule blocks
+the domain and all of its subdomains. Workers map the snapshot at startup
+instead of rebuilding the filter, and map it again on their next delta poll
+when it is rewritten.
+
+Usage:
+    python build_blocklist_snapshot.py
+    python build_blocklist_snapshot.py --list extra_hosts.txt --category gambling --database
+    python build_blocklist_snapshot.py --apply-delta 0002.delta   # update the snapshot in place
+    python build_blocklist_snapshot.py --verify            # check an existing snapshot
+"""
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import time
+
+from services.blocklist_ingest import BlocklistDelta, DomainIndexBuilder, add_database_rows, apply_delta
+from services.blocklist_sources import iter_domain_file, iter_json_blocklist, json_blocklist_version
+from services.ml_config import MLRuntimeConfig
+from services.ml_data import BloomFilter, BloomSnapshotError, DomainDatabase, DomainSuffixIndex
+
+DEFAULT_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'blocklist.json')
+
+
+def collect_rules(args) -> DomainIndexBuilder:
+    builder = DomainIndexBuilder()
+
+    if not args.no_builtin:
+        print(f"[INFO] built-in list: {builder.add(DomainDatabase.builtin_domains()):,} entries")
+
+    if os.path.exists(args.json):
+        print(f"[INFO] {args.json}: {builder.add(iter_json_blocklist(args.json)):,} entries")
+    else:
+        print(f"[INFO] {args.json} not found, skipped")
+
+    for path in args.list:
+        start = time.perf_counter()
+        count = builder.add(iter_domain_file(path), args.category)
+        elapsed = time.perf_counter() - start
+        print(f"[INFO] {path}: {count:,} entries ({count / max(elapsed, 1e-9):,.0f}/s)")
+
+    if args.database:
+        print(f"[INFO] GlobalBlocklist: {asyncio.run(add_database_rows(builder)):,} entries")
+
+    return builder
+
+
+def build(args) -> bool:
+    start = time.perf_counter()
+    builder = collect_rules(args)
+    if not builder.count:
+        print("[ERROR] No rules collected")
+        return False
+
+    bloom, index = builder.build(fp_rate=args.fp, headroom=args.headroom)
+    version = args.version
+    if version is None:
+        version = json_blocklist_version(args.json) if os.path.exists(args.json) else ""
+    db = DomainDatabase(populate=False)
+    db.swap(bloom, index, version)
+    db.save_snapshot(args.output)
+    print(f"[OK] {args.output}: {len(index):,} rules from {builder.count:,} entries "
+          f"({', '.join(index.categories)}), {os.path.getsize(args.output) / 1024 / 1024:.1f} MiB, "
+          f"k={bloom.hash_count}, version '{version}' ({time.perf_counter() - start:.1f}s)")
+    return verify(args.output)
+
+
+def apply_deltas(args) -> bool:
+    db = DomainDatabase(args.output, populate=False)
+    if not os.path.exists(args.output) or not len(db.index):
+        print(f"[ERROR] {args.output} is missing or invalid; build it first")
+        return False
+    for path in args.apply_delta:
+        start = time.perf_counter()
+        try:
+            delta = BlocklistDelta.load(path)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] {e}")
+            return False
+        if delta.base != db.version:
+            print(f"[ERROR] {path} applies to version '{delta.base}', snapshot is at '{db.version}'")
+            return False
+        bloom, index = apply_delta(db.filter, db.index, delta)
+        db.swap(bloom, index, delta.version)
+        print(f"[INFO] {path}: {delta.size:,} entries -> version '{delta.version}', {len(index):,} rules "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+    db.save_snapshot(args.output)
+    return verify(args.output)
+
+
+def verify(path: str) -> bool:
+    try:
+        bloom = BloomFilter.load(path, verify=True)
+        rules = len(DomainSuffixIndex.from_bytes(bloom.payload))
+    except (BloomSnapshotError, OSError, ValueError, struct.error) as e:
+        print(f"[ERROR] {e}")
+        return False
+    print(f"[OK] {path} verified: {rules:,} rules, {bloom.size:,} bits, k={bloom.hash_count}, "
+          f"version '{bloom.version}'")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the blocklist Bloom filter snapshot")
+    parser.add_argument('--output', default=MLRuntimeConfig().blocklist_snapshot_path,
+                        help="snapshot path (default: ML_BLOCKLIST_SNAPSHOT_PATH)")
+    parser.add_argument('--json', default=DEFAULT_JSON, help="blocklist.json to include")
+    parser.add_argument('--list', action='append', default=[],
+                        help="extra domain or hosts file, one entry per line (repeatable)")
+    parser.add_argument('--category', default=DomainDatabase.DEFAULT_CATEGORY,
+                        help="category of the rules read from --list files")
+    parser.add_argument('--database', action='store_true', help="include active GlobalBlocklist rows")
+    parser.add_argument('--no-builtin', action='store_true', help="leave out the built-in domain list")
+    parser.add_argument('--fp', type=float, default=DomainDatabase.FP_RATE, help="target false positive rate")
+    parser.add_argument('--headroom', type=float, default=1.25,
+                        help="capacity as a multiple of the rules stored")
+    parser.add_argument('--version', help="version recorded in the header (default: blocklist.json version)")
+    parser.add_argument('--apply-delta', action='append', default=[],
+                        help="apply a delta file to the existing snapshot instead of rebuilding (repeatable)")
+    parser.add_argument('--verify', action='store_true', help="only verify an existing snapshot")
+    args = parser.parse_args()
+
+    if args.verify:
+        ok = verify(args.output)
+    elif args.apply_delta:
+        ok = apply_deltas(args)
+    else:
+        ok = build(args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
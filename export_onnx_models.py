@@ -0,0 +1,179 @@
+"""
+Export the real text and vision models to ONNX, optionally quantize them to int8,
+and check that ONNX Runtime scores match the torch pipelines.
+
+Usage:
+    python export_onnx_models.py                  # export + quantize + parity check
+    python export_onnx_models.py --no-quantize
+    python export_onnx_models.py --parity-only    # re-check existing exports
+"""
+import argparse
+import io
+import os
+import sys
+
+from services.ml_config import MLRuntimeConfig
+from services.ml_core_real import VISION_MODEL_ID, TEXT_MODEL_ID
+from services.ml_core_onnx import onnx_model_dir, onnx_model_path
+from services.model_store import resolve_model_source
+
+OPSET = 17
+
+PARITY_TEXTS = [
+    "Hello, how are you today?",
+    "I love puppies and sunshine",
+    "This is a normal conversation about homework",
+    "stupid idiot moron dumb",
+    "I hate you so much",
+    "xxx porn sex video",
+    "you are a worthless piece of garbage and everyone hates you",
+    "Let's meet at the library after school to finish the science project. " * 8,
+]
+
+
+def export_text_model():
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    out_dir = onnx_model_dir('text')
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"[INFO] Exporting {TEXT_MODEL_ID} -> {out_dir}")
+
+    source, load_kwargs = resolve_model_source('text', TEXT_MODEL_ID)
+    tokenizer = AutoTokenizer.from_pretrained(source)
+    model = AutoModelForSequenceClassification.from_pretrained(source, **load_kwargs).eval()
+
+    sample = tokenizer(["export sample", "a slightly longer export sample"],
+                       padding=True, return_tensors='pt')
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample['input_ids'], sample['attention_mask']),
+            onnx_model_path('text', quantized=False),
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'}
+            },
+            opset_version=OPSET
+        )
+
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+    print("[OK] Text model exported")
+
+
+def export_vision_model():
+    import torch
+    from transformers import AutoModelForImageClassification, AutoImageProcessor
+
+    out_dir = onnx_model_dir('vision')
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"[INFO] Exporting {VISION_MODEL_ID} -> {out_dir}")
+
+    source, load_kwargs = resolve_model_source('vision', VISION_MODEL_ID)
+    processor = AutoImageProcessor.from_pretrained(source)
+    model = AutoModelForImageClassification.from_pretrained(source, **load_kwargs).eval()
+
+    size = processor.size.get('height', 224) if isinstance(processor.size, dict) else 224
+    dummy = torch.randn(1, 3, size, size)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy,),
+            onnx_model_path('vision', quantized=False),
+            input_names=['pixel_values'],
+            output_names=['logits'],
+            dynamic_axes={'pixel_values': {0: 'batch'}, 'logits': {0: 'batch'}},
+            opset_version=OPSET
+        )
+
+    processor.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+    print("[OK] Vision model exported")
+
+
+def quantize(kind: str):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    src = onnx_model_path(kind, quantized=False)
+    dst = onnx_model_path(kind, quantized=True)
+    print(f"[INFO] Quantizing {kind} model to int8...")
+    quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+    print(f"[OK] {kind}: {os.path.getsize(src) / 1e6:.1f} MB -> {os.path.getsize(dst) / 1e6:.1f} MB")
+
+
+def parity_images():
+    from PIL import Image
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    images = []
+    for color in [(255, 255, 255), (20, 20, 20), (220, 180, 150), (90, 140, 200)]:
+        buf = io.BytesIO()
+        Image.new('RGB', (320, 240), color=color).save(buf, format='JPEG')
+        images.append(buf.getvalue())
+    for _ in range(4):
+        noise = rng.integers(0, 255, size=(240, 320, 3), dtype=np.uint8)
+        buf = io.BytesIO()
+        Image.fromarray(noise).save(buf, format='JPEG')
+        images.append(buf.getvalue())
+    return images
+
+
+def check_parity(tolerance: float) -> bool:
+    """
+    Scores the same inputs with the torch pipelines and the ONNX sessions.
+    Returns False if any score drifts more than the tolerance.
+    """
+    from services.ml_core_real import RealNSFWImageClassifier, RealTextToxicityClassifier
+    from services.ml_core_onnx import (
+        OnnxNSFWImageClassifier, OnnxTextToxicityClassifier, compare_scores
+    )
+
+    ok = True
+    checks = [
+        ('text', RealTextToxicityClassifier, OnnxTextToxicityClassifier, PARITY_TEXTS),
+        ('vision', RealNSFWImageClassifier, OnnxNSFWImageClassifier, parity_images()),
+    ]
+    for kind, torch_cls, onnx_cls, samples in checks:
+        reference = torch_cls().predict_batch(samples)
+        candidate = onnx_cls().predict_batch(samples)
+        report = compare_scores(reference, candidate, tolerance)
+        status = "[DRIFT]" if report['drift'] else "[OK]"
+        print(f"{status} {kind}: max |diff| {report['max_abs_diff']:.4f}, "
+              f"mean |diff| {report['mean_abs_diff']:.4f}, "
+              f"{report['over_tolerance']}/{report['samples']} over tolerance {tolerance}")
+        ok = ok and not report['drift']
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export real ML models to ONNX")
+    parser.add_argument('--no-quantize', action='store_true', help="skip int8 dynamic quantization")
+    parser.add_argument('--parity-only', action='store_true', help="only run the parity check")
+    parser.add_argument('--tolerance', type=float, default=MLRuntimeConfig().onnx_parity_tolerance,
+                        help="max allowed absolute score difference versus torch")
+    args = parser.parse_args()
+
+    if args.no_quantize:
+        MLRuntimeConfig().onnx_quantized = False
+
+    if not args.parity_only:
+        export_text_model()
+        export_vision_model()
+        if not args.no_quantize:
+            quantize('text')
+            quantize('vision')
+
+    print(f"\n[INFO] Parity check ({'int8' if MLRuntimeConfig().onnx_quantized else 'fp32'} graphs)")
+    if not check_parity(args.tolerance):
+        print("[ERROR] ONNX scores drift from the torch pipeline beyond tolerance")
+        sys.exit(1)
+    print("[OK] ONNX backend matches torch. Set ML_INFERENCE_BACKEND=onnx to use it.")
+
+
+if __name__ == "__main__":
+    main()
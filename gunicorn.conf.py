@@ -0,0 +1,42 @@
+"""
+Gunicorn config for multi-worker serving with shared model weights.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app and both models are loaded once in the master (preload_app), then
+workers are forked and share the read-only weight pages copy-on-write.
+Each worker still runs its own dummy-inference warmup after fork.
+Set ML_PRELOAD_MODELS=false to fall back to per-worker loading.
+
+    python worker_memory_report.py        # per-worker RSS vs shared pages
+"""
+import logging
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+pidfile = os.getenv("GUNICORN_PIDFILE", "/tmp/anti-lust-gunicorn.pid")
+preload_app = True
+
+logger = logging.getLogger("gunicorn.conf")
+
+
+def on_starting(server):
+    if os.getenv("ML_PRELOAD_MODELS", "true").lower() != "true":
+        return
+
+    from services.ml_prefork import preload_models
+    try:
+        preload_models()
+    except Exception as e:
+        logger.warning(f"Model preload failed, workers will load their own copies: {e}")
+
+
+def post_fork(server, worker):
+    import torch
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    torch.set_num_threads(threads)
+    server.log.info(f"Worker {worker.pid} forked with {threads} torch threads")
@@ -1,11 +1,13 @@
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional, Dict
 import stripe
 import os
 from dotenv import load_dotenv
 import asyncio
+import base64
 from datetime import datetime
 import logging
 
@@ -16,6 +18,13 @@ from services.sync_service import SyncService
 from services.pattern_storage import PatternStorage
 from services.notification_service import NotificationService
 from services.audit_logger import AuditLogger
+from services.ml_executor import (
+    InferenceUnavailable, InferenceQueueFull, get_inference_executor
+)
+from services.ml_config import MLRuntimeConfig
+from services.ml_admission import (
+    AdmissionRejected, CRITICAL, NORMAL, LOW, get_admission_controller
+)
 from database import engine, Base
 
 from middleware.security import (
@@ -23,6 +32,7 @@ from middleware.security import (
     validate_image_size, validate_text_length, sanitize_input,
     api_key_header, SecurityConfig
 )
+from middleware.uploads import read_image_upload, save_video_upload
 from middleware.monitoring import (
     track_request_metrics, track_ml_prediction, track_auth_failure, get_metrics
 )
@@ -56,12 +66,29 @@ app.middleware("http")(track_request_metrics)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+@app.exception_handler(InferenceUnavailable)
+async def inference_unavailable_handler(request: Request, exc: InferenceUnavailable):
+    if isinstance(exc, AdmissionRejected):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(exc.retry_after)}
+        )
+    if isinstance(exc, InferenceQueueFull):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(exc)},
+            headers={"Retry-After": "1"}
+        )
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
 from services.dopamine_service import DopamineService
 from services.subscription_service import SubscriptionService
 
 payment_service = PaymentService()
 email_service = EmailService()
 ml_service = MLService()
+admission = get_admission_controller()
 sync_service = SyncService()
 pattern_storage = PatternStorage()
 notification_service = NotificationService()
@@ -103,6 +130,15 @@ class URLThreatRequest(BaseModel):
     url: str
     device_id: Optional[str] = None
 
+class BatchNSFWCheckRequest(BaseModel):
+    items: List[NSFWCheckRequest]
+
+class BatchTextClassificationRequest(BaseModel):
+    items: List[TextClassificationRequest]
+
+class BatchURLThreatRequest(BaseModel):
+    items: List[URLThreatRequest]
+
 class DopamineLimitRequest(BaseModel):
     device_id: str
     category: str
@@ -319,6 +355,16 @@ async def get_dopamine_status(device_id: str, api_key: str = Depends(api_key_hea
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def require_models(*kinds: str):
+    """Fail fast with 503 while the required models are still warming up."""
+    if not ml_service.is_ready(*kinds):
+        ml_service.retry_failed_models(*kinds)
+        raise HTTPException(
+            status_code=503,
+            detail="ML models are warming up",
+            headers={"Retry-After": str(MLRuntimeConfig().warmup_retry_after_s)}
+        )
+
 @app.post("/api/ml/nsfw-check")
 @limiter.limit("100/minute")
 async def check_nsfw(
@@ -329,42 +375,121 @@ async def check_nsfw(
     await verify_api_key(api_key)
     
     validate_image_size(nsfw_request.image_base64, max_mb=security_config.max_image_size_mb)
+    require_models('vision')
     
     try:
-        score = await ml_service.detect_nsfw(nsfw_request.image_base64)
-        
-        if hasattr(nsfw_request, 'device_id') and nsfw_request.device_id:
-            device_id = nsfw_request.device_id
-            threat_level = 4 if score > 0.8 else 3 if score > 0.6 else 2 if score > 0.4 else 1
-            
-            await pattern_storage.store_event(
-                device_id=device_id,
-                event_type='nsfw',
-                confidence=score,
-                threat_level=threat_level,
-                threat_score=score,
-                context={'source': 'image_check'}
-            )
-            
-            if score > 0.8 and hasattr(nsfw_request, 'parent_email'):
-                await notification_service.send_critical_alert(
-                    device_id=device_id,
-                    parent_email=nsfw_request.parent_email,
-                    event_type='NSFW',
-                    threat_level='CRITICAL',
-                    confidence=score,
-                    context={'source': 'image_check'}
-                )
-        
-        return {
-            "is_nsfw": score > 0.7,
-            "confidence": score,
-            "threshold": 0.7
-        }
+        with admission.admit(CRITICAL):
+            score = await ml_service.detect_nsfw(nsfw_request.image_base64)
+        return await record_nsfw_result(score, nsfw_request.device_id, nsfw_request.parent_email)
+    except InferenceUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f"NSFW detection failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/ml/nsfw-check/upload")
+@limiter.limit("100/minute")
+async def check_nsfw_upload(
+    request: Request,
+    device_id: Optional[str] = None,
+    parent_email: Optional[str] = None,
+    api_key: str = Depends(api_key_header)
+):
+    """Same as /api/ml/nsfw-check, but takes the image as a raw or multipart upload."""
+    await verify_api_key(api_key)
+    require_models('vision')
+    
+    image_bytes = await read_image_upload(request, max_mb=security_config.max_image_size_mb)
+    
+    try:
+        with admission.admit(CRITICAL):
+            score = await ml_service.detect_nsfw_bytes(image_bytes)
+        return await record_nsfw_result(score, device_id, parent_email)
+    except InferenceUnavailable:
+        raise
     except Exception as e:
         logger.error(f"NSFW detection failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/ml/video-check/upload")
+@limiter.limit("10/minute")
+async def check_video_upload(
+    request: Request,
+    device_id: Optional[str] = None,
+    parent_email: Optional[str] = None,
+    api_key: str = Depends(api_key_header)
+):
+    """
+    Scans an uploaded video (raw or multipart) by scoring scene-change
+    keyframes; returns per-segment scores and frames decoded versus scored.
+    """
+    await verify_api_key(api_key)
+    require_models('vision')
+    
+    video_path = await save_video_upload(request, max_mb=MLRuntimeConfig().video_max_mb)
+    try:
+        with admission.admit(NORMAL, items=0):
+            result = await ml_service.scan_video(video_path)
+    except InferenceUnavailable:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Video scan failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        os.unlink(video_path)
+    
+    score = result['max_score']
+    if device_id:
+        await pattern_storage.store_event(
+            device_id=device_id,
+            event_type='nsfw',
+            confidence=score,
+            threat_level=score_threat_level(score),
+            threat_score=score,
+            context={'source': 'video_check', 'frames_scored': result['frames_scored']}
+        )
+        await send_nsfw_alert(score, device_id, parent_email, source='video_check')
+    
+    return result
+
+def score_threat_level(score: float) -> int:
+    return 4 if score > 0.8 else 3 if score > 0.6 else 2 if score > 0.4 else 1
+
+def nsfw_response(score: float) -> Dict:
+    return {
+        "is_nsfw": score > 0.7,
+        "confidence": score,
+        "threshold": 0.7
+    }
+
+async def send_nsfw_alert(score: float, device_id: str, parent_email: Optional[str],
+                          source: str = 'image_check'):
+    if score > 0.8:
+        await notification_service.send_critical_alert(
+            device_id=device_id,
+            parent_email=parent_email,
+            event_type='NSFW',
+            threat_level='CRITICAL',
+            confidence=score,
+            context={'source': source}
+        )
+
+async def record_nsfw_result(score: float, device_id: Optional[str], parent_email: Optional[str]) -> Dict:
+    if device_id:
+        await pattern_storage.store_event(
+            device_id=device_id,
+            event_type='nsfw',
+            confidence=score,
+            threat_level=score_threat_level(score),
+            threat_score=score,
+            context={'source': 'image_check'}
+        )
+        await send_nsfw_alert(score, device_id, parent_email)
+    
+    return nsfw_response(score)
+
 @app.post("/api/ml/classify-text")
 @limiter.limit("100/minute")
 async def classify_text(
@@ -377,9 +502,11 @@ async def classify_text(
     validate_text_length(text_request.text, max_length=security_config.max_text_length)
     
     sanitized_text = sanitize_input(text_request.text)
+    require_models('text')
     
     try:
-        result = await ml_service.classify_text(sanitized_text)
+        with admission.admit(NORMAL):
+            result = await ml_service.classify_text(sanitized_text)
         
         if hasattr(text_request, 'device_id') and text_request.device_id:
             device_id = text_request.device_id
@@ -393,6 +520,8 @@ async def classify_text(
             )
         
         return result
+    except InferenceUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -406,11 +535,12 @@ async def analyze_url(
     await verify_api_key(api_key)
     
     try:
-        threat_score = await ml_service.analyze_url(url_request.url)
+        with admission.admit(LOW):
+            threat_score = await ml_service.analyze_url(url_request.url)
         
         if hasattr(url_request, 'device_id') and url_request.device_id:
             device_id = url_request.device_id
-            threat_level = 4 if threat_score > 0.8 else 3 if threat_score > 0.6 else 2 if threat_score > 0.4 else 1
+            threat_level = score_threat_level(threat_score)
             
             await pattern_storage.store_event(
                 device_id=device_id,
@@ -426,9 +556,197 @@ async def analyze_url(
             "threat_score": threat_score,
             "is_blocked": threat_score > 0.7
         }
+    except InferenceUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def check_batch_size(items: List) -> None:
+    max_items = MLRuntimeConfig().batch_max_items
+    if len(items) > max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(items)} items exceeds limit of {max_items}"
+        )
+
+def batch_item_error(index: int, error: Exception) -> Dict:
+    if isinstance(error, HTTPException):
+        detail = error.detail
+    else:
+        detail = str(error) or error.__class__.__name__
+    return {
+        "index": index,
+        "ok": False,
+        "error": detail,
+        "retryable": isinstance(error, InferenceUnavailable)
+    }
+
+def batch_response(results: List[Dict], events_stored: bool = True) -> Dict:
+    failed = sum(1 for r in results if not r["ok"])
+    return {
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "events_stored": events_stored
+    }
+
+async def store_batch_events(events: List[Dict], kind: str) -> bool:
+    # Scores are already computed, so a storage failure is reported next to them instead of discarding them
+    try:
+        await pattern_storage.store_events(events)
+        return True
+    except Exception as e:
+        logger.error(f"Batch {kind} event storage failed: {e}")
+        return False
+
+# Bulk scans are shed before single interactive checks
+BATCH_PRIORITY = LOW
+
+def validate_batch_items(items: List, validate) -> Dict[int, Exception]:
+    errors = {}
+    for i, item in enumerate(items):
+        try:
+            validate(item)
+        except HTTPException as e:
+            errors[i] = e
+    return errors
+
+@app.post("/api/ml/nsfw-check/batch")
+@limiter.limit("20/minute")
+async def check_nsfw_batch(
+    request: Request,
+    batch_request: BatchNSFWCheckRequest,
+    api_key: str = Depends(api_key_header)
+):
+    await verify_api_key(api_key)
+    check_batch_size(batch_request.items)
+    require_models('vision')
+    
+    items = batch_request.items
+    errors = validate_batch_items(
+        items, lambda item: validate_image_size(item.image_base64, max_mb=security_config.max_image_size_mb)
+    )
+    
+    images = {}
+    for i, item in enumerate(items):
+        if i in errors:
+            continue
+        try:
+            images[i] = base64.b64decode(item.image_base64)
+        except Exception as e:
+            errors[i] = ValueError(f"Invalid base64 image: {e}")
+    
+    with admission.admit(BATCH_PRIORITY, items=len(images)):
+        scores = dict(zip(images, await ml_service.detect_nsfw_batch(list(images.values()))))
+    
+    results = []
+    events = []
+    for i, item in enumerate(items):
+        outcome = errors.get(i, scores.get(i))
+        if isinstance(outcome, Exception):
+            results.append(batch_item_error(i, outcome))
+            continue
+        results.append({"index": i, "ok": True, **nsfw_response(outcome)})
+        if item.device_id:
+            events.append({
+                'device_id': item.device_id,
+                'event_type': 'nsfw',
+                'confidence': outcome,
+                'threat_level': score_threat_level(outcome),
+                'threat_score': outcome,
+                'context': {'source': 'image_check', 'batch': True}
+            })
+    
+    events_stored = await store_batch_events(events, 'NSFW')
+    for i, item in enumerate(items):
+        if results[i]["ok"] and item.device_id:
+            try:
+                await send_nsfw_alert(results[i]["confidence"], item.device_id, item.parent_email)
+            except Exception as e:
+                logger.error(f"Batch NSFW alert for item {i} failed: {e}")
+    
+    return batch_response(results, events_stored)
+
+@app.post("/api/ml/classify-text/batch")
+@limiter.limit("20/minute")
+async def classify_text_batch(
+    request: Request,
+    batch_request: BatchTextClassificationRequest,
+    api_key: str = Depends(api_key_header)
+):
+    await verify_api_key(api_key)
+    check_batch_size(batch_request.items)
+    require_models('text')
+    
+    items = batch_request.items
+    errors = validate_batch_items(
+        items, lambda item: validate_text_length(item.text, max_length=security_config.max_text_length)
+    )
+    texts = {i: sanitize_input(item.text) for i, item in enumerate(items) if i not in errors}
+    with admission.admit(BATCH_PRIORITY, items=len(texts)):
+        outcomes = dict(zip(texts, await ml_service.classify_text_batch(list(texts.values()))))
+    
+    results = []
+    events = []
+    for i, item in enumerate(items):
+        outcome = errors.get(i, outcomes.get(i))
+        if isinstance(outcome, Exception):
+            results.append(batch_item_error(i, outcome))
+            continue
+        results.append({"index": i, "ok": True, **outcome})
+        if item.device_id:
+            events.append({
+                'device_id': item.device_id,
+                'event_type': 'text',
+                'confidence': outcome['confidence'],
+                'threat_level': 3 if outcome['is_harmful'] else 0,
+                'threat_score': outcome['confidence'],
+                'context': {'classification': outcome['classification'], 'batch': True}
+            })
+    
+    events_stored = await store_batch_events(events, 'text')
+    return batch_response(results, events_stored)
+
+@app.post("/api/ml/threat-url/batch")
+@limiter.limit("20/minute")
+async def analyze_url_batch(
+    request: Request,
+    batch_request: BatchURLThreatRequest,
+    api_key: str = Depends(api_key_header)
+):
+    await verify_api_key(api_key)
+    check_batch_size(batch_request.items)
+    
+    items = batch_request.items
+    with admission.admit(BATCH_PRIORITY, items=len(items)):
+        outcomes = await ml_service.analyze_url_batch([item.url for item in items])
+    
+    results = []
+    events = []
+    for i, (item, outcome) in enumerate(zip(items, outcomes)):
+        if isinstance(outcome, Exception):
+            results.append(batch_item_error(i, outcome))
+            continue
+        results.append({
+            "index": i,
+            "ok": True,
+            "url": item.url,
+            "threat_score": outcome,
+            "is_blocked": outcome > 0.7
+        })
+        if item.device_id:
+            events.append({
+                'device_id': item.device_id,
+                'event_type': 'url',
+                'confidence': outcome,
+                'threat_level': score_threat_level(outcome),
+                'threat_score': outcome,
+                'context': {'url': item.url, 'batch': True}
+            })
+    
+    events_stored = await store_batch_events(events, 'URL')
+    return batch_response(results, events_stored)
+
 @app.get("/api/patterns/analysis/{device_id}")
 @limiter.limit("50/minute")
 async def get_pattern_analysis(
@@ -438,6 +756,7 @@ async def get_pattern_analysis(
     api_key: str = Depends(api_key_header)
 ):
     await verify_api_key(api_key)
+    admission.require(LOW)
     
     try:
         patterns = await pattern_storage.analyze_temporal_patterns(device_id, days=days)
@@ -479,7 +798,7 @@ async def prometheus_metrics():
 @limiter.limit("20/minute")
 async def ml_statistics(request: Request):
     try:
-        return ml_service.get_health()
+        return {**ml_service.get_health(), 'admission': admission.get_stats()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -488,6 +807,7 @@ async def generate_research_report(
     device_id: str,
     background_tasks: BackgroundTasks
 ):
+    admission.require(LOW)
     try:
         logs = await sync_service.get_logs_by_device(device_id)
         
@@ -530,27 +850,47 @@ async def health_check():
         "database": "connected"
     }
 
+@app.get("/health/live")
+async def liveness_check():
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    ready = ml_service.is_ready()
+    if not ready:
+        ml_service.retry_failed_models()
+    content = {
+        "status": "ready" if ready else "warming_up",
+        "models": ml_service.get_readiness()
+    }
+    if not ready:
+        return JSONResponse(
+            status_code=503,
+            content=content,
+            headers={"Retry-After": str(MLRuntimeConfig().warmup_retry_after_s)}
+        )
+    return content
+
 @app.on_event("startup")
 async def startup():
     logger.info("Initializing database...")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
-    logger.info("Loading ML models...")
-    if hasattr(ml_service, 'load_models') and callable(getattr(ml_service, 'load_models')):
-        try:
-            ml_service.load_models()
-            logger.info("✓ ML models loaded successfully")
-        except Exception as e:
-            logger.warning(f"ML model loading failed (degraded mode): {e}")
-    else:
-        logger.warning("ML service in degraded mode - models not available")
+    logger.info("Warming up ML models in the background...")
+    ml_service.start_warmup()
+    ml_service.start_blocklist_updates()
     
     logger.info("✓ Server ready!")
 
+@app.on_event("shutdown")
+async def shutdown():
+    ml_service.stop_blocklist_updates()
+    get_inference_executor().shutdown()
+
 from services.ml_training import ModelTrainer
 
-model_trainer = ModelTrainer()
+model_trainer = ModelTrainer(scorer=ml_service.score_background)
 
 @app.post("/api/ml/train")
 async def train_models(
@@ -564,6 +904,23 @@ async def train_models(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/ml/blocklist/rebuild")
+@limiter.limit("5/hour")
+async def rebuild_blocklist(
+    request: Request,
+    include_database: bool = True,
+    api_key: str = Depends(api_key_header)
+):
+    """
+    Rebuilds the domain blocklist and writes it to the snapshot file; the
+    other workers map the new snapshot on their next delta poll.
+    """
+    await verify_api_key(api_key)
+    try:
+        return await ml_service.rebuild_blocklist(include_database)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 class TrainFileRequest(BaseModel):
     file_path: str
     data_type: str
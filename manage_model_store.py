@@ -0,0 +1,80 @@
+"""
+Populate and verify the local model artifact store used for offline startup.
+
+Usage:
+    python manage_model_store.py populate              # fetch both models from the hub
+    python manage_model_store.py populate --kind text --revision <commit>
+    python manage_model_store.py verify                # check checksums against the manifest
+    python manage_model_store.py list
+"""
+import argparse
+import sys
+
+from services.ml_core_real import VISION_MODEL_ID, TEXT_MODEL_ID
+from services.model_store import ModelStore, MODEL_KINDS
+
+MODEL_IDS = {
+    'vision': VISION_MODEL_ID,
+    'text': TEXT_MODEL_ID,
+}
+
+
+def populate(store: ModelStore, kinds, revision: str) -> bool:
+    ok = True
+    for kind in kinds:
+        print(f"[INFO] Populating {kind}: {MODEL_IDS[kind]}@{revision}")
+        try:
+            entry = store.populate(kind, MODEL_IDS[kind], revision=revision)
+            print(f"[OK] {kind}: revision {entry['revision']}, {len(entry['files'])} files")
+        except Exception as e:
+            print(f"[ERROR] {kind}: {e}")
+            ok = False
+    return ok and verify(store, kinds)
+
+
+def verify(store: ModelStore, kinds) -> bool:
+    ok = True
+    for kind in kinds:
+        problems = store.verify(kind)
+        if problems:
+            ok = False
+            for problem in problems:
+                print(f"[ERROR] {problem}")
+        else:
+            print(f"[OK] {kind} verified")
+    return ok
+
+
+def list_models(store: ModelStore) -> bool:
+    models = store.load_manifest()['models']
+    if not models:
+        print(f"[INFO] Store at {store.root} is empty")
+    for kind, entry in sorted(models.items()):
+        print(f"{kind:8} {entry['model_id']}@{entry['revision']} "
+              f"({len(entry['files'])} files, {entry['created_at']})")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local model artifact store")
+    parser.add_argument('command', choices=['populate', 'verify', 'list'])
+    parser.add_argument('--kind', choices=sorted(MODEL_KINDS), help="only this model (default: all)")
+    parser.add_argument('--revision', default="main", help="hub revision to pin when populating")
+    parser.add_argument('--root', help="store directory (default: ML_MODEL_STORE_DIR)")
+    args = parser.parse_args()
+
+    store = ModelStore(args.root)
+    kinds = [args.kind] if args.kind else sorted(MODEL_KINDS)
+
+    if args.command == 'populate':
+        ok = populate(store, kinds, args.revision)
+    elif args.command == 'verify':
+        ok = verify(store, kinds)
+    else:
+        ok = list_models(store)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -35,6 +35,91 @@ ml_prediction_duration = Histogram(
     ['model_type']
 )
 
+ml_batch_size = Histogram(
+    'ml_batch_size',
+    'Items per batched ML forward pass',
+    ['model_type'],
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+ml_batch_duration = Histogram(
+    'ml_batch_duration_seconds',
+    'Batched ML forward pass duration in seconds',
+    ['model_type']
+)
+
+ml_batch_queue_wait = Histogram(
+    'ml_batch_queue_wait_seconds',
+    'Time the oldest request in a batch waited before inference',
+    ['model_type'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+
+ml_inference_queue_depth = Gauge(
+    'ml_inference_queue_depth',
+    'Inference calls waiting for an executor worker'
+)
+
+ml_inference_running = Gauge(
+    'ml_inference_running',
+    'Inference calls currently executing'
+)
+
+ml_inference_queue_wait = Histogram(
+    'ml_inference_queue_wait_seconds',
+    'Time inference calls wait for a worker, by scheduling lane',
+    ['lane'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+ml_inference_rejections = Counter(
+    'ml_inference_rejections_total',
+    'Inference calls rejected or abandoned',
+    ['reason']
+)
+
+ml_cascade_decisions = Counter(
+    'ml_cascade_decisions_total',
+    'Text cascade verdicts by the stage that decided them',
+    ['stage', 'outcome']
+)
+
+ml_cascade_stage_duration = Histogram(
+    'ml_cascade_stage_duration_seconds',
+    'Time spent in each text cascade stage',
+    ['stage'],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+ml_coalesced_requests = Counter(
+    'ml_coalesced_requests_total',
+    'Scan requests that joined an identical in-flight scan instead of running their own',
+    ['kind']
+)
+
+ml_admission_decisions = Counter(
+    'ml_admission_decisions_total',
+    'ML requests admitted or shed by the admission controller',
+    ['priority', 'decision']
+)
+
+ml_admission_load = Gauge(
+    'ml_admission_load',
+    'Load estimate used for admission (1.0 = queue full or latency at target)'
+)
+
+ml_blocklist_rules = Gauge(
+    'ml_blocklist_rules',
+    'Domain rules in the live blocklist index'
+)
+
+ml_blocklist_update_duration = Histogram(
+    'ml_blocklist_update_duration_seconds',
+    'Time to build a blocklist index (rebuild) or apply a delta file, before the swap',
+    ['kind'],
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300]
+)
+
 authentication_failures = Counter(
     'authentication_failures_total',
     'Total authentication failures',
@@ -82,6 +167,38 @@ def track_ml_prediction(model_type: str, threat_level: str, duration: float):
         model_type=model_type
     ).observe(duration)
 
+def track_ml_batch(model_type: str, batch_size: int, duration: float, queue_wait: float):
+    ml_batch_size.labels(model_type=model_type).observe(batch_size)
+    ml_batch_duration.labels(model_type=model_type).observe(duration)
+    ml_batch_queue_wait.labels(model_type=model_type).observe(queue_wait)
+
+def track_inference_queue(queued: int, running: int):
+    ml_inference_queue_depth.set(queued)
+    ml_inference_running.set(running)
+
+def track_inference_queue_wait(lane: str, wait: float):
+    ml_inference_queue_wait.labels(lane=lane).observe(wait)
+
+def track_inference_rejection(reason: str):
+    ml_inference_rejections.labels(reason=reason).inc()
+
+def track_cascade_stage(stage: str, duration: float):
+    ml_cascade_stage_duration.labels(stage=stage).observe(duration)
+
+def track_cascade_decision(stage: str, is_safe: bool):
+    ml_cascade_decisions.labels(stage=stage, outcome='safe' if is_safe else 'unsafe').inc()
+
+def track_coalesced_request(kind: str):
+    ml_coalesced_requests.labels(kind=kind).inc()
+
+def track_admission(priority: str, admitted: bool, load: float):
+    ml_admission_decisions.labels(priority=priority, decision='admitted' if admitted else 'shed').inc()
+    ml_admission_load.set(load)
+
+def track_blocklist_update(kind: str, duration: float, rules: int):
+    ml_blocklist_update_duration.labels(kind=kind).observe(duration)
+    ml_blocklist_rules.set(rules)
+
 def track_auth_failure(reason: str):
     authentication_failures.labels(reason=reason).inc()
     logger.warning(f"Authentication failure: {reason}")
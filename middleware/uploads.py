@@ -0,0 +1,190 @@
+from fastapi import HTTPException, Request, status
+from typing import Callable, List, Optional, Tuple
+import os
+import tempfile
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:
+    import multipart
+    from multipart.multipart import parse_options_header
+
+RAW_IMAGE_TYPES = ("application/octet-stream", "image/")
+IMAGE_FIELD_NAMES = (b"image", b"file")
+RAW_VIDEO_TYPES = ("application/octet-stream", "video/")
+VIDEO_FIELD_NAMES = (b"video", b"file")
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def _too_large(max_bytes: int, what: str = "Image") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"{what} exceeds limit of {max_bytes / (1024 * 1024):.0f}MB",
+    )
+
+
+def _check_content_length(request: Request, limit: int, max_bytes: int, what: str):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise _too_large(max_bytes, what)
+
+
+async def _read_raw(request: Request, max_bytes: int, write: Callable[[bytes], None],
+                    what: str = "Image") -> int:
+    _check_content_length(request, max_bytes, max_bytes, what)
+
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise _too_large(max_bytes, what)
+        write(chunk)
+    return received
+
+
+class _FilePartCollector:
+    """Passes on the data of the first file part (or a part with one of field_names)."""
+
+    def __init__(self, max_bytes: int, write: Callable[[bytes], None],
+                 field_names: Tuple[bytes, ...] = IMAGE_FIELD_NAMES, what: str = "Image"):
+        self.max_bytes = max_bytes
+        self.write = write
+        self.field_names = field_names
+        self.what = what
+        self.size = 0
+        self.found = False
+        self.done = False
+        self._collecting = False
+        self._field = b""
+        self._value = b""
+        self._disposition = b""
+
+    def on_part_begin(self):
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._value += data[start:end]
+
+    def on_header_end(self):
+        if self._field.lower() == b"content-disposition":
+            self._disposition = self._value
+        self._field = b""
+        self._value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        is_file = b"filename" in options or options.get(b"name") in self.field_names
+        self._collecting = is_file and not self.found
+        self.found = self.found or is_file
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if not self._collecting:
+            return
+        self.size += end - start
+        if self.size > self.max_bytes:
+            raise _too_large(self.max_bytes, self.what)
+        self.write(data[start:end])
+
+    def on_part_end(self):
+        if self._collecting:
+            self.done = True
+        self._collecting = False
+
+    def callbacks(self) -> dict:
+        return {name: getattr(self, name) for name in (
+            "on_part_begin", "on_header_field", "on_header_value", "on_header_end",
+            "on_headers_finished", "on_part_data", "on_part_end"
+        )}
+
+
+async def _read_multipart(request: Request, boundary: Optional[bytes], max_bytes: int,
+                          write: Callable[[bytes], None],
+                          field_names: Tuple[bytes, ...] = IMAGE_FIELD_NAMES, what: str = "Image") -> int:
+    if not boundary:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing multipart boundary")
+
+    limit = max_bytes + MULTIPART_OVERHEAD_BYTES
+    _check_content_length(request, limit, max_bytes, what)
+
+    collector = _FilePartCollector(max_bytes, write, field_names, what)
+    parser = multipart.MultipartParser(boundary, collector.callbacks())
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > limit:
+            raise _too_large(max_bytes, what)
+        parser.write(chunk)
+        if collector.done:
+            break
+    parser.finalize()
+
+    if not collector.found:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"No {what.lower()} file in multipart body"
+        )
+    return collector.size
+
+
+async def read_image_upload(request: Request, max_mb: int = 10) -> bytes:
+    """
+    Streams an image from a raw (application/octet-stream, image/*) or
+    multipart/form-data body, rejecting it with 413 as soon as it passes
+    max_mb instead of buffering the whole request first.
+    """
+    max_bytes = max_mb * 1024 * 1024
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    content_type = content_type.decode("latin-1").lower()
+
+    chunks: List[bytes] = []
+    if content_type == "multipart/form-data":
+        await _read_multipart(request, options.get(b"boundary"), max_bytes, chunks.append)
+    elif content_type.startswith(RAW_IMAGE_TYPES):
+        await _read_raw(request, max_bytes, chunks.append)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected application/octet-stream, image/* or multipart/form-data",
+        )
+
+    image_bytes = b"".join(chunks)
+    if not image_bytes:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty image upload")
+    return image_bytes
+
+
+async def save_video_upload(request: Request, max_mb: int = 100) -> str:
+    """
+    Streams a video from a raw (application/octet-stream, video/*) or
+    multipart/form-data body into a temporary file and returns its path.
+    The caller must delete the file. Rejected with 413 as soon as the body
+    passes max_mb.
+    """
+    max_bytes = max_mb * 1024 * 1024
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    content_type = content_type.decode("latin-1").lower()
+
+    if content_type != "multipart/form-data" and not content_type.startswith(RAW_VIDEO_TYPES):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected application/octet-stream, video/* or multipart/form-data",
+        )
+
+    fd, path = tempfile.mkstemp(prefix="video-upload-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if content_type == "multipart/form-data":
+                size = await _read_multipart(
+                    request, options.get(b"boundary"), max_bytes, f.write, VIDEO_FIELD_NAMES, "Video"
+                )
+            else:
+                size = await _read_raw(request, max_bytes, f.write, "Video")
+        if not size:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty video upload")
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
@@ -0,0 +1,397 @@
+"""
+Streaming, incremental blocklist ingestion.
+Large list files are hashed chunk by chunk (domain strings are never kept),
+versioned delta files add and remove rules, and every update is built on a
+worker thread and swapped into the live DomainDatabase atomically, so URL
+lookups never wait for an ingest.
+"""
+import asyncio
+import glob
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from services.blocklist_sources import (
+    iter_domain_file, iter_global_blocklist, iter_json_blocklist, json_blocklist_version, normalize_domain
+)
+from services.ml_data import BloomFilter, DomainDatabase, DomainSuffixIndex, item_digests
+from middleware.monitoring import track_blocklist_update
+
+logger = logging.getLogger(__name__)
+
+
+class DeltaVersionError(ValueError):
+    """Raised when a delta file does not apply to the live blocklist version."""
+
+
+class DomainIndexBuilder:
+    """
+    Accumulates rules from any number of streamed sources and builds a
+    Bloom filter and exact index sized for the final rule count.
+
+    Domains are digested in chunks of chunk_size, so memory holds 17 bytes
+    per rule (digest + category code) instead of the domain strings. When
+    a domain appears in several sources the first one wins.
+    """
+    def __init__(self, chunk_size: int = 65536):
+        self.chunk_size = chunk_size
+        self.categories: List[str] = []
+        self._digests: List[np.ndarray] = []
+        self._codes: List[np.ndarray] = []
+        self.count = 0
+
+    def _code(self, category: str) -> int:
+        if category not in self.categories:
+            if len(self.categories) > 255:
+                raise ValueError("At most 256 domain categories are supported")
+            self.categories.append(category)
+        return self.categories.index(category)
+
+    def add_domains(self, domains: List[str], category: str = DomainDatabase.DEFAULT_CATEGORY):
+        if not domains:
+            return
+        self._digests.append(item_digests(domains))
+        self._codes.append(np.full(len(domains), self._code(category), dtype=np.uint8))
+        self.count += len(domains)
+
+    def add(self, domains: Iterable[str], category: str = DomainDatabase.DEFAULT_CATEGORY) -> int:
+        """Streams domains (e.g. iter_domain_file) into the builder; returns how many were read."""
+        before = self.count
+        chunk = []
+        for domain in domains:
+            chunk.append(domain)
+            if len(chunk) >= self.chunk_size:
+                self.add_domains(chunk, category)
+                chunk = []
+        self.add_domains(chunk, category)
+        return self.count - before
+
+    def build(self, fp_rate: float = DomainDatabase.FP_RATE, headroom: float = 1.25,
+              min_capacity: int = DomainDatabase.CAPACITY) -> Tuple[BloomFilter, DomainSuffixIndex]:
+        digests = np.concatenate(self._digests) if self._digests else np.zeros((0, 2), dtype=np.uint64)
+        codes = np.concatenate(self._codes) if self._codes else np.zeros(0, dtype=np.uint8)
+        hashes, first = np.unique(digests[:, 0], return_index=True)
+
+        bloom = BloomFilter(max(min_capacity, int(len(hashes) * headroom)), fp_rate)
+        bloom.add_digests(digests[first])
+        return bloom, DomainSuffixIndex.from_arrays(hashes, codes[first], self.categories)
+
+
+@dataclass
+class BlocklistDelta:
+    """
+    A versioned change set. The text format is streamed line by line:
+
+        #version 2026-10-18.2
+        #base 2026-10-18.1
+        +example.com adult
+        -example.org
+
+    base is the version the delta applies to; after applying, the
+    blocklist is at version. Entries may be domains or URLs.
+    """
+    version: str
+    base: str
+    adds: Dict[str, List[str]] = field(default_factory=dict)
+    removes: List[str] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return sum(len(domains) for domains in self.adds.values()) + len(self.removes)
+
+    @staticmethod
+    def read_header(path: str) -> Tuple[Optional[str], Optional[str]]:
+        headers = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.startswith('#'):
+                    break
+                key, _, value = line[1:].strip().partition(' ')
+                headers[key] = value.strip()
+        return headers.get('version'), headers.get('base')
+
+    @classmethod
+    def load(cls, path: str, default_category: str = DomainDatabase.DEFAULT_CATEGORY) -> 'BlocklistDelta':
+        version, base = cls.read_header(path)
+        if not version or base is None:
+            raise ValueError(f"{path}: delta files need '#version' and '#base' headers")
+        delta = cls(version=version, base=base)
+        with open(path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                op, fields = line[0], line[1:].split()
+                domain = normalize_domain(fields[0]) if fields else None
+                if op not in '+-' or domain is None:
+                    raise ValueError(f"{path}:{number}: expected '+domain [category]' or '-domain'")
+                if op == '+':
+                    delta.adds.setdefault(fields[1] if len(fields) > 1 else default_category, []).append(domain)
+                else:
+                    delta.removes.append(domain)
+        return delta
+
+
+def apply_delta(bloom: BloomFilter, index: DomainSuffixIndex,
+                delta: BlocklistDelta) -> Tuple[BloomFilter, DomainSuffixIndex]:
+    """
+    New filter and index with the delta applied (removes first, then
+    adds); the inputs are left untouched. Removed domains keep their Bloom
+    bits (the exact index rejects them) until the next rebuild.
+    """
+    new_index = index.copy()
+    if delta.removes:
+        new_index.remove_hashes(item_digests(delta.removes)[:, 0])
+
+    new_bloom = bloom
+    if delta.adds:
+        digests, codes = [], []
+        for category, domains in delta.adds.items():
+            digests.append(item_digests(domains))
+            codes.append(np.full(len(domains), new_index.category_code(category), dtype=np.uint8))
+        digests = np.concatenate(digests)
+        new_index.merge(digests[:, 0].copy(), np.concatenate(codes))
+        new_bloom = bloom.copy()
+        new_bloom.add_digests(digests)
+    return new_bloom, new_index
+
+
+async def add_database_rows(builder: DomainIndexBuilder,
+                            rows: Optional[AsyncIterator[Tuple[str, Optional[str]]]] = None) -> int:
+    """
+    Streams (domain, category) rows, by default the active GlobalBlocklist
+    rows, into the builder in chunk_size batches per category. Hashing runs
+    on a worker thread. Returns how many rows were read.
+    """
+    loop = asyncio.get_running_loop()
+    before = builder.count
+    batch: Dict[str, List[str]] = {}
+    pending = 0
+    async for domain, category in (rows if rows is not None else iter_global_blocklist()):
+        batch.setdefault(category or DomainDatabase.DEFAULT_CATEGORY, []).append(domain)
+        pending += 1
+        if pending >= builder.chunk_size:
+            for category, domains in batch.items():
+                await loop.run_in_executor(None, builder.add_domains, domains, category)
+            batch, pending = {}, 0
+    for category, domains in batch.items():
+        await loop.run_in_executor(None, builder.add_domains, domains, category)
+    return builder.count - before
+
+
+class BlocklistIngestor:
+    """
+    Keeps a live DomainDatabase current: full rebuilds from list files,
+    blocklist.json and the GlobalBlocklist table, and delta files picked up
+    from a directory. Updates are serialized; building runs on a worker
+    thread and only the final swap touches the database.
+
+    With a snapshot_path, rebuilds are written to the snapshot before they
+    are swapped in, and the poller maps the snapshot again whenever another
+    process rewrites it. Every worker (and every restart) then serves the
+    same rebuild, and delta files based on its version chain everywhere.
+    """
+    def __init__(self, db: DomainDatabase, lists: Optional[List[str]] = None,
+                 json_path: Optional[str] = None, delta_dir: Optional[str] = None,
+                 fp_rate: float = DomainDatabase.FP_RATE, snapshot_path: Optional[str] = None):
+        self.db = db
+        self.lists = list(lists or [])
+        self.json_path = json_path
+        self.delta_dir = delta_dir
+        self.fp_rate = fp_rate
+        self.snapshot_path = snapshot_path
+        self._snapshot_seen = self._snapshot_signature()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.last_rebuild: Optional[Dict] = None
+        self.last_delta: Optional[Dict] = None
+        self.deltas_applied = 0
+        self.rejected: List[str] = []
+
+    def _snapshot_signature(self) -> Optional[Tuple[int, int, int]]:
+        if not self.snapshot_path:
+            return None
+        try:
+            st = os.stat(self.snapshot_path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _write_snapshot(self, bloom: BloomFilter, index: DomainSuffixIndex, version: str):
+        bloom.save(self.snapshot_path, version=version, payload=index.to_bytes())
+        self._snapshot_seen = self._snapshot_signature()
+
+    def _build_from_files(self, builder: DomainIndexBuilder):
+        builder.add(DomainDatabase.builtin_domains())
+        if self.json_path and os.path.exists(self.json_path):
+            builder.add(iter_json_blocklist(self.json_path))
+        for path in self.lists:
+            builder.add(iter_domain_file(path))
+
+    async def rebuild(self, include_database: bool = True, version: Optional[str] = None) -> Dict:
+        """
+        Rebuilds the whole index from the configured sources, writes it to
+        the snapshot (if configured) and swaps it in.
+        """
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            builder = DomainIndexBuilder()
+            await loop.run_in_executor(None, self._build_from_files, builder)
+            if include_database:
+                await add_database_rows(builder)
+            bloom, index = await loop.run_in_executor(None, builder.build, self.fp_rate)
+
+            if version is None:
+                version = json_blocklist_version(self.json_path) if self.json_path and os.path.exists(self.json_path) else ""
+            if self.snapshot_path:
+                await loop.run_in_executor(None, self._write_snapshot, bloom, index, version)
+            self.db.swap(bloom, index, version)
+            elapsed = time.perf_counter() - start
+            track_blocklist_update('rebuild', elapsed, len(index))
+            self.last_rebuild = {
+                'version': version,
+                'entries_read': builder.count,
+                'rules': len(index),
+                'seconds': round(elapsed, 3),
+                'entries_per_s': round(builder.count / elapsed) if elapsed > 0 else None,
+                'snapshot': self.snapshot_path
+            }
+            logger.info(f"Blocklist rebuilt: {self.last_rebuild}")
+            return self.last_rebuild
+
+    async def reload_snapshot(self) -> bool:
+        """
+        Swaps in the snapshot if the file changed since this process last
+        wrote or mapped it, e.g. after a rebuild in another worker.
+        """
+        if not self.snapshot_path:
+            return False
+        async with self._lock:
+            signature = self._snapshot_signature()
+            if signature is None or signature == self._snapshot_seen:
+                return False
+            self._snapshot_seen = signature
+            start = time.perf_counter()
+            state = await asyncio.get_running_loop().run_in_executor(
+                None, DomainDatabase.read_snapshot, self.snapshot_path
+            )
+            if state is None:
+                return False
+            self.db.swap(*state)
+            track_blocklist_update('reload', time.perf_counter() - start, len(state[1]))
+            logger.info(f"Blocklist snapshot reloaded: version '{state[2]}', {len(state[1]):,} rules")
+            return True
+
+    async def apply_delta_file(self, path: str) -> Dict:
+        """Applies one delta file; raises DeltaVersionError if its base is not the live version."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            delta = await loop.run_in_executor(None, BlocklistDelta.load, path)
+            bloom, index, current = self.db.state
+            if delta.base != current:
+                raise DeltaVersionError(
+                    f"{os.path.basename(path)} applies to version '{delta.base}', blocklist is at '{current}'"
+                )
+            bloom, index = await loop.run_in_executor(None, apply_delta, bloom, index, delta)
+            self.db.swap(bloom, index, delta.version)
+
+            elapsed = time.perf_counter() - start
+            track_blocklist_update('delta', elapsed, len(index))
+            if len(index) > bloom.items_count:
+                logger.warning("Blocklist exceeds its Bloom filter capacity; rebuild to restore the fp rate")
+            self.deltas_applied += 1
+            self.last_delta = {
+                'file': os.path.basename(path),
+                'version': delta.version,
+                'entries': delta.size,
+                'rules': len(index),
+                'ms': round(elapsed * 1000, 1)
+            }
+            logger.info(f"Blocklist delta applied: {self.last_delta}")
+            return self.last_delta
+
+    async def apply_pending(self) -> int:
+        """
+        Applies the chain of delta files in delta_dir that starts at the
+        live version, in file name order. Malformed files are renamed to
+        *.rejected and skipped. Returns how many were applied.
+        """
+        if not self.delta_dir or not os.path.isdir(self.delta_dir):
+            return 0
+        applied: List[str] = []
+        paths = [
+            path for path in sorted(glob.glob(os.path.join(self.delta_dir, '*.delta')))
+            if os.path.basename(path) not in self.rejected
+        ]
+        progress = True
+        while progress:
+            progress = False
+            for path in paths:
+                if path in applied:
+                    continue
+                try:
+                    version, base = BlocklistDelta.read_header(path)
+                except OSError:
+                    continue
+                if base == self.db.version and version != base:
+                    try:
+                        await self.apply_delta_file(path)
+                    except DeltaVersionError:
+                        continue
+                    except ValueError as e:
+                        self._reject(path, e)
+                        continue
+                    applied.append(path)
+                    progress = True
+        return len(applied)
+
+    def _reject(self, path: str, error: Exception):
+        """
+        Renames a malformed delta file to *.rejected so the poller does not
+        retry it (and log it) on every interval.
+        """
+        logger.error(f"Rejecting blocklist delta {os.path.basename(path)}: {error}")
+        try:
+            os.replace(path, path + '.rejected')
+        except OSError as e:
+            logger.error(f"Could not rename {path}: {e}")
+        self.rejected.append(os.path.basename(path))
+
+    async def _poll(self, interval_s: float):
+        while True:
+            try:
+                await self.reload_snapshot()
+                await self.apply_pending()
+            except Exception as e:
+                logger.error(f"Blocklist delta update failed: {e}")
+            await asyncio.sleep(interval_s)
+
+    def start(self, interval_s: float):
+        """Polls the snapshot and delta_dir on the running event loop."""
+        if self._task is None and interval_s > 0:
+            self._task = asyncio.get_running_loop().create_task(self._poll(interval_s))
+        return self._task
+
+    def stop(self):
+        """Cancels the poller started by start()."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        bloom, index, version = self.db.state
+        return {
+            'version': version,
+            'rules': len(index),
+            'bloom_capacity': bloom.items_count,
+            'deltas_applied': self.deltas_applied,
+            'rejected_deltas': list(self.rejected),
+            'last_delta': self.last_delta,
+            'last_rebuild': self.last_rebuild
+        }
@@ -0,0 +1,76 @@
+"""
+Blocklist sources for the domain filter.
+Every source yields normalized domains one at a time, so large lists are
+streamed instead of being loaded into memory as a whole.
+"""
+import json
+from typing import AsyncIterator, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+HOSTS_ADDRESSES = {'0.0.0.0', '127.0.0.1', '::', '::1'}
+
+
+def normalize_domain(value: str) -> Optional[str]:
+    """
+    Lower-cased host name of a domain or URL, without scheme, port, path or
+    trailing dot. Returns None for values that are not host names.
+    """
+    value = value.strip().lower()
+    if not value:
+        return None
+    if '://' in value:
+        value = urlparse(value).netloc
+    value = value.split('/', 1)[0].rsplit('@', 1)[-1].split(':', 1)[0].strip('.')
+    if not value or '.' not in value or any(c.isspace() for c in value) or '*' in value:
+        return None
+    return value
+
+
+def iter_json_blocklist(path: str) -> Iterator[str]:
+    """Domains of a data/blocklist.json style file (its blocked_domains list)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for entry in data.get('blocked_domains', []):
+        domain = normalize_domain(entry)
+        if domain:
+            yield domain
+
+
+def json_blocklist_version(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return str(json.load(f).get('version', ''))
+
+
+def iter_domain_file(path: str) -> Iterator[str]:
+    """
+    Domains of a plain-text list, read line by line. Accepts one domain or
+    URL per line as well as hosts-file lines ("0.0.0.0 example.com");
+    '#' starts a comment.
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            if fields[0] in HOSTS_ADDRESSES:
+                fields = fields[1:]
+            for field in fields:
+                domain = normalize_domain(field)
+                if domain and domain != 'localhost':
+                    yield domain
+
+
+async def iter_global_blocklist(batch_size: int = 10000) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """(domain, category) of active GlobalBlocklist rows, fetched in batches."""
+    from sqlalchemy import select
+    from database import async_session, GlobalBlocklist
+
+    async with async_session() as session:
+        result = await session.stream(
+            select(GlobalBlocklist.url, GlobalBlocklist.category).where(GlobalBlocklist.is_active.is_(True))
+            .execution_options(yield_per=batch_size)
+        )
+        async for url, category in result:
+            domain = normalize_domain(url or '')
+            if domain:
+                yield domain, category
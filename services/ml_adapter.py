@@ -3,11 +3,15 @@ ML Service Adapter - Maintains backward compatibility with old API
 Wraps RealMLService to provide old interface format
 """
 import asyncio
-from typing import Dict, Union
+from typing import Dict, List, Union
 import base64
 from io import BytesIO
 
 from services.ml_service_real import RealMLService
+from services.ml_executor import InferenceUnavailable
+from services.ml_cache import PerceptualHashCache, SingleFlight, compute_dhash, text_cache_key
+from services.ml_config import MLRuntimeConfig
+from middleware.monitoring import track_coalesced_request
 
 
 class MLServiceAdapter:
@@ -15,11 +19,49 @@ class MLServiceAdapter:
     
     def __init__(self):
         self.real_service = RealMLService()
-        self._loaded = True
+        
+        config = MLRuntimeConfig()
+        self.image_cache = PerceptualHashCache(
+            max_entries=config.image_cache_size,
+            ttl_seconds=config.image_cache_ttl_s,
+            max_distance=config.image_cache_max_distance
+        )
+        
+        self.text_flight = SingleFlight('text', on_coalesced=track_coalesced_request)
+        self.url_flight = SingleFlight('url', on_coalesced=track_coalesced_request)
+        self.image_flight = SingleFlight('image', on_coalesced=track_coalesced_request)
     
     def is_loaded(self) -> bool:
-        """Check if ML service is loaded."""
-        return self._loaded
+        """Check if all ML models are loaded and warm."""
+        return self.real_service.is_ready()
+    
+    def is_ready(self, *kinds: str) -> bool:
+        """Check if the given models (default: all) are loaded and warm."""
+        return self.real_service.is_ready(*kinds)
+    
+    def start_warmup(self):
+        """Start loading models in the background."""
+        return self.real_service.start_warmup()
+    
+    def retry_failed_models(self, *kinds: str):
+        """Retry failed model loads in the background, with backoff."""
+        self.real_service.retry_failed_models(*kinds)
+    
+    def start_blocklist_updates(self):
+        """Start applying blocklist delta files in the background."""
+        return self.real_service.start_blocklist_updates()
+    
+    def stop_blocklist_updates(self):
+        """Stop polling for blocklist delta files."""
+        self.real_service.stop_blocklist_updates()
+    
+    async def rebuild_blocklist(self, include_database: bool = True) -> Dict:
+        """Rebuild the domain blocklist from its sources and swap it in."""
+        return await self.real_service.rebuild_blocklist(include_database)
+    
+    def get_readiness(self) -> Dict:
+        """Return per-model load state and load time."""
+        return self.real_service.warmup.get_status()
     
     async def detect_nsfw(self, image_base64: str) -> float:
         """
@@ -28,11 +70,58 @@ class MLServiceAdapter:
         """
         try:
             image_bytes = base64.b64decode(image_base64)
-            result = await self.real_service.scan_image(image_bytes)
-            return result.score
         except Exception as e:
             print(f"NSFW detection error: {e}")
             return 0.0
+        
+        return await self.detect_nsfw_bytes(image_bytes)
+    
+    async def detect_nsfw_bytes(self, image_bytes: bytes) -> float:
+        """
+        Detect NSFW content in raw encoded image bytes.
+        Returns confidence score (0.0-1.0).
+        """
+        try:
+            return await self._score_image(image_bytes)
+        except InferenceUnavailable:
+            raise
+        except Exception as e:
+            print(f"NSFW detection error: {e}")
+            return 0.0
+    
+    async def _score_image(self, image_bytes: bytes) -> float:
+        """Cached image score; raises if the image could not be scanned."""
+        try:
+            phash = await self.real_service.executor.run(compute_dhash, image_bytes)
+        except InferenceUnavailable:
+            raise
+        except Exception:
+            phash = None
+        
+        if phash is None:
+            return await self._scan_image_score(image_bytes, None)
+        
+        self.image_cache.ensure_version(self.real_service.warmup.model_version('vision') or 'unknown')
+        cached = self.image_cache.get(phash)
+        if cached is not None:
+            return cached
+        return await self.image_flight.run(phash, lambda: self._scan_image_score(image_bytes, phash))
+    
+    async def _scan_image_score(self, image_bytes: bytes, phash) -> float:
+        result = await self.real_service.scan_image(image_bytes)
+        if "error" in result.flags:
+            raise ValueError(result.details.get('error', 'image scan failed'))
+        if phash is not None:
+            self.image_cache.put(phash, result.score)
+        return result.score
+    
+    async def _scan_text(self, text: str):
+        """Scan text, sharing one in-flight scan between identical texts."""
+        return await self.text_flight.run(text_cache_key(text), lambda: self.real_service.scan_text(text))
+    
+    async def _scan_url(self, url: str):
+        """Scan a URL, sharing one in-flight scan between identical URLs."""
+        return await self.url_flight.run(url.strip(), lambda: self.real_service.scan_url(url))
     
     async def classify_text(self, text: str) -> Dict[str, Union[bool, float, str]]:
         """
@@ -40,22 +129,10 @@ class MLServiceAdapter:
         Returns: {'is_harmful': bool, 'confidence': float, 'classification': str}
         """
         try:
-            result = await self.real_service.scan_text(text)
-            
-            classification = "safe"
-            if not result.is_safe:
-                if "toxic_text" in result.flags:
-                    classification = "toxic"
-                elif "keywords_detected" in result.flags:
-                    classification = "inappropriate"
-                else:
-                    classification = "harmful"
-            
-            return {
-                'is_harmful': not result.is_safe,
-                'confidence': result.score,
-                'classification': classification
-            }
+            result = await self._scan_text(text)
+            return self._text_classification(result)
+        except InferenceUnavailable:
+            raise
         except Exception as e:
             print(f"Text classification error: {e}")
             return {
@@ -64,13 +141,75 @@ class MLServiceAdapter:
                 'classification': 'error'
             }
     
+    def _text_classification(self, result) -> Dict[str, Union[bool, float, str]]:
+        classification = "safe"
+        if not result.is_safe:
+            if "toxic_text" in result.flags:
+                classification = "toxic"
+            elif "keywords_detected" in result.flags:
+                classification = "inappropriate"
+            else:
+                classification = "harmful"
+        
+        return {
+            'is_harmful': not result.is_safe,
+            'confidence': result.score,
+            'classification': classification
+        }
+    
+    async def classify_text_batch(self, texts: List[str]) -> List[Union[Dict, Exception]]:
+        """
+        Classify several texts at once. Items are submitted together so the
+        text batcher runs them as model batches. Returns, in input order,
+        the classification dict or the exception for each item.
+        """
+        results = await asyncio.gather(
+            *(self._scan_text(text) for text in texts),
+            return_exceptions=True
+        )
+        return [
+            r if isinstance(r, Exception) else self._text_classification(r)
+            for r in results
+        ]
+    
+    async def detect_nsfw_batch(self, images: List[bytes]) -> List[Union[float, Exception]]:
+        """
+        Score several raw images at once through the vision batcher.
+        Returns, in input order, the score or the exception for each item.
+        """
+        return await asyncio.gather(
+            *(self._score_image(image_bytes) for image_bytes in images),
+            return_exceptions=True
+        )
+    
+    async def analyze_url_batch(self, urls: List[str]) -> List[Union[float, Exception]]:
+        results = await asyncio.gather(
+            *(self._scan_url(url) for url in urls),
+            return_exceptions=True
+        )
+        return [r if isinstance(r, Exception) else r.score for r in results]
+    
+    async def scan_video(self, video_path: str) -> Dict:
+        """
+        Scan a video file. Returns per-segment scores, the overall verdict
+        and frames decoded versus scored.
+        """
+        return await self.real_service.scan_video(video_path)
+    
+    async def score_background(self, kind: str, items: List) -> List[float]:
+        """
+        Score bulk 'vision' (image bytes) or 'text' items for background
+        jobs at lower priority than device checks.
+        """
+        return await self.real_service.score_background(kind, items)
+    
     async def analyze_url(self, url: str) -> float:
         """
         Analyze URL for threats.
         Returns threat score (0.0-1.0).
         """
         try:
-            result = await self.real_service.scan_url(url)
+            result = await self._scan_url(url)
             return result.score
         except Exception as e:
             print(f"URL analysis error: {e}")
@@ -79,10 +218,17 @@ class MLServiceAdapter:
     def get_health(self) -> Dict:
         """Return health status."""
         return {
-            'loaded': self._loaded,
+            'loaded': self.is_loaded(),
             'models': {
                 'nsfw': 'Falconsai/nsfw_image_detection',
                 'text': 'unitary/toxic-bert'
             },
-            'status': 'operational'
+            'status': 'operational' if self.is_loaded() else 'warming_up',
+            'readiness': self.get_readiness(),
+            'stats': self.real_service.get_stats(),
+            'image_cache': self.image_cache.get_stats(),
+            'coalescing': {
+                flight.name: flight.get_stats()
+                for flight in (self.text_flight, self.url_flight, self.image_flight)
+            }
         }
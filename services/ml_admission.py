@@ -0,0 +1,168 @@
+"""
+Adaptive admission control for the ML endpoints.
+Under overload, low-priority work is refused up front with a fast 503 instead
+of joining an inference backlog where every caller ends up timing out.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from services.ml_config import MLRuntimeConfig
+from services.ml_executor import INTERACTIVE, InferenceTimeout, InferenceUnavailable, get_inference_executor
+from middleware.monitoring import track_admission
+
+CRITICAL = 'critical'
+NORMAL = 'normal'
+LOW = 'low'
+PRIORITIES = (CRITICAL, NORMAL, LOW)
+
+
+class AdmissionRejected(InferenceUnavailable):
+    """Raised when a request is shed before reaching the models."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _executor_queue() -> Tuple[int, int]:
+    executor = get_inference_executor()
+    return executor.queued_in(INTERACTIVE), executor.max_queue
+
+
+class AdmissionController:
+    """
+    Load-aware gate in front of the ML endpoints.
+
+    Load is the larger of the inference queue fill ratio and the recent
+    request latency (an EWMA) relative to target_latency_ms. A request is
+    shed when load reaches the threshold for its priority: low-priority
+    work goes first, normal work only under heavier load, and critical work
+    is always admitted. The latency average decays towards zero while no
+    requests complete, so shedding stops once the backlog drains even if
+    only shed traffic is arriving.
+    """
+    def __init__(self, target_latency_ms: float = 500.0,
+                 shed_thresholds: Optional[Dict[str, float]] = None,
+                 ewma_alpha: float = 0.2, decay_half_life_s: float = 5.0,
+                 retry_after_s: int = 2,
+                 queue_fn: Callable[[], Tuple[int, int]] = _executor_queue):
+        self.target_latency_ms = max(1.0, target_latency_ms)
+        self.shed_thresholds = {NORMAL: 0.9, LOW: 0.6} if shed_thresholds is None else shed_thresholds
+        self.ewma_alpha = ewma_alpha
+        self.decay_half_life_s = decay_half_life_s
+        self.retry_after_s = retry_after_s
+        self.queue_fn = queue_fn
+
+        self._lock = threading.Lock()
+        self._latency_ms = 0.0
+        self._observed_at = time.monotonic()
+
+        self.admitted = {p: 0 for p in PRIORITIES}
+        self.shed = {p: 0 for p in PRIORITIES}
+
+    def latency_ms(self) -> float:
+        with self._lock:
+            elapsed = time.monotonic() - self._observed_at
+            return self._latency_ms * 0.5 ** (elapsed / self.decay_half_life_s)
+
+    def observe(self, latency_ms: float):
+        """Folds the latency of a completed request into the average."""
+        with self._lock:
+            now = time.monotonic()
+            current = self._latency_ms * 0.5 ** ((now - self._observed_at) / self.decay_half_life_s)
+            self._latency_ms = current + self.ewma_alpha * (latency_ms - current)
+            self._observed_at = now
+
+    def load(self) -> float:
+        queued, capacity = self.queue_fn()
+        queue_load = queued / capacity if capacity else float(queued > 0)
+        return max(queue_load, self.latency_ms() / self.target_latency_ms)
+
+    def check(self, priority: str) -> Tuple[bool, float]:
+        """
+        Decides whether a request of the given priority is admitted now.
+        Returns (admitted, load).
+        """
+        load = self.load()
+        threshold = self.shed_thresholds.get(priority)
+        admitted = priority == CRITICAL or threshold is None or load < threshold
+
+        (self.admitted if admitted else self.shed)[priority] += 1
+        track_admission(priority, admitted, load)
+        return admitted, load
+
+    def retry_after(self, load: float) -> int:
+        return max(1, math.ceil(self.retry_after_s * load))
+
+    def require(self, priority: str):
+        """
+        Raises AdmissionRejected if a request of this priority is shed.
+        """
+        admitted, load = self.check(priority)
+        if not admitted:
+            raise AdmissionRejected(
+                f"Server overloaded (load {load:.2f}), {priority} priority requests are being shed",
+                retry_after=self.retry_after(load)
+            )
+
+    @contextmanager
+    def admit(self, priority: str, items: int = 1):
+        """
+        Admits the enclosed model work or raises AdmissionRejected; the
+        latency of admitted work feeds back into the load estimate.
+
+        Work covering several items (batch endpoints) records its latency
+        per item, so one large batch does not look like one slow request.
+        With items=0 nothing is recorded, for long jobs such as video scans
+        whose duration says nothing about single-item latency; their
+        inference calls still count through the queue fill ratio.
+
+        Only completed work and inference timeouts are recorded. Requests
+        that fail fast (queue full, bad input) would otherwise pull the
+        average down exactly when the server is overloaded.
+        """
+        self.require(priority)
+        start = time.perf_counter()
+        try:
+            yield
+        except InferenceTimeout:
+            self._observe_since(start, items)
+            raise
+        self._observe_since(start, items)
+
+    def _observe_since(self, start: float, items: int):
+        if items > 0:
+            self.observe((time.perf_counter() - start) * 1000 / items)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'load': self.load(),
+            'latency_ms': self.latency_ms(),
+            'target_latency_ms': self.target_latency_ms,
+            'shed_thresholds': dict(self.shed_thresholds),
+            'admitted': dict(self.admitted),
+            'shed': dict(self.shed)
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """
+    Returns the process-wide admission controller, creating it from config.
+    """
+    global _controller
+    if _controller is None:
+        config = MLRuntimeConfig()
+        thresholds = {NORMAL: config.admission_shed_normal, LOW: config.admission_shed_low}
+        _controller = AdmissionController(
+            target_latency_ms=config.admission_target_latency_ms,
+            shed_thresholds=thresholds if config.admission_enabled else {},
+            ewma_alpha=config.admission_ewma_alpha,
+            retry_after_s=config.admission_retry_after_s
+        )
+    return _controller
@@ -0,0 +1,161 @@
+"""
+Dynamic micro-batching for model inference.
+Concurrent requests are collected for a short window (or until the batch is full)
+and scored with a single batched forward pass.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("MicroBatcher")
+
+
+class MicroBatcher:
+    """
+    Collects single-item requests into batches for one model.
+
+    batch_fn receives a list of items and must return a list of results
+    in the same order. Each caller awaits only its own result. When an
+    executor is given, batch_fn runs there instead of on the event loop,
+    and up to one batch per executor worker is in flight at a time.
+    """
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 16, max_wait_ms: float = 5.0,
+                 on_batch: Optional[Callable[[str, int, float, float], None]] = None,
+                 executor: Optional[Any] = None, max_in_flight: Optional[int] = None):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.on_batch = on_batch
+        if max_in_flight is None:
+            max_in_flight = getattr(executor, 'max_workers', 1) if executor is not None else 1
+        self.max_in_flight = max(1, max_in_flight)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+        self.total_batches = 0
+        self.total_items = 0
+        self.max_observed_batch = 0
+        self.last_batch_size = 0
+        self.last_batch_latency_ms = 0.0
+        self.total_batch_latency_ms = 0.0
+        self.total_queue_wait_ms = 0.0
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queues one item and waits for its result from the next batch.
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future, float]]:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        return batch
+
+    async def _run(self):
+        while True:
+            # Wait for a free slot before collecting, so requests keep
+            # queueing into the next batch while every slot is busy
+            await self._slots.acquire()
+            batch = await self._collect()
+            pending = [entry for entry in batch if not entry[1].cancelled()]
+            if not pending:
+                self._slots.release()
+                continue
+
+            task = asyncio.get_running_loop().create_task(self._dispatch(pending))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, pending: List[Tuple[Any, asyncio.Future, float]]):
+        items = [entry[0] for entry in pending]
+        start = time.perf_counter()
+        queue_wait = start - min(entry[2] for entry in pending)
+
+        try:
+            results = await self._execute(items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"{self.name} batch returned {len(results)} results for {len(items)} items"
+                )
+        except Exception as e:
+            logger.error(f"{self.name} batch of {len(items)} failed: {e}")
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        duration = time.perf_counter() - start
+        for (_, future, _), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+        self._record(len(items), duration, queue_wait)
+
+    async def _execute(self, items: List[Any]) -> List[Any]:
+        if self.executor is not None:
+            return await self.executor.run(self.batch_fn, items)
+        return self.batch_fn(items)
+
+    def _record(self, size: int, duration: float, queue_wait: float):
+        self.total_batches += 1
+        self.total_items += size
+        self.max_observed_batch = max(self.max_observed_batch, size)
+        self.last_batch_size = size
+        self.last_batch_latency_ms = duration * 1000
+        self.total_batch_latency_ms += duration * 1000
+        self.total_queue_wait_ms += queue_wait * 1000
+
+        if self.on_batch:
+            try:
+                self.on_batch(self.name, size, duration, queue_wait)
+            except Exception as e:
+                logger.warning(f"Batch metrics hook failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        batches = self.total_batches or 1
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'max_in_flight': self.max_in_flight,
+            'in_flight': len(self._in_flight),
+            'batches': self.total_batches,
+            'items': self.total_items,
+            'avg_batch_size': self.total_items / batches,
+            'max_observed_batch': self.max_observed_batch,
+            'last_batch_size': self.last_batch_size,
+            'last_batch_latency_ms': self.last_batch_latency_ms,
+            'avg_batch_latency_ms': self.total_batch_latency_ms / batches,
+            'avg_queue_wait_ms': self.total_queue_wait_ms / batches,
+            'queued': self._queue.qsize() if self._queue else 0
+        }
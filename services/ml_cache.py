@@ -0,0 +1,336 @@
+"""
+Result caches for ML scans.
+Repeated and near-duplicate content is answered from memory instead of
+running the models again.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import re
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger("MLCache")
+
+
+def compute_dhash(image_bytes: bytes, hash_size: int = 8) -> int:
+    """
+    Difference hash of an image: compares neighbouring pixels of a tiny
+    grayscale thumbnail. Re-encoding, resizing and small edits change only
+    a few bits, so near-duplicates end up a small Hamming distance apart.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    image.draft('L', (hash_size * 8, hash_size * 8))
+    pixels = image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR).tobytes()
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class PerceptualHashCache:
+    """
+    TTL + LRU cache of image scores keyed by perceptual hash.
+
+    A lookup matches any stored hash within max_distance bits. The hash is
+    split into max_distance + 1 bands; by pigeonhole, a match within the
+    tolerance shares at least one band exactly, so only entries in the same
+    band buckets are compared instead of the whole cache. Like VerdictCache,
+    the cache is tied to a model version and dropped when it changes.
+    """
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600.0,
+                 max_distance: int = 4, hash_bits: int = 64):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max(0, max_distance)
+        self.hash_bits = hash_bits
+        self.version: Optional[str] = None
+
+        band_count = min(self.max_distance + 1, hash_bits)
+        width = hash_bits // band_count
+        self._bands: List[Tuple[int, int]] = []
+        shift = 0
+        for i in range(band_count):
+            bits = width if i < band_count - 1 else hash_bits - shift
+            self._bands.append((shift, (1 << bits) - 1))
+            shift += bits
+
+        self._entries: "OrderedDict[int, Tuple[Any, float]]" = OrderedDict()
+        self._index: List[Dict[int, Set[int]]] = [{} for _ in self._bands]
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def ensure_version(self, version: str):
+        """
+        Drops all entries if the vision model version changed.
+        """
+        if version != self.version:
+            if self.version is not None:
+                logger.info(f"Image cache invalidated: {self.version} -> {version}")
+                self.invalidations += 1
+            self.clear()
+            self.version = version
+
+    def _band_keys(self, phash: int) -> List[int]:
+        return [(phash >> shift) & mask for shift, mask in self._bands]
+
+    def _remove(self, phash: int):
+        self._entries.pop(phash, None)
+        for band, key in zip(self._index, self._band_keys(phash)):
+            bucket = band.get(key)
+            if bucket is not None:
+                bucket.discard(phash)
+                if not bucket:
+                    del band[key]
+
+    def get(self, phash: int) -> Optional[Any]:
+        """
+        Returns the cached value for the closest unexpired stored hash within
+        tolerance. Expired candidates met on the way are evicted.
+        """
+        now = time.monotonic()
+        best = None
+        best_distance = self.max_distance + 1
+
+        candidates: Set[int] = set()
+        for band, key in zip(self._index, self._band_keys(phash)):
+            candidates.update(band.get(key, ()))
+
+        expired = [c for c in candidates if self._entries[c][1] <= now]
+        for candidate in expired:
+            self._remove(candidate)
+            candidates.discard(candidate)
+        self.expirations += len(expired)
+
+        for candidate in candidates:
+            distance = hamming_distance(phash, candidate)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+
+        if best is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(best)
+        self.hits += 1
+        if best_distance > 0:
+            self.near_hits += 1
+        return self._entries[best][0]
+
+    def put(self, phash: int, value: Any):
+        if phash in self._entries:
+            self._remove(phash)
+
+        self._entries[phash] = (value, time.monotonic() + self.ttl_seconds)
+        for band, key in zip(self._index, self._band_keys(phash)):
+            band.setdefault(key, set()).add(phash)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._index = [{} for _ in self._bands]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'max_distance': self.max_distance,
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'version': self.version,
+            'invalidations': self.invalidations
+        }
+
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Case- and whitespace-folded form of a text, used as the cache identity.
+    """
+    return _WHITESPACE.sub(' ', text.casefold()).strip()
+
+
+def text_cache_key(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class VerdictCache:
+    """
+    TTL + size-aware LRU cache of text verdicts.
+
+    Entries are charged their approximate size in bytes and the least
+    recently used ones are evicted once max_bytes is exceeded. The cache is
+    tied to a version string (model + keyword database); a different version
+    drops every entry, so verdicts from an old model are never served.
+    """
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 900.0):
+        self.max_bytes = max(1, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self.version: Optional[str] = None
+
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self.current_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def estimate_size(cls, value: Any) -> int:
+        return cls.ENTRY_OVERHEAD + sys.getsizeof(repr(value))
+
+    def ensure_version(self, version: str):
+        """
+        Drops all entries if the model or keyword database version changed.
+        """
+        if version != self.version:
+            if self.version is not None:
+                logger.info(f"Verdict cache invalidated: {self.version} -> {version}")
+                self.invalidations += 1
+            self.clear()
+            self.version = version
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[2]
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        size = len(key) + self.estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds, size)
+        self.current_bytes += size
+
+        while self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it is in flight await the same task instead of starting their own,
+    and all of them get its result or exception. The key is forgotten as
+    soon as the task finishes, so later calls run fresh (or hit a cache).
+    Cancelling one waiter does not cancel the shared work.
+    """
+    def __init__(self, name: str, on_coalesced: Optional[Callable[[str], None]] = None):
+        self.name = name
+        self.on_coalesced = on_coalesced
+        self._inflight: Dict[Any, "asyncio.Task"] = {}
+
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            if self.on_coalesced:
+                self.on_coalesced(self.name)
+        return await asyncio.shield(task)
+
+    def _done(self, key: Any, task: "asyncio.Task"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self.leaders + self.coalesced
+        return {
+            'in_flight': len(self._inflight),
+            'executed': self.leaders,
+            'coalesced': self.coalesced,
+            'coalesce_rate': self.coalesced / calls if calls else 0.0
+        }
@@ -0,0 +1,62 @@
+"""
+Cheap-first cascades for ML scans.
+A fast stage answers the inputs it is confident about and only the
+ambiguous rest is escalated to the expensive model.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+_LETTER = re.compile(r'[^\W\d_]', re.UNICODE)
+
+
+class TextCascade:
+    """
+    Keyword-first cascade for text scans.
+
+    The keyword stage decides a text outright when its confidence clears a
+    threshold: a keyword match weighing at least unsafe_threshold is unsafe,
+    and a text whose keyword weight is at most safe_threshold (or that has
+    no letters at all, e.g. emoji or numbers) is safe. Everything else is
+    escalated to the transformer. A negative safe_threshold disables the
+    weight-based safe exit.
+    """
+    def __init__(self, unsafe_threshold: float = 0.9, safe_threshold: float = -1.0):
+        self.unsafe_threshold = unsafe_threshold
+        self.safe_threshold = safe_threshold
+
+        self.decided: Dict[str, int] = {'safe': 0, 'unsafe': 0}
+        self.escalated = 0
+
+    @property
+    def version(self) -> str:
+        return f"cascade:{self.unsafe_threshold}/{self.safe_threshold}"
+
+    def decide(self, text: str, kw_weight: float, keywords: List[str]) -> Optional[bool]:
+        """
+        Returns True (safe) or False (unsafe) when the keyword stage is
+        confident, or None to escalate to the model.
+        """
+        if keywords and kw_weight >= self.unsafe_threshold:
+            verdict = False
+        elif not keywords and not _LETTER.search(text):
+            verdict = True
+        elif kw_weight <= self.safe_threshold:
+            verdict = True
+        else:
+            self.escalated += 1
+            return None
+
+        self.decided['safe' if verdict else 'unsafe'] += 1
+        return verdict
+
+    def get_stats(self) -> Dict[str, Any]:
+        decided = self.decided['safe'] + self.decided['unsafe']
+        total = decided + self.escalated
+        return {
+            'unsafe_threshold': self.unsafe_threshold,
+            'safe_threshold': self.safe_threshold,
+            'keyword_safe': self.decided['safe'],
+            'keyword_unsafe': self.decided['unsafe'],
+            'escalated': self.escalated,
+            'escalation_rate': self.escalated / total if total else 0.0
+        }
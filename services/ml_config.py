@@ -0,0 +1,102 @@
+"""
+Runtime tuning knobs for the ML serving path.
+All values come from environment variables so they can be changed per deployment.
+"""
+import os
+
+
+class MLRuntimeConfig:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        self.vision_batch_size = int(os.getenv("ML_VISION_BATCH_SIZE", "16"))
+        self.vision_batch_wait_ms = float(os.getenv("ML_VISION_BATCH_WAIT_MS", "5"))
+        self.vision_fast_decode = os.getenv("ML_VISION_FAST_DECODE", "true").lower() == "true"
+        self.video_max_mb = int(os.getenv("ML_VIDEO_MAX_MB", "100"))
+        self.video_frame_stride = int(os.getenv("ML_VIDEO_FRAME_STRIDE", "2"))
+        self.video_max_frames = int(os.getenv("ML_VIDEO_MAX_FRAMES", str(30 * 60 * 30)))
+        self.video_scene_threshold = float(os.getenv("ML_VIDEO_SCENE_THRESHOLD", "0.35"))
+        self.video_min_keyframe_gap = int(os.getenv("ML_VIDEO_MIN_KEYFRAME_GAP", "5"))
+        self.video_max_keyframe_gap = int(os.getenv("ML_VIDEO_MAX_KEYFRAME_GAP", "150"))
+        self.video_batch_size = int(os.getenv("ML_VIDEO_BATCH_SIZE", "16"))
+        self.video_nsfw_threshold = float(os.getenv("ML_VIDEO_NSFW_THRESHOLD", "0.7"))
+        self.video_stop_after = int(os.getenv("ML_VIDEO_STOP_AFTER", "3"))
+        self.text_batch_size = int(os.getenv("ML_TEXT_BATCH_SIZE", "32"))
+        self.text_batch_wait_ms = float(os.getenv("ML_TEXT_BATCH_WAIT_MS", "5"))
+        self.text_length_buckets = tuple(
+            int(b) for b in os.getenv("ML_TEXT_LENGTH_BUCKETS", "16,32,64,128,256,512").split(",") if b.strip()
+        )
+        self.text_chunking = os.getenv("ML_TEXT_CHUNKING", "true").lower() == "true"
+        self.text_chunk_stride = int(os.getenv("ML_TEXT_CHUNK_STRIDE", "64"))
+        self.text_max_windows = int(os.getenv("ML_TEXT_MAX_WINDOWS", "8"))
+        self.text_forward_batch_size = int(os.getenv("ML_TEXT_FORWARD_BATCH_SIZE", "32"))
+        self.text_chunk_aggregation = os.getenv("ML_TEXT_CHUNK_AGGREGATION", "max").lower()
+        self.text_chunk_top_k = int(os.getenv("ML_TEXT_CHUNK_TOP_K", "3"))
+        self.text_cascade = os.getenv("ML_TEXT_CASCADE", "false").lower() == "true"
+        self.text_cascade_unsafe_threshold = float(os.getenv("ML_TEXT_CASCADE_UNSAFE_THRESHOLD", "0.9"))
+        self.text_cascade_safe_threshold = float(os.getenv("ML_TEXT_CASCADE_SAFE_THRESHOLD", "-1"))
+        self.vision_cascade = os.getenv("ML_VISION_CASCADE", "false").lower() == "true"
+        self.vision_cascade_low_size = int(os.getenv("ML_VISION_CASCADE_LOW_SIZE", "224"))
+        self.vision_cascade_band = float(os.getenv("ML_VISION_CASCADE_BAND", "0.2"))
+        self.inference_workers = int(os.getenv("ML_INFERENCE_WORKERS", "2"))
+        self.inference_queue_size = int(os.getenv("ML_INFERENCE_QUEUE_SIZE", "64"))
+        self.inference_timeout_s = float(os.getenv("ML_INFERENCE_TIMEOUT_S", "10"))
+        self.inference_use_processes = os.getenv("ML_INFERENCE_USE_PROCESSES", "false").lower() == "true"
+        self.inference_background_queue_size = int(os.getenv("ML_INFERENCE_BACKGROUND_QUEUE_SIZE", "256"))
+        self.inference_background_share = float(os.getenv("ML_INFERENCE_BACKGROUND_SHARE", "0.2"))
+        self.inference_background_timeout_s = float(os.getenv("ML_INFERENCE_BACKGROUND_TIMEOUT_S", "300"))
+        self.batch_max_items = int(os.getenv("ML_BATCH_MAX_ITEMS", "64"))
+        self.admission_enabled = os.getenv("ML_ADMISSION_ENABLED", "true").lower() == "true"
+        self.admission_target_latency_ms = float(os.getenv("ML_ADMISSION_TARGET_LATENCY_MS", "500"))
+        self.admission_shed_low = float(os.getenv("ML_ADMISSION_SHED_LOW", "0.6"))
+        self.admission_shed_normal = float(os.getenv("ML_ADMISSION_SHED_NORMAL", "0.9"))
+        self.admission_ewma_alpha = float(os.getenv("ML_ADMISSION_EWMA_ALPHA", "0.2"))
+        self.admission_retry_after_s = int(os.getenv("ML_ADMISSION_RETRY_AFTER_S", "2"))
+        self.model_load_timeout_s = float(os.getenv("ML_MODEL_LOAD_TIMEOUT_S", "600"))
+        self.warmup_retry_after_s = int(os.getenv("ML_WARMUP_RETRY_AFTER_S", "5"))
+        self.warmup_retry_backoff_s = float(os.getenv("ML_WARMUP_RETRY_BACKOFF_S", "5"))
+        self.warmup_retry_backoff_max_s = float(os.getenv("ML_WARMUP_RETRY_BACKOFF_MAX_S", "300"))
+        self.model_store_dir = os.getenv(
+            "ML_MODEL_STORE_DIR",
+            os.path.join(os.path.dirname(__file__), '..', 'data', 'models', 'store')
+        )
+        self.model_store_required = os.getenv("ML_MODEL_STORE_REQUIRED", "false").lower() == "true"
+        self.model_store_verify = os.getenv("ML_MODEL_STORE_VERIFY", "false").lower() == "true"
+        self.inference_backend = os.getenv("ML_INFERENCE_BACKEND", "torch").lower()
+        self.onnx_model_dir = os.getenv(
+            "ML_ONNX_MODEL_DIR",
+            os.path.join(os.path.dirname(__file__), '..', 'data', 'models', 'onnx')
+        )
+        self.onnx_quantized = os.getenv("ML_ONNX_QUANTIZED", "true").lower() == "true"
+        self.onnx_intra_op_threads = int(os.getenv(
+            "ML_ONNX_INTRA_OP_THREADS",
+            str(max(1, (os.cpu_count() or 1) // max(1, self.inference_workers)))
+        ))
+        self.onnx_parity_tolerance = float(os.getenv("ML_ONNX_PARITY_TOLERANCE", "0.02"))
+        self.image_cache_size = int(os.getenv("ML_IMAGE_CACHE_SIZE", "10000"))
+        self.image_cache_ttl_s = float(os.getenv("ML_IMAGE_CACHE_TTL_S", "3600"))
+        self.image_cache_max_distance = int(os.getenv("ML_IMAGE_CACHE_MAX_DISTANCE", "4"))
+        self.text_cache_max_bytes = int(os.getenv("ML_TEXT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+        self.text_cache_ttl_s = float(os.getenv("ML_TEXT_CACHE_TTL_S", "900"))
+        self.blocklist_snapshot_path = os.getenv(
+            "ML_BLOCKLIST_SNAPSHOT_PATH",
+            os.path.join(os.path.dirname(__file__), '..', 'data', 'blocklist.bloom')
+        )
+        self.blocklist_json_path = os.getenv(
+            "ML_BLOCKLIST_JSON_PATH",
+            os.path.join(os.path.dirname(__file__), '..', 'data', 'blocklist.json')
+        )
+        self.blocklist_lists = [
+            p.strip() for p in os.getenv("ML_BLOCKLIST_LISTS", "").split(",") if p.strip()
+        ]
+        self.blocklist_delta_dir = os.getenv(
+            "ML_BLOCKLIST_DELTA_DIR",
+            os.path.join(os.path.dirname(__file__), '..', 'data', 'blocklist_deltas')
+        )
+        self.blocklist_delta_poll_s = float(os.getenv("ML_BLOCKLIST_DELTA_POLL_S", "60"))
@@ -286,14 +286,31 @@ class ImagePreprocessor:
         Decodes and preprocesses an image for the model.
         Supports standard 640x640 resolution for high-fidelity analysis.
         """
+        img = ImagePreprocessor.decode(image_bytes)
+        if img is None:
+            return None
+        return ImagePreprocessor.to_tensor(img, target_size)
+
+    @staticmethod
+    def decode(image_bytes: bytes) -> Optional[np.ndarray]:
+        """
+        Decodes an image to a BGR array, or None if it cannot be decoded.
+        """
         try:
             nparr = np.frombuffer(image_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if img is None:
-                return None
-                
-            img = cv2.resize(img, target_size)
+            return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        except Exception as e:
+            logging.error(f"Image decode failed: {e}")
+            return None
+
+    @staticmethod
+    def to_tensor(img: np.ndarray, target_size: Tuple[int, int] = (640, 640),
+                  interpolation: int = cv2.INTER_LINEAR) -> Optional[torch.Tensor]:
+        """
+        Resizes and normalizes a decoded BGR image into a model input tensor.
+        """
+        try:
+            img = cv2.resize(img, target_size, interpolation=interpolation)
             
             img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
             
@@ -318,16 +335,75 @@ class ImagePreprocessor:
         cap = cv2.VideoCapture(video_path)
         count = 0
         while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            if count % interval == 0:
+            if count % interval:
+                if not cap.grab():
+                    break
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
                 frames.append(frame)
             count += 1
         cap.release()
         return frames
 
 
+class VisionCascade:
+    """
+    Two-resolution cascade for AdvancedVisionModel.
+    Every image is scored at low resolution first; only images whose score
+    lies within band of the decision threshold are re-scored at full
+    resolution.
+    """
+    def __init__(self, model: AdvancedVisionModel,
+                 low_size: Tuple[int, int] = (224, 224), high_size: Tuple[int, int] = (640, 640),
+                 threshold: float = 0.5, band: float = 0.2):
+        self.model = model
+        self.low_size = low_size
+        self.high_size = high_size
+        self.threshold = threshold
+        self.band = band
+        self.images = 0
+        self.escalated = 0
+
+    def predict(self, image_bytes: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Returns the score and which resolution produced it, or None if the
+        image cannot be decoded.
+        """
+        img = ImagePreprocessor.decode(image_bytes)
+        if img is None:
+            return None
+
+        low = ImagePreprocessor.to_tensor(img, self.low_size, interpolation=cv2.INTER_AREA)
+        if low is None:
+            return None
+        low_score = self.model.predict(low)
+        self.images += 1
+
+        if abs(low_score - self.threshold) > self.band:
+            return {'score': low_score, 'low_score': low_score, 'escalated': False,
+                    'resolution': self.low_size}
+
+        high = ImagePreprocessor.to_tensor(img, self.high_size)
+        if high is None:
+            return {'score': low_score, 'low_score': low_score, 'escalated': False,
+                    'resolution': self.low_size}
+        self.escalated += 1
+        return {'score': self.model.predict(high), 'low_score': low_score, 'escalated': True,
+                'resolution': self.high_size}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'images': self.images,
+            'escalated': self.escalated,
+            'escalation_rate': self.escalated / self.images if self.images else 0.0,
+            'low_size': self.low_size,
+            'high_size': self.high_size,
+            'band': self.band
+        }
+
+
 class FeatureExtractor(ABC):
     @abstractmethod
     def extract(self, data: Any) -> torch.Tensor:
@@ -0,0 +1,265 @@
+"""
+ONNX Runtime backend for the real text and vision models.
+Loads the exported (and optionally int8-quantized) graphs produced by
+export_onnx_models.py and serves the same predict/predict_batch interface
+as the torch pipelines in ml_core_real.
+"""
+import io
+import logging
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from services.ml_config import MLRuntimeConfig
+from services.ml_core_real import (
+    bucket_token_ids, score_text_windows, text_model_version, vision_model_version
+)
+from services.ml_preprocess import ImagePreprocessor
+
+logger = logging.getLogger("OnnxMLCore")
+
+
+def onnx_model_dir(kind: str) -> str:
+    return os.path.abspath(os.path.join(MLRuntimeConfig().onnx_model_dir, kind))
+
+
+def onnx_model_path(kind: str, quantized: bool) -> str:
+    filename = "model.int8.onnx" if quantized else "model.onnx"
+    return os.path.join(onnx_model_dir(kind), filename)
+
+
+def create_session(model_path: str):
+    """
+    Creates a CPU inference session tuned for one request stream per executor worker.
+    """
+    import onnxruntime as ort
+
+    config = MLRuntimeConfig()
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = config.onnx_intra_op_threads
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class _OnnxClassifier:
+    def __init__(self, kind: str):
+        config = MLRuntimeConfig()
+        model_path = onnx_model_path(kind, config.onnx_quantized)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"ONNX model not found at {model_path}. Run: python export_onnx_models.py"
+            )
+
+        from transformers import AutoConfig
+        model_config = AutoConfig.from_pretrained(onnx_model_dir(kind))
+        self.labels = {int(i): label.lower() for i, label in model_config.id2label.items()}
+
+        self.model_path = model_path
+        self.session = create_session(model_path)
+        self.input_names = [inp.name for inp in self.session.get_inputs()]
+        logger.info(f"[OK] ONNX {kind} model loaded from {model_path} "
+                    f"({config.onnx_intra_op_threads} intra-op threads)")
+
+
+class OnnxNSFWImageClassifier(_OnnxClassifier):
+    """
+    ONNX Runtime version of RealNSFWImageClassifier.
+    """
+    def __init__(self):
+        try:
+            from transformers import AutoImageProcessor
+            super().__init__('vision')
+            self.processor = AutoImageProcessor.from_pretrained(onnx_model_dir('vision'))
+        except Exception as e:
+            logger.error(f"Failed to load ONNX image classifier: {e}")
+            raise
+
+        self.version = vision_model_version(f"onnx:{os.path.basename(self.model_path)}")
+
+        self.nsfw_index = next((i for i, l in self.labels.items() if 'nsfw' in l), None)
+        self.safe_index = next(
+            (i for i, l in self.labels.items() if 'normal' in l or 'safe' in l or l == 'sfw'), None
+        )
+        self.preprocessor = None
+        if MLRuntimeConfig().vision_fast_decode:
+            self.preprocessor = ImagePreprocessor.from_processor(self.processor)
+
+    def _score(self, probs: np.ndarray) -> float:
+        if self.nsfw_index is not None:
+            return float(probs[self.nsfw_index])
+        if self.safe_index is not None:
+            return float(1.0 - probs[self.safe_index])
+        return 0.0
+
+    def _run(self, images: List[Image.Image]) -> np.ndarray:
+        pixel_values = self.processor(images=images, return_tensors='np')['pixel_values']
+        logits = self.session.run(None, {'pixel_values': pixel_values.astype(np.float32)})[0]
+        return softmax(logits)
+
+    def predict(self, image_bytes: bytes) -> float:
+        """
+        Returns NSFW probability (0.0 = safe, 1.0 = NSFW)
+        """
+        if self.preprocessor is not None:
+            return self.predict_batch([image_bytes])[0]
+
+        try:
+            image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+            return self._score(self._run([image])[0])
+        except Exception as e:
+            logger.error(f"Image prediction error: {e}")
+            return 0.0
+
+    def predict_batch(self, images: List[bytes]) -> List[float]:
+        if self.preprocessor is not None:
+            return self._predict_batch_fast(images)
+
+        scores = [0.0] * len(images)
+        decoded = []
+        positions = []
+
+        for i, image_bytes in enumerate(images):
+            try:
+                decoded.append(Image.open(io.BytesIO(image_bytes)).convert('RGB'))
+                positions.append(i)
+            except Exception as e:
+                logger.error(f"Image decode error: {e}")
+
+        if not decoded:
+            return scores
+
+        try:
+            probs = self._run(decoded)
+        except Exception as e:
+            logger.error(f"Batch image prediction error: {e}")
+            return scores
+
+        for i, row in zip(positions, probs):
+            scores[i] = self._score(row)
+        return scores
+
+    def _predict_batch_fast(self, images: List[bytes]) -> List[float]:
+        scores = [0.0] * len(images)
+        batch, positions, errors = self.preprocessor.load_batch(images)
+        for e in errors:
+            logger.error(f"Image decode error: {e}")
+
+        if not positions:
+            return scores
+
+        try:
+            probs = softmax(self.session.run(None, {'pixel_values': batch})[0])
+        except Exception as e:
+            logger.error(f"Batch image prediction error: {e}")
+            return scores
+
+        for i, row in zip(positions, probs):
+            scores[i] = self._score(row)
+        return scores
+
+
+class OnnxTextToxicityClassifier(_OnnxClassifier):
+    """
+    ONNX Runtime version of RealTextToxicityClassifier.
+    """
+    def __init__(self, length_buckets: Tuple[int, ...] = (16, 32, 64, 128, 256, 512)):
+        try:
+            from transformers import AutoTokenizer
+            super().__init__('text')
+            self.tokenizer = AutoTokenizer.from_pretrained(onnx_model_dir('text'))
+        except Exception as e:
+            logger.error(f"Failed to load ONNX text classifier: {e}")
+            raise
+
+        self.length_buckets = tuple(sorted(length_buckets))
+        self.max_length = self.length_buckets[-1]
+        self.version = text_model_version(f"onnx:{os.path.basename(self.model_path)}")
+        self.toxic_index = next((i for i, l in self.labels.items() if l == 'toxic'), 1)
+        self.chunking = MLRuntimeConfig().text_chunking
+
+    def _run(self, texts: List[str], max_length: int) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts, padding='longest', truncation=True,
+            max_length=max_length, return_tensors='np'
+        )
+        feed = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+        logits = self.session.run(None, feed)[0]
+        return softmax(logits)[:, self.toxic_index]
+
+    def _forward_ids(self, batch_ids: List[List[int]]) -> np.ndarray:
+        encoded = self.tokenizer.pad({'input_ids': batch_ids}, padding='longest', return_tensors='np')
+        feed = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+        return softmax(self.session.run(None, feed)[0])[:, self.toxic_index]
+
+    def predict(self, text: str) -> float:
+        """
+        Returns toxicity probability (0.0 = safe, 1.0 = toxic)
+        """
+        try:
+            if self.chunking:
+                return self.predict_batch([text])[0]
+            return float(self._run([text[:2048]], self.max_length)[0])
+        except Exception as e:
+            logger.error(f"Text prediction error: {e}")
+            return 0.0
+
+    def predict_batch(self, texts: List[str]) -> List[float]:
+        """
+        Same contract as the torch backend: errors are raised, not scored 0.0.
+        """
+        scores = [0.0] * len(texts)
+        if not texts:
+            return scores
+
+        if self.chunking:
+            try:
+                return score_text_windows(
+                    self.tokenizer, self._forward_ids, texts, self.max_length, self.length_buckets
+                )
+            except Exception as e:
+                logger.error(f"Text tokenization error: {e}")
+                raise
+
+        texts = [text[:2048] for text in texts]
+
+        try:
+            token_ids, buckets = bucket_token_ids(self.tokenizer, texts, self.max_length, self.length_buckets)
+        except Exception as e:
+            logger.error(f"Text tokenization error: {e}")
+            raise
+
+        for bucket, positions in sorted(buckets.items()):
+            try:
+                probs = self._forward_ids([token_ids[i] for i in positions])
+            except Exception as e:
+                logger.error(f"Batch text prediction error (bucket {bucket}): {e}")
+                raise
+
+            for i, prob in zip(positions, probs):
+                scores[i] = float(prob)
+        return scores
+
+
+def compare_scores(reference: List[float], candidate: List[float], tolerance: float) -> Dict[str, Any]:
+    """
+    Summarises score drift between two backends on the same inputs.
+    """
+    diffs = np.abs(np.asarray(reference, dtype=np.float64) - np.asarray(candidate, dtype=np.float64))
+    return {
+        'samples': int(diffs.size),
+        'max_abs_diff': float(diffs.max()) if diffs.size else 0.0,
+        'mean_abs_diff': float(diffs.mean()) if diffs.size else 0.0,
+        'over_tolerance': int((diffs > tolerance).sum()),
+        'tolerance': tolerance,
+        'drift': bool(diffs.size and diffs.max() > tolerance)
+    }
@@ -3,19 +3,156 @@ Real ML Core - Using Pre-Trained Models from HuggingFace
 No fake models, no random weights, 100% real NSFW detection.
 """
 import logging
+import threading
 import torch
 import torch.nn.functional as F
 import numpy as np
-from typing import Optional, Dict, Tuple, Any
+from typing import Optional, Dict, Tuple, Any, List
 from PIL import Image
 import io
 
+from services.ml_config import MLRuntimeConfig
+from services.model_store import ModelStore, resolve_model_source
+from services.ml_preprocess import ImagePreprocessor
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("RealMLCore")
 
 DEVICE = 'cuda' if torch.cuda.is_available() else 'cpu'
 logger.info(f"Real ML Core initialized on device: {DEVICE}")
 
+VISION_MODEL_ID = "AdamCodd/vit-base-nsfw-detector"
+TEXT_MODEL_ID = "s-nlp/roberta_toxicity_classifier"
+
+
+def bucket_by_length(lengths: List[int], buckets: Tuple[int, ...]) -> Dict[int, List[int]]:
+    """
+    Groups positions by the smallest length bucket that fits them.
+    Anything longer than the last bucket lands in the last bucket (and is truncated).
+    """
+    grouped: Dict[int, List[int]] = {}
+    for i, length in enumerate(lengths):
+        bucket = next((b for b in buckets if length <= b), buckets[-1])
+        grouped.setdefault(bucket, []).append(i)
+    return grouped
+
+
+def bucket_token_ids(tokenizer, texts: List[str], max_length: int,
+                     buckets: Tuple[int, ...]) -> Tuple[List[List[int]], Dict[int, List[int]]]:
+    """
+    Tokenizes texts once, truncated to max_length, and groups their
+    positions by length bucket. The ids are fed to the model as they are,
+    so each text goes through the tokenizer a single time.
+    """
+    token_ids = tokenizer(texts, truncation=True, max_length=max_length)['input_ids']
+    return token_ids, bucket_by_length([len(ids) for ids in token_ids], buckets)
+
+
+def split_token_windows(token_ids: List[int], window: int, stride: int, max_windows: int) -> List[List[int]]:
+    """
+    Splits token ids into windows of at most `window` tokens, overlapping by
+    `stride` tokens. If that takes more than max_windows windows, max_windows
+    windows are spread evenly over the whole text instead (overlap shrinks
+    or becomes gaps), so the end of a long page is still scored.
+    """
+    if len(token_ids) <= window:
+        return [token_ids]
+    
+    last_start = len(token_ids) - window
+    step = max(1, window - stride)
+    count = min(-(-last_start // step) + 1, max(1, max_windows))
+    starts = sorted({int(round(s)) for s in np.linspace(0, last_start, count)})
+    return [token_ids[start:start + window] for start in starts]
+
+
+def aggregate_window_scores(scores: List[float], method: str = 'max', top_k: int = 3) -> float:
+    """
+    Combines per-window scores into one: max (any toxic window flags the
+    text), mean, or topk (mean of the k highest windows).
+    """
+    if not scores:
+        return 0.0
+    if method == 'mean':
+        return float(np.mean(scores))
+    if method == 'topk':
+        return float(np.mean(sorted(scores, reverse=True)[:max(1, top_k)]))
+    return float(max(scores))
+
+
+def score_text_windows(tokenizer, forward_ids, texts: List[str], max_length: int,
+                       buckets: Tuple[int, ...]) -> List[float]:
+    """
+    Chunked scoring shared by the torch and ONNX text classifiers.
+    Every window of every text is scored in length-bucketed batches by
+    forward_ids(list of token id lists) -> toxicity probabilities, then
+    aggregated per text. text_max_windows caps windows per text, so a
+    batch of long texts can still produce batch x max_windows windows;
+    each forward pass takes at most text_forward_batch_size of them.
+    """
+    config = MLRuntimeConfig()
+    window = max_length - tokenizer.num_special_tokens_to_add(pair=False)
+    encoded = tokenizer(texts, add_special_tokens=False, truncation=False)['input_ids']
+    
+    windows = []
+    owners = []
+    for i, ids in enumerate(encoded):
+        for chunk in split_token_windows(ids, window, config.text_chunk_stride, config.text_max_windows):
+            windows.append(tokenizer.build_inputs_with_special_tokens(chunk))
+            owners.append(i)
+    
+    window_scores = [0.0] * len(windows)
+    grouped = bucket_by_length([len(ids) for ids in windows], buckets)
+    step = max(1, config.text_forward_batch_size)
+    for bucket, positions in sorted(grouped.items()):
+        for start in range(0, len(positions), step):
+            chunk = positions[start:start + step]
+            try:
+                probs = forward_ids([windows[i] for i in chunk])
+            except Exception as e:
+                logger.error(f"Windowed text prediction error (bucket {bucket}): {e}")
+                raise
+            for i, prob in zip(chunk, probs):
+                window_scores[i] = float(prob)
+    
+    per_text: List[List[float]] = [[] for _ in texts]
+    for owner, score in zip(owners, window_scores):
+        per_text[owner].append(score)
+    return [
+        aggregate_window_scores(scores, config.text_chunk_aggregation, config.text_chunk_top_k)
+        for scores in per_text
+    ]
+
+
+def torch_backend(kind: str, load_kwargs: Dict[str, Any]) -> str:
+    """
+    Backend tag for model versions; names the store revision when the
+    weights were loaded from the model store rather than the hub.
+    """
+    if not load_kwargs:
+        return "torch"
+    entry = ModelStore().entry(kind) or {}
+    return f"torch@{entry.get('revision')}"
+
+
+def vision_model_version(backend: str) -> str:
+    """
+    Identifies the vision model for image score caching.
+    """
+    return f"{backend}:{VISION_MODEL_ID}"
+
+
+def text_model_version(backend: str) -> str:
+    """
+    Identifies the scoring setup for verdict caching; chunking settings
+    change scores, so they are part of the version.
+    """
+    config = MLRuntimeConfig()
+    version = f"{backend}:{TEXT_MODEL_ID}"
+    if config.text_chunking:
+        version += (f":win{config.text_max_windows}/{config.text_chunk_stride}"
+                    f"/{config.text_chunk_aggregation}{config.text_chunk_top_k}")
+    return version
+
 
 class RealNSFWImageClassifier:
     """
@@ -26,79 +163,233 @@ class RealNSFWImageClassifier:
         try:
             from transformers import pipeline
             logger.info("Loading BEST NSFW image classifier...")
+            source, load_kwargs = resolve_model_source('vision', VISION_MODEL_ID)
             self.classifier = pipeline(
                 "image-classification",
-                model="AdamCodd/vit-base-nsfw-detector",
-                device=0 if DEVICE == 'cuda' else -1
+                model=source,
+                device=0 if DEVICE == 'cuda' else -1,
+                model_kwargs=load_kwargs
             )
+            self.version = vision_model_version(torch_backend('vision', load_kwargs))
             logger.info("[OK] BEST NSFW Image Classifier loaded (204k downloads)")
         except Exception as e:
             logger.error(f"Failed to load image classifier: {e}")
             logger.info("Run: pip install transformers pillow")
             raise
 
+        self.preprocessor = None
+        if MLRuntimeConfig().vision_fast_decode:
+            self.preprocessor = ImagePreprocessor.from_processor(
+                getattr(self.classifier, 'image_processor', None)
+            )
+            if self.preprocessor is None:
+                logger.info("Image processor needs cropping, using the standard decode path")
+
+    def _score(self, results: List[Dict[str, Any]]) -> float:
+        for result in results:
+            if 'nsfw' in result['label'].lower():
+                return result['score']
+        
+        for result in results:
+            if 'normal' in result['label'].lower() or 'safe' in result['label'].lower():
+                return 1.0 - result['score']
+        
+        return 0.0
+
     def predict(self, image_bytes: bytes) -> float:
         """
         Returns NSFW probability (0.0 = safe, 1.0 = NSFW)
         """
+        if self.preprocessor is not None:
+            return self.predict_batch([image_bytes])[0]
+        
         try:
             image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
             
             results = self.classifier(image)
             
-            for result in results:
-                if 'nsfw' in result['label'].lower():
-                    return result['score']
-            
-            for result in results:
-                if 'normal' in result['label'].lower() or 'safe' in result['label'].lower():
-                    return 1.0 - result['score']
-            
-            return 0.0
+            return self._score(results)
             
         except Exception as e:
             logger.error(f"Image prediction error: {e}")
             return 0.0
 
+    def predict_batch(self, images: List[bytes]) -> List[float]:
+        """
+        Scores several images with one batched forward pass.
+        Images that fail to decode score 0.0, same as predict().
+        """
+        if self.preprocessor is not None:
+            return self._predict_batch_fast(images)
+        
+        scores = [0.0] * len(images)
+        decoded = []
+        positions = []
+        
+        for i, image_bytes in enumerate(images):
+            try:
+                decoded.append(Image.open(io.BytesIO(image_bytes)).convert('RGB'))
+                positions.append(i)
+            except Exception as e:
+                logger.error(f"Image decode error: {e}")
+        
+        if not decoded:
+            return scores
+        
+        try:
+            batch_results = self.classifier(decoded, batch_size=len(decoded))
+        except Exception as e:
+            logger.error(f"Batch image prediction error: {e}")
+            return scores
+        
+        for i, results in zip(positions, batch_results):
+            scores[i] = self._score(results)
+        
+        return scores
+
+    def _predict_batch_fast(self, images: List[bytes]) -> List[float]:
+        """
+        Draft-mode decode into a preallocated tensor, then a direct forward
+        pass; skips the pipeline's full-resolution decode and processor.
+        """
+        scores = [0.0] * len(images)
+        batch, positions, errors = self.preprocessor.load_batch(images)
+        for e in errors:
+            logger.error(f"Image decode error: {e}")
+        
+        if not positions:
+            return scores
+        
+        try:
+            model = self.classifier.model
+            with torch.inference_mode():
+                pixel_values = torch.from_numpy(batch).to(self.classifier.device)
+                probs = F.softmax(model(pixel_values=pixel_values).logits.float(), dim=-1).cpu().numpy()
+        except Exception as e:
+            logger.error(f"Batch image prediction error: {e}")
+            return scores
+        
+        labels = model.config.id2label
+        for i, row in zip(positions, probs):
+            scores[i] = self._score([
+                {'label': labels[j], 'score': float(p)} for j, p in enumerate(row)
+            ])
+        
+        return scores
+
 
 class RealTextToxicityClassifier:
     """
     Real text toxicity classifier using unitary/toxic-bert.
     Pre-trained on Wikipedia Toxic Comments dataset.
     """
-    def __init__(self):
+    def __init__(self, length_buckets: Tuple[int, ...] = (16, 32, 64, 128, 256, 512)):
         try:
             from transformers import pipeline
             logger.info("Loading BEST text toxicity classifier...")
+            source, load_kwargs = resolve_model_source('text', TEXT_MODEL_ID)
             self.classifier = pipeline(
                 "text-classification",
-                model="s-nlp/roberta_toxicity_classifier",
-                device=0 if DEVICE == 'cuda' else -1
+                model=source,
+                device=0 if DEVICE == 'cuda' else -1,
+                model_kwargs=load_kwargs
             )
             logger.info("[OK] BEST Text Toxicity Classifier loaded (74.3k downloads)")
         except Exception as e:
             logger.error(f"Failed to load text classifier: {e}")
             logger.info("Run: pip install transformers")
             raise
+        
+        self.length_buckets = tuple(sorted(length_buckets))
+        self.max_length = self.length_buckets[-1]
+        self.version = text_model_version(torch_backend('text', load_kwargs))
+        self.chunking = MLRuntimeConfig().text_chunking
+        
+        labels = {int(i): label.lower() for i, label in self.classifier.model.config.id2label.items()}
+        self.toxic_index = next((i for i, l in labels.items() if l == 'toxic'), 1)
+    
+    def _score(self, result: Dict[str, Any]) -> float:
+        if result['label'] == 'toxic':
+            return result['score']
+        else:
+            return 1.0 - result['score']
     
     def predict(self, text: str) -> float:
         """
         Returns toxicity probability (0.0 = safe, 1.0 = toxic)
         """
         try:
+            if self.chunking:
+                return self.predict_batch([text])[0]
+            
             text = text[:2048]
             
             result = self.classifier(text)[0]
             
-            if result['label'] == 'toxic':
-                return result['score']
-            else:
-                return 1.0 - result['score']
+            return self._score(result)
                 
         except Exception as e:
             logger.error(f"Text prediction error: {e}")
             return 0.0
 
+    def predict_batch(self, texts: List[str]) -> List[float]:
+        """
+        Scores several texts with one forward pass per length bucket,
+        so short snippets are never padded to the length of a long page.
+        Tokenizer and model errors are raised rather than scored 0.0, so a
+        failed batch is never mistaken for (and cached as) a safe verdict.
+        """
+        scores = [0.0] * len(texts)
+        if not texts:
+            return scores
+        
+        if self.chunking:
+            try:
+                return score_text_windows(
+                    self.classifier.tokenizer, self._forward_ids, texts,
+                    self.max_length, self.length_buckets
+                )
+            except Exception as e:
+                logger.error(f"Text tokenization error: {e}")
+                raise
+        
+        texts = [text[:2048] for text in texts]
+        
+        try:
+            token_ids, buckets = bucket_token_ids(
+                self.classifier.tokenizer, texts, self.max_length, self.length_buckets
+            )
+        except Exception as e:
+            logger.error(f"Text tokenization error: {e}")
+            raise
+        
+        for bucket, positions in sorted(buckets.items()):
+            try:
+                probs = self._forward_ids([token_ids[i] for i in positions])
+            except Exception as e:
+                logger.error(f"Batch text prediction error (bucket {bucket}): {e}")
+                raise
+            
+            for i, prob in zip(positions, probs):
+                scores[i] = float(prob)
+        
+        return scores
+
+    def _forward_ids(self, batch_ids: List[List[int]]) -> np.ndarray:
+        """
+        Toxicity probabilities for already-tokenized inputs, padded to the
+        longest in the batch.
+        """
+        tokenizer = self.classifier.tokenizer
+        model = self.classifier.model
+        encoded = tokenizer.pad({'input_ids': batch_ids}, padding='longest', return_tensors='pt')
+        with torch.inference_mode():
+            logits = model(
+                input_ids=encoded['input_ids'].to(self.classifier.device),
+                attention_mask=encoded['attention_mask'].to(self.classifier.device)
+            ).logits
+        return F.softmax(logits.float(), dim=-1)[:, self.toxic_index].cpu().numpy()
+
 
 class EnsembleVoter:
     """
@@ -144,22 +435,52 @@ class EnsembleVoter:
 class ModelFactory:
     """
     Factory for creating and loading REAL pre-trained models.
+    Loads are serialized per kind, so a retry that starts while a timed-out
+    load is still running waits for it instead of building a second copy.
     """
     _instances = {}
+    _locks = {'vision': threading.Lock(), 'text': threading.Lock()}
 
     @staticmethod
     def get_vision_model() -> RealNSFWImageClassifier:
-        if 'vision' not in ModelFactory._instances:
-            model = RealNSFWImageClassifier()
-            ModelFactory._instances['vision'] = model
-        return ModelFactory._instances['vision']
+        with ModelFactory._locks['vision']:
+            if 'vision' not in ModelFactory._instances:
+                if MLRuntimeConfig().inference_backend == 'onnx':
+                    from services.ml_core_onnx import OnnxNSFWImageClassifier
+                    model = OnnxNSFWImageClassifier()
+                else:
+                    model = RealNSFWImageClassifier()
+                ModelFactory._instances['vision'] = model
+            return ModelFactory._instances['vision']
 
     @staticmethod
     def get_text_model() -> RealTextToxicityClassifier:
-        if 'text' not in ModelFactory._instances:
-            model = RealTextToxicityClassifier()
-            ModelFactory._instances['text'] = model
-        return ModelFactory._instances['text']
+        with ModelFactory._locks['text']:
+            if 'text' not in ModelFactory._instances:
+                config = MLRuntimeConfig()
+                if config.inference_backend == 'onnx':
+                    from services.ml_core_onnx import OnnxTextToxicityClassifier
+                    model = OnnxTextToxicityClassifier(length_buckets=config.text_length_buckets)
+                else:
+                    model = RealTextToxicityClassifier(length_buckets=config.text_length_buckets)
+                ModelFactory._instances['text'] = model
+            return ModelFactory._instances['text']
+
+    @staticmethod
+    def get_model(kind: str):
+        if kind == 'vision':
+            return ModelFactory.get_vision_model()
+        if kind == 'text':
+            return ModelFactory.get_text_model()
+        raise ValueError(f"Unknown model kind: {kind}")
+
+
+def invoke_model(kind: str, method: str, *args) -> Any:
+    """
+    Calls a model method by name. Module-level so it can be shipped to an
+    inference worker process as well as run on a thread.
+    """
+    return getattr(ModelFactory.get_model(kind), method)(*args)
 
 
 class RealMLCore:
@@ -193,6 +514,33 @@ class RealMLCore:
                 logger.error(f"Text analysis failed: {e}")
                 scores['text'] = 0.0
 
+        return self._assess(scores)
+
+    async def analyze_content_async(self, content: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Same as analyze_content, but each model call runs on the inference executor.
+        """
+        from services.ml_executor import get_inference_executor
+        executor = get_inference_executor()
+        scores = {}
+        
+        if 'image_bytes' in content and content['image_bytes']:
+            try:
+                scores['vision'] = await executor.run(invoke_model, 'vision', 'predict', content['image_bytes'])
+            except Exception as e:
+                logger.error(f"Vision analysis failed: {e}")
+                scores['vision'] = 0.0
+
+        if 'text' in content and content['text']:
+            try:
+                scores['text'] = await executor.run(invoke_model, 'text', 'predict', content['text'])
+            except Exception as e:
+                logger.error(f"Text analysis failed: {e}")
+                scores['text'] = 0.0
+
+        return self._assess(scores)
+
+    def _assess(self, scores: Dict[str, float]) -> Dict[str, Any]:
         final_score, uncertainty = self.voter.vote(scores)
         
         return {
@@ -1,45 +1,219 @@
 
 import math
 import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from bisect import bisect_left
 from typing import List, Dict, Set, Optional, Any, Tuple
 from dataclasses import dataclass, field
 
+import numpy as np
+
+
+_MASK64 = (1 << 64) - 1
+
+BLOOM_MAGIC = b'ALBF'
+BLOOM_FORMAT = 3
+BLOOM_HEADER = struct.Struct('<4sHHQIQd32s32sQ')
+BLOOM_HEADER_SIZE = 128
+
+
+class BloomSnapshotError(Exception):
+    """Raised when a Bloom filter snapshot is malformed or corrupt."""
+
+
+def item_digest(item: str) -> bytes:
+    """16-byte digest of an item; the two 64-bit halves seed double hashing."""
+    return hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+
+
+def item_digests(items: List[str]) -> np.ndarray:
+    """item_digest of each item as an (n, 2) array of its 64-bit halves."""
+    return np.frombuffer(b''.join(item_digest(item) for item in items), dtype='<u8').reshape(-1, 2)
+
+
+def item_hashes(items: List[str]) -> np.ndarray:
+    """First 64-bit half of each item's digest, the key of the exact domain tier."""
+    return item_digests(items)[:, 0].copy()
+
 
 class BloomFilter:
     """
     Probabilistic data structure for fast set membership testing.
     False positive rate is configurable.
+
+    Each item is hashed once; its k bit positions are derived from the two
+    64-bit halves h1, h2 of that digest as (h1 + i * h2) mod 2^64 mod size
+    (Kirsch-Mitzenmacher double hashing), so scalar and NumPy bulk calls
+    set and test the same bits.
     """
     def __init__(self, items_count: int, fp_prob: float):
+        self.items_count = items_count
         self.fp_prob = fp_prob
+        self.version = ""
+        self.payload = memoryview(b"")
         self.size = self.get_size(items_count, fp_prob)
         self.hash_count = self.get_hash_count(self.size, items_count)
         self.byte_size = (self.size + 7) // 8
         self.bit_array = bytearray(self.byte_size)
 
-    def _hash(self, item: str, seed: int) -> int:
-        """Double hashing using sha256"""
-        h = hashlib.sha256(item.encode('utf-8')).digest()
-        h1 = int.from_bytes(h[:16], 'big')
-        h2 = int.from_bytes(h[16:], 'big')
-        return (h1 + seed * h2) % self.size
+    def _positions(self, item: str) -> List[int]:
+        return self._digest_positions(item_digest(item))
+
+    def _digest_positions(self, digest: bytes) -> List[int]:
+        h = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        positions = []
+        for _ in range(self.hash_count):
+            positions.append(h % size)
+            h = (h + h2) & _MASK64
+        return positions
+
+    def _bulk_positions(self, items: List[str]) -> np.ndarray:
+        return self._digest_bulk_positions(item_digests(items))
+
+    def _digest_bulk_positions(self, digests: np.ndarray) -> np.ndarray:
+        h1 = digests[:, :1]
+        h2 = digests[:, 1:] | np.uint64(1)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        return (h1 + steps * h2) % np.uint64(self.size)
+
+    def _bits(self, writable: bool = False) -> np.ndarray:
+        bits = np.frombuffer(self.bit_array, dtype=np.uint8)
+        if writable and not bits.flags.writeable:
+            raise TypeError("Bloom filter loaded from a snapshot is read-only")
+        return bits
 
     def add(self, item: str):
-        for i in range(self.hash_count):
-            digest = self._hash(item, i)
-            byte_index = digest // 8
-            bit_index = digest % 8
-            self.bit_array[byte_index] |= (1 << bit_index)
+        for position in self._positions(item):
+            self.bit_array[position >> 3] |= 1 << (position & 7)
 
     def check(self, item: str) -> bool:
-        for i in range(self.hash_count):
-            digest = self._hash(item, i)
-            byte_index = digest // 8
-            bit_index = digest % 8
-            if not (self.bit_array[byte_index] & (1 << bit_index)):
+        return self.check_digest(item_digest(item))
+
+    def check_digest(self, digest: bytes) -> bool:
+        """check() for an item_digest computed by the caller; stops at the first clear bit."""
+        bit_array = self.bit_array
+        size = self.size
+        h = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for _ in range(self.hash_count):
+            position = h % size
+            if not (bit_array[position >> 3] & (1 << (position & 7))):
                 return False
+            h = (h + h2) & _MASK64
         return True
 
+    def add_many(self, items: List[str], chunk_size: int = 65536):
+        """Adds items in vectorized chunks."""
+        for i in range(0, len(items), chunk_size):
+            self.add_digests(item_digests(items[i:i + chunk_size]))
+
+    def add_digests(self, digests: np.ndarray, chunk_size: int = 65536):
+        """Adds items given as an item_digests() array."""
+        bits = self._bits(writable=True)
+        for i in range(0, len(digests), chunk_size):
+            positions = self._digest_bulk_positions(digests[i:i + chunk_size]).ravel()
+            np.bitwise_or.at(bits, positions >> np.uint64(3),
+                             np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+
+    def copy(self) -> 'BloomFilter':
+        """Writable in-memory copy, also of a filter mapped from a snapshot."""
+        bloom = self.__class__.__new__(self.__class__)
+        bloom.__dict__.update(self.__dict__)
+        bloom.bit_array = bytearray(self.bit_array)
+        bloom.payload = memoryview(b"")
+        return bloom
+
+    def check_many(self, items: List[str]) -> np.ndarray:
+        """Boolean array: whether each item is (probably) in the filter."""
+        if not items:
+            return np.zeros(0, dtype=bool)
+        positions = self._bulk_positions(items)
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        return np.all(self._bits()[positions >> np.uint64(3)] & masks, axis=1)
+
+    def save(self, path: str, version: str = "", payload: bytes = b""):
+        """
+        Writes a snapshot: a fixed-size header (magic, format, size in bits,
+        hash count, capacity, fp rate, version, SHA-256, payload length)
+        followed by the bit array and an opaque payload for the caller,
+        starting at an 8-byte aligned offset. The checksum covers bits and
+        payload. The file is replaced atomically,
+        so processes that still map the previous snapshot keep a consistent
+        view.
+        """
+        checksum = hashlib.sha256(self.bit_array)
+        checksum.update(payload)
+        header = BLOOM_HEADER.pack(
+            BLOOM_MAGIC, BLOOM_FORMAT, 0, self.size, self.hash_count, self.items_count,
+            self.fp_prob, version.encode('utf-8')[:32], checksum.digest(), len(payload)
+        )
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.bloom-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header.ljust(BLOOM_HEADER_SIZE, b'\0'))
+                f.write(self.bit_array)
+                f.write(b'\0' * (self._payload_offset(self.byte_size) - BLOOM_HEADER_SIZE - self.byte_size))
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, verify: bool = True) -> 'BloomFilter':
+        """
+        Maps a snapshot read-only. The bits are served straight from the
+        page cache, so startup does not rebuild anything and every worker
+        mapping the same file shares one copy. A loaded filter cannot be
+        added to; the payload is exposed as a read-only memoryview.
+        """
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapped) < BLOOM_HEADER_SIZE:
+            raise BloomSnapshotError(f"{path}: truncated header")
+
+        magic, fmt, _, size, hash_count, items_count, fp_prob, version, checksum, payload_size = \
+            BLOOM_HEADER.unpack_from(mapped)
+        if magic != BLOOM_MAGIC or fmt != BLOOM_FORMAT:
+            raise BloomSnapshotError(f"{path}: not a format {BLOOM_FORMAT} Bloom filter snapshot")
+        byte_size = (size + 7) // 8
+        payload_offset = cls._payload_offset(byte_size)
+        if len(mapped) != payload_offset + payload_size:
+            raise BloomSnapshotError(f"{path}: expected {byte_size} bytes of bits and {payload_size} of payload")
+
+        view = memoryview(mapped)
+        bits = view[BLOOM_HEADER_SIZE:BLOOM_HEADER_SIZE + byte_size]
+        payload = view[payload_offset:]
+        if verify:
+            digest = hashlib.sha256(bits)
+            digest.update(payload)
+            if digest.digest() != checksum:
+                raise BloomSnapshotError(f"{path}: checksum mismatch")
+
+        bloom = cls.__new__(cls)
+        bloom.items_count = items_count
+        bloom.fp_prob = fp_prob
+        bloom.size = size
+        bloom.hash_count = hash_count
+        bloom.byte_size = byte_size
+        bloom.bit_array = bits
+        bloom.version = version.rstrip(b'\0').decode('utf-8')
+        bloom.payload = payload
+        return bloom
+
+    @staticmethod
+    def _payload_offset(byte_size: int) -> int:
+        return BLOOM_HEADER_SIZE + (byte_size + 7) // 8 * 8
+
     @classmethod
     def get_size(cls, n: int, p: float) -> int:
         m = -(n * math.log(p)) / (math.log(2) ** 2)
@@ -48,7 +222,7 @@ class BloomFilter:
     @classmethod
     def get_hash_count(cls, m: int, n: int) -> int:
         k = (m / n) * math.log(2)
-        return int(k)
+        return max(1, int(k))
 
 class TrieNode:
     def __init__(self):
@@ -104,15 +278,229 @@ class Trie:
         return matches
 
 
+class DomainSuffixIndex:
+    """
+    Exact set of blocked domains with a category per rule.
+
+    A rule covers the domain and every subdomain of it: looking up a host
+    probes the host itself and then each parent domain (fr.pornhub.com,
+    pornhub.com, com), one lookup per label. The most specific rule wins.
+
+    Rules are stored as a sorted array of 64-bit domain hashes (the first
+    half of item_digest, shared with the Bloom filter) plus a parallel
+    array of category codes: 9 bytes per rule, searched with bisect, and
+    mappable straight from a snapshot. Distinct domains collide with
+    probability ~n / 2^64 per lookup.
+    """
+    PAYLOAD_HEADER = struct.Struct('<QI4x')
+
+    def __init__(self):
+        self.categories: List[str] = []
+        self._set_arrays(np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.uint8))
+
+    def _set_arrays(self, hashes: np.ndarray, codes: np.ndarray):
+        self._hashes = hashes
+        self._codes = codes
+        self._sorted = memoryview(hashes).cast('B').cast('Q')
+        self._code_view = memoryview(codes).cast('B')
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, domain: str) -> bool:
+        return self.get(domain) is not None
+
+    @property
+    def nbytes(self) -> int:
+        return self._hashes.nbytes + self._codes.nbytes
+
+    def copy(self) -> 'DomainSuffixIndex':
+        """Independent index sharing the (never modified in place) arrays."""
+        index = self.__class__()
+        index.categories = list(self.categories)
+        index._set_arrays(self._hashes, self._codes)
+        return index
+
+    def category_code(self, category: str) -> int:
+        if category not in self.categories:
+            if len(self.categories) > 255:
+                raise ValueError("At most 256 domain categories are supported")
+            self.categories.append(category)
+        return self.categories.index(category)
+
+    def add(self, domain: str, category: str = "adult"):
+        self.add_many([domain], category)
+
+    def add_many(self, domains: List[str], category: str = "adult"):
+        if not domains:
+            return
+        hashes = item_hashes(domains)
+        self.merge(hashes, np.full(len(hashes), self.category_code(category), dtype=np.uint8))
+
+    def _find(self, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Insertion points of hashes in the sorted array and whether each is present."""
+        positions = np.searchsorted(self._hashes, hashes)
+        found = positions < len(self._hashes)
+        found[found] = self._hashes[positions[found]] == hashes[found]
+        return positions, found
+
+    def merge(self, hashes: np.ndarray, codes: np.ndarray):
+        """Adds rules given as domain hashes and category codes; they win over existing rules."""
+        hashes, first = np.unique(hashes, return_index=True)
+        codes = codes[first]
+        positions, found = self._find(hashes)
+        updated_codes = self._codes.copy()
+        updated_codes[positions[found]] = codes[found]
+        new = ~found
+        self._set_arrays(np.insert(self._hashes, positions[new], hashes[new]),
+                         np.insert(updated_codes, positions[new], codes[new]))
+
+    def discard(self, domain: str):
+        self.discard_many([domain])
+
+    def discard_many(self, domains: List[str]):
+        if domains:
+            self.remove_hashes(item_hashes(domains))
+
+    def remove_hashes(self, hashes: np.ndarray):
+        if len(hashes) and len(self._hashes):
+            positions, found = self._find(hashes)
+            drop = np.unique(positions[found])
+            self._set_arrays(np.delete(self._hashes, drop), np.delete(self._codes, drop))
+
+    def _lookup(self, h: int) -> Optional[str]:
+        sorted_hashes = self._sorted
+        i = bisect_left(sorted_hashes, h)
+        if i < len(sorted_hashes) and sorted_hashes[i] == h:
+            return self.categories[self._code_view[i]]
+        return None
+
+    def get(self, domain: str) -> Optional[str]:
+        """Category of an exact rule domain."""
+        return self._lookup(int.from_bytes(item_digest(domain)[:8], 'little'))
+
+    def match(self, host: str, bloom: Optional[BloomFilter] = None) -> Optional[Dict[str, str]]:
+        """
+        The most specific rule covering host. With a Bloom filter over the
+        rule domains, suffixes it rejects skip the exact search; each
+        suffix is hashed once for both tiers.
+        """
+        suffix = host
+        while True:
+            digest = item_digest(suffix)
+            if bloom is None or bloom.check_digest(digest):
+                category = self._lookup(int.from_bytes(digest[:8], 'little'))
+                if category is not None:
+                    return {'rule': suffix, 'category': category}
+            dot = suffix.find('.')
+            if dot < 0:
+                return None
+            suffix = suffix[dot + 1:]
+
+    def to_bytes(self) -> bytes:
+        categories = json.dumps(self.categories).encode('utf-8')
+        return b''.join([
+            self.PAYLOAD_HEADER.pack(len(self._hashes), len(categories)),
+            self._hashes.astype('<u8').tobytes(), self._codes.tobytes(), categories
+        ])
+
+    @classmethod
+    def from_arrays(cls, hashes: np.ndarray, codes: np.ndarray, categories: List[str]) -> 'DomainSuffixIndex':
+        """Index over sorted, unique hashes and their category codes."""
+        index = cls()
+        index.categories = list(categories)
+        index._set_arrays(hashes, codes)
+        return index
+
+    @classmethod
+    def from_bytes(cls, data) -> 'DomainSuffixIndex':
+        """Index over a to_bytes() buffer; the arrays are views, not copies."""
+        count, categories_size = cls.PAYLOAD_HEADER.unpack_from(data)
+        offset = cls.PAYLOAD_HEADER.size
+        hashes = np.frombuffer(data, dtype='<u8', count=count, offset=offset)
+        codes = np.frombuffer(data, dtype=np.uint8, count=count, offset=offset + 8 * count)
+        offset += 9 * count
+        categories = json.loads(bytes(data[offset:offset + categories_size]).decode('utf-8'))
+        return cls.from_arrays(hashes, codes, categories)
+
+
 class DomainDatabase:
     """
     Manages millions of blocked domains using Bloom Filters.
+
+    Rules live in a DomainSuffixIndex, so blocking a domain blocks all of
+    its subdomains instead of a fixed list of www./m./cdn. variants.
+    Lookups are two-tier: the Bloom filter over the rule domains rejects
+    most suffixes, and its positives are confirmed against the exact
+    index, so a Bloom false positive never blocks a domain.
+
+    If a snapshot built by build_blocklist_snapshot.py exists it is mapped
+    instead of rebuilding from the built-in list; the rules are carried in
+    the snapshot payload.
+
+    The filter, index and blocklist version form one state tuple that
+    lookups read once, so swap() replaces all three atomically while
+    lookups keep running on the previous state.
     """
-    def __init__(self):
-        self.filter = BloomFilter(1000000, 0.001)
-        self._populate()
+    CAPACITY = 1000000
+    FP_RATE = 0.001
+    DEFAULT_CATEGORY = "adult"
+
+    def __init__(self, snapshot_path: Optional[str] = None, populate: bool = True,
+                 capacity: int = CAPACITY, fp_rate: float = FP_RATE):
+        state = self.read_snapshot(snapshot_path) if snapshot_path else None
+        self._state: Tuple[BloomFilter, DomainSuffixIndex, str] = state or (
+            BloomFilter(capacity, fp_rate), DomainSuffixIndex(), ""
+        )
+        if state is None and populate:
+            self._populate()
+
+    @staticmethod
+    def read_snapshot(path: str) -> Optional[Tuple[BloomFilter, 'DomainSuffixIndex', str]]:
+        """(filter, index, version) mapped from a snapshot file, or None if it is missing or invalid."""
+        if not os.path.exists(path):
+            return None
+        try:
+            bloom = BloomFilter.load(path)
+            return bloom, DomainSuffixIndex.from_bytes(bloom.payload), bloom.version
+        except (BloomSnapshotError, OSError, ValueError, struct.error) as e:
+            logging.getLogger(__name__).error(f"Ignoring blocklist snapshot: {e}")
+            return None
+
+    @property
+    def state(self) -> Tuple[BloomFilter, 'DomainSuffixIndex', str]:
+        """(filter, index, version) as one consistent snapshot."""
+        return self._state
+
+    @property
+    def filter(self) -> BloomFilter:
+        return self._state[0]
+
+    @property
+    def index(self) -> DomainSuffixIndex:
+        return self._state[1]
+
+    @property
+    def version(self) -> str:
+        return self._state[2]
+
+    def swap(self, bloom: BloomFilter, index: DomainSuffixIndex, version: str):
+        self._state = (bloom, index, version)
+
+    def save_snapshot(self, path: str, version: Optional[str] = None):
+        bloom, index, current = self.state
+        bloom.save(path, version=current if version is None else version, payload=index.to_bytes())
 
     def _populate(self):
+        self.add_many(self.builtin_domains(), self.DEFAULT_CATEGORY)
+
+    def add_many(self, domains: List[str], category: str = DEFAULT_CATEGORY):
+        """Adds rules in place; use swap() to update a database serving lookups."""
+        self.index.add_many(domains, category)
+        self.filter.add_many(domains)
+
+    @staticmethod
+    def builtin_domains() -> List[str]:
         domains = [
             "pornhub.com", "xvideos.com", "xnxx.com", "xhamster.com", "redtube.com",
             "youporn.com", "brazzers.com", "realitykings.com", "bangbros.com",
@@ -536,15 +924,16 @@ class DomainDatabase:
             "butt-world.com", "butt-zone.com", "buttman.com", "buttporn.com",
             "buttsex.com", "butttube.com", "buttvideo.com", "buttworld.com",
         ]
-        for d in domains:
-            self.filter.add(d)
-            self.filter.add(f"www.{d}")
-            self.filter.add(f"m.{d}")
-            for prefix in ["cdn.", "img.", "video.", "api."]:
-                self.filter.add(f"{prefix}{d}")
+        return domains
+
+    def match(self, host: str) -> Optional[Dict[str, str]]:
+        """The rule (host or parent domain) and category blocking host, if any."""
+        bloom, index, _ = self._state
+        host = host.strip().lower().rstrip('.')
+        return index.match(host, bloom) if host else None
 
     def is_blocked(self, domain: str) -> bool:
-        return self.filter.check(domain)
+        return self.match(domain) is not None
 
 class KeywordDatabase:
     """
@@ -552,8 +941,16 @@ class KeywordDatabase:
     """
     def __init__(self):
         self.trie = Trie()
+        self._digest = hashlib.sha256()
         self._populate()
 
+    @property
+    def version(self) -> str:
+        """
+        Content hash of every keyword loaded so far; changes whenever the list does.
+        """
+        return self._digest.hexdigest()[:12]
+
     def _populate(self):
         self._add_keywords("en", {
             "porn": 1.0, "sex": 0.8, "xxx": 1.0, "nude": 0.9, "naked": 0.8,
@@ -615,6 +1012,7 @@ class KeywordDatabase:
     def _add_keywords(self, lang: str, keywords: Dict[str, float]):
         for word, weight in keywords.items():
             self.trie.insert(word, category="nsfw", weight=weight)
+            self._digest.update(f"{lang}:{word}:{weight};".encode('utf-8'))
 
     def analyze_text(self, text: str) -> Tuple[float, List[str]]:
         """
@@ -635,39 +1033,207 @@ class FeatureVector:
     vector: List[float]
     label: str
 
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-10)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind='stable')]
+
+
+class IVFIndex:
+    """
+    Inverted-file index for approximate cosine search.
+
+    Vectors are clustered with spherical k-means and stored contiguously
+    per cluster; a query only scans the n_probe clusters whose centroids are
+    closest to it. offsets[i]:offsets[i + 1] is the row range of cluster i.
+    """
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray):
+        self.centroids = centroids
+        self.offsets = offsets
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, n_lists: int, iterations: int = 10,
+              sample_size: int = 100000, seed: int = 0) -> Tuple['IVFIndex', np.ndarray]:
+        """
+        Clusters normalized rows. Returns the index and the row order that
+        groups rows by cluster; the caller must store rows in that order.
+        """
+        rng = np.random.default_rng(seed)
+        n = len(matrix)
+        n_lists = max(1, min(n_lists, n))
+        sample = matrix[np.sort(rng.choice(n, min(n, max(sample_size, n_lists)), replace=False))]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = cls._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=n_lists)
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = normalize_rows(sums)
+
+        assign = cls._assign(matrix, centroids)
+        order = np.argsort(assign, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))]).astype(np.int64)
+        return cls(centroids, offsets), order
+
+    @staticmethod
+    def _assign(matrix: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(matrix[i:i + chunk] @ centroids.T, axis=1)
+            for i in range(0, len(matrix), chunk)
+        ]) if len(matrix) else np.empty(0, dtype=np.int64)
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, k: int,
+               n_probe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (rows, scores) of the approximate top k for a normalized query."""
+        lists = top_k(self.centroids @ query, n_probe)
+        rows = np.concatenate([
+            np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists
+        ]) if len(lists) else np.empty(0, dtype=np.int64)
+        scores = np.concatenate([
+            matrix[self.offsets[i]:self.offsets[i + 1]] @ query for i in lists
+        ]) if len(lists) else np.empty(0, dtype=np.float32)
+        best = top_k(scores, k)
+        return rows[best], scores[best]
+
+
 class FeatureDatabase:
     """
     Stores pre-computed feature vectors for fast similarity search.
+
+    Vectors live in one float32 matrix, normalized once on insert, so a
+    query is a single matrix-vector product plus a partial sort. An
+    optional IVF index makes search sub-linear for millions of vectors; a
+    saved database is memory-mapped on load, so its pages are shared
+    between workers and only touched when searched.
     """
-    def __init__(self):
-        self.vectors: List[FeatureVector] = []
-        self._populate()
+    def __init__(self, populate: bool = True):
+        self.ids: List[str] = []
+        self.labels: List[str] = []
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._count = 0
+        self.index: Optional[IVFIndex] = None
+        if populate:
+            self._populate()
 
     def _populate(self):
-        for i in range(1000):
-            vec = [math.sin(i * j) for j in range(128)]
-            self.vectors.append(FeatureVector(
-                id=f"vec_{i}",
-                vector=vec,
-                label="nsfw" if i % 2 == 0 else "safe"
-            ))
-
-    def search(self, query_vector: List[float], k: int = 5) -> List[Dict]:
+        i = np.arange(1000, dtype=np.float64)[:, None]
+        j = np.arange(128, dtype=np.float64)[None, :]
+        self.add_many(
+            [f"vec_{n}" for n in range(1000)],
+            np.sin(i * j),
+            ["nsfw" if n % 2 == 0 else "safe" for n in range(1000)]
+        )
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[:self._count]
+
+    @property
+    def vectors(self) -> List[FeatureVector]:
+        return [FeatureVector(id=i, vector=v.tolist(), label=l)
+                for i, v, l in zip(self.ids, self.matrix, self.labels)]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, id: str, vector: List[float], label: str):
+        self.add_many([id], [vector], [label])
+
+    def add_many(self, ids: List[str], vectors, labels: List[str]):
         """
-        Brute-force cosine similarity search (O(N)).
+        Appends vectors (any array-like of shape (n, dim)). Drops the IVF
+        index, which has to be rebuilt to cover the new rows.
         """
-        results = []
-        q_norm = math.sqrt(sum(x*x for x in query_vector))
-        
-        for fv in self.vectors:
-            dot = sum(q * v for q, v in zip(query_vector, fv.vector))
-            v_norm = math.sqrt(sum(x*x for x in fv.vector))
-            similarity = dot / (q_norm * v_norm + 1e-10)
-            results.append({
-                'id': fv.id,
-                'label': fv.label,
-                'score': similarity
-            })
-            
-        results.sort(key=lambda x: x['score'], reverse=True)
-        return results[:k]
+        rows = normalize_rows(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        if self._count == 0 and self._matrix.shape[1] != rows.shape[1]:
+            self._matrix = np.empty((0, rows.shape[1]), dtype=np.float32)
+        needed = self._count + len(rows)
+        if needed > len(self._matrix) or not self._matrix.flags.writeable:
+            grown = np.empty((max(needed, 2 * len(self._matrix)), rows.shape[1]), dtype=np.float32)
+            grown[:self._count] = self.matrix
+            self._matrix = grown
+        self._matrix[self._count:needed] = rows
+        self._count = needed
+        self.ids.extend(ids)
+        self.labels.extend(labels)
+        self.index = None
+
+    def build_index(self, n_lists: Optional[int] = None, iterations: int = 10):
+        """
+        Builds the IVF index (default 4 * sqrt(n) lists) and regroups the
+        stored rows by cluster.
+        """
+        n_lists = n_lists or max(1, int(4 * math.sqrt(self._count)))
+        self.index, order = IVFIndex.train(self.matrix, n_lists, iterations)
+        self._matrix = np.ascontiguousarray(self.matrix[order])
+        self.ids = [self.ids[i] for i in order]
+        self.labels = [self.labels[i] for i in order]
+
+    def search(self, query_vector: List[float], k: int = 5, n_probe: Optional[int] = 8) -> List[Dict]:
+        """
+        Top-k cosine similarity search. Uses the IVF index when built and
+        n_probe is set; pass n_probe=None for an exact scan.
+        """
+        if self._count == 0:
+            return []
+        query = normalize_rows(query_vector)
+        if self.index is not None and n_probe:
+            rows, scores = self.index.search(self.matrix, query, k, n_probe)
+        else:
+            scores = self.matrix @ query
+            rows = top_k(scores, k)
+            scores = scores[rows]
+
+        return [{
+            'id': self.ids[row],
+            'label': self.labels[row],
+            'score': float(score)
+        } for row, score in zip(rows, scores)]
+
+    def save(self, directory: str):
+        """
+        Writes the vectors, ids, labels and IVF index (if built) as .npy files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'vectors.npy'), self.matrix)
+        np.save(os.path.join(directory, 'ids.npy'), np.asarray(self.ids, dtype=str))
+        np.save(os.path.join(directory, 'labels.npy'), np.asarray(self.labels, dtype=str))
+        if self.index is not None:
+            np.save(os.path.join(directory, 'centroids.npy'), self.index.centroids)
+            np.save(os.path.join(directory, 'offsets.npy'), self.index.offsets)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'FeatureDatabase':
+        """
+        Loads a saved database; with mmap the vectors stay on disk and are
+        paged in on demand.
+        """
+        mode = 'r' if mmap else None
+        db = cls(populate=False)
+        db._matrix = np.load(os.path.join(directory, 'vectors.npy'), mmap_mode=mode)
+        db._count = len(db._matrix)
+        db.ids = np.load(os.path.join(directory, 'ids.npy')).tolist()
+        db.labels = np.load(os.path.join(directory, 'labels.npy')).tolist()
+        if os.path.exists(os.path.join(directory, 'centroids.npy')):
+            db.index = IVFIndex(
+                np.load(os.path.join(directory, 'centroids.npy')),
+                np.load(os.path.join(directory, 'offsets.npy'))
+            )
+        return db
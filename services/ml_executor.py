@@ -0,0 +1,278 @@
+"""
+Dedicated executor for blocking model inference.
+Keeps torch/transformers work off the asyncio event loop so non-ML endpoints
+stay responsive while models run.
+"""
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+from services.ml_config import MLRuntimeConfig
+from middleware.monitoring import (
+    track_inference_queue, track_inference_queue_wait, track_inference_rejection
+)
+
+logger = logging.getLogger("InferenceExecutor")
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+LANES = (INTERACTIVE, BACKGROUND)
+
+
+class InferenceUnavailable(Exception):
+    """Base class for inference requests that were not served."""
+
+
+class InferenceQueueFull(InferenceUnavailable):
+    """Raised when the inference queue is at capacity."""
+
+
+class InferenceTimeout(InferenceUnavailable):
+    """Raised when an inference call does not finish in time."""
+
+
+def _warm_process_models():
+    from services.ml_core_real import ModelFactory
+    ModelFactory.get_vision_model()
+    ModelFactory.get_text_model()
+
+
+class InferenceExecutor:
+    """
+    Bounded two-lane worker pool for model calls.
+
+    At most max_workers calls run at once. Waiting calls queue in one of two
+    lanes: interactive calls (device checks) are always dispatched ahead of
+    queued background work (rescans, evaluation, exports), except that the
+    background lane is guaranteed background_share of the dispatches while
+    both lanes are waiting, so it cannot starve. Each lane has its own queue
+    limit and anything beyond it is rejected immediately instead of piling
+    up. Calls that exceed their timeout are cancelled if they have not
+    started yet and reported as timeouts either way. Scheduling state is
+    only touched from the event loop.
+    """
+    def __init__(self, max_workers: int = 2, max_queue: int = 64,
+                 default_timeout: float = 10.0, use_processes: bool = False,
+                 max_background_queue: int = 256, background_share: float = 0.2,
+                 background_timeout: float = 300.0):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.default_timeout = default_timeout
+        self.use_processes = use_processes
+        self.background_share = min(1.0, max(0.0, background_share))
+
+        if use_processes:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_warm_process_models
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="inference"
+            )
+
+        self._queue_limits = {INTERACTIVE: self.max_queue, BACKGROUND: max(0, max_background_queue)}
+        self._timeouts = {INTERACTIVE: default_timeout, BACKGROUND: background_timeout}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self._running = 0
+        self._background_credit = 0.0
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.dispatched = {lane: 0 for lane in LANES}
+        self.total_wait_ms = {lane: 0.0 for lane in LANES}
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return sum(self.queued_in(lane) for lane in LANES)
+
+    def queued_in(self, lane: str) -> int:
+        return sum(1 for waiter in self._waiters[lane] if not waiter.done())
+
+    def _publish(self):
+        track_inference_queue(self.queued, self.running)
+
+    def _next_lane(self) -> Optional[str]:
+        interactive = bool(self._waiters[INTERACTIVE])
+        background = bool(self._waiters[BACKGROUND])
+        if interactive and background:
+            self._background_credit += self.background_share
+            if self._background_credit >= 1.0:
+                self._background_credit -= 1.0
+                return BACKGROUND
+            return INTERACTIVE
+        if interactive:
+            return INTERACTIVE
+        if background:
+            return BACKGROUND
+        return None
+
+    def _dispatch(self):
+        while self._running < self.max_workers:
+            lane = self._next_lane()
+            if lane is None:
+                break
+            waiter = self._waiters[lane].popleft()
+            if waiter.done():
+                continue
+            self._running += 1
+            waiter.set_result(None)
+        self._publish()
+
+    def _release(self):
+        self._running -= 1
+        self._dispatch()
+
+    def _release_from_pool(self, loop: asyncio.AbstractEventLoop):
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            self._release()
+
+    async def _acquire(self, lane: str, timeout: float):
+        if self._running < self.max_workers and not any(self._waiters.values()):
+            self._running += 1
+            self._publish()
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        self._publish()
+        try:
+            await asyncio.wait_for(waiter, timeout=timeout)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters[lane].remove(waiter)
+                except ValueError:
+                    pass
+                self._publish()
+            raise
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None,
+                  lane: str = INTERACTIVE, **kwargs) -> Any:
+        """
+        Runs fn(*args, **kwargs) on the pool in the given lane and awaits
+        the result. The timeout covers queueing and execution.
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown inference lane: {lane}")
+        if timeout is None:
+            timeout = self._timeouts[lane]
+
+        if self._running >= self.max_workers and self.queued_in(lane) >= self._queue_limits[lane]:
+            self.rejected += 1
+            track_inference_rejection('queue_full')
+            raise InferenceQueueFull(
+                f"Inference {lane} queue full ({self.queued_in(lane)} waiting, {self.running} running)"
+            )
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        enqueued_at = time.perf_counter()
+        try:
+            await self._acquire(lane, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            track_inference_rejection('timeout')
+            raise InferenceTimeout(f"Inference waited more than {timeout}s for a worker")
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+        wait = time.perf_counter() - enqueued_at
+        self.dispatched[lane] += 1
+        self.total_wait_ms[lane] += wait * 1000
+        track_inference_queue_wait(lane, wait)
+
+        try:
+            future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release_from_pool(loop))
+
+        try:
+            result = await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                timeout=max(0.0, deadline - loop.time())
+            )
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            track_inference_rejection('timeout')
+            raise InferenceTimeout(f"Inference exceeded {timeout}s")
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'mode': 'process' if self.use_processes else 'thread',
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'default_timeout_s': self.default_timeout,
+            'running': self.running,
+            'queued': self.queued,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            'cancelled': self.cancelled,
+            'lanes': {
+                lane: {
+                    'queued': self.queued_in(lane),
+                    'max_queue': self._queue_limits[lane],
+                    'timeout_s': self._timeouts[lane],
+                    'dispatched': self.dispatched[lane],
+                    'avg_queue_wait_ms': self.total_wait_ms[lane] / self.dispatched[lane]
+                    if self.dispatched[lane] else 0.0
+                } for lane in LANES
+            },
+            'background_share': self.background_share
+        }
+
+    def shutdown(self, wait: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_executor: Optional[InferenceExecutor] = None
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """
+    Returns the process-wide inference executor, creating it from config.
+    """
+    global _executor
+    if _executor is None:
+        config = MLRuntimeConfig()
+        _executor = InferenceExecutor(
+            max_workers=config.inference_workers,
+            max_queue=config.inference_queue_size,
+            default_timeout=config.inference_timeout_s,
+            use_processes=config.inference_use_processes,
+            max_background_queue=config.inference_background_queue_size,
+            background_share=config.inference_background_share,
+            background_timeout=config.inference_background_timeout_s
+        )
+        logger.info(f"Inference executor started: {_executor.get_stats()}")
+    return _executor
@@ -0,0 +1,107 @@
+"""
+Fast image preprocessing for the vision models.
+Decodes JPEGs at reduced size with PIL draft mode, resizes straight to the
+model input size and normalizes into a reusable, preallocated float32 batch
+buffer, instead of decoding full-resolution pixels and letting the HF
+processor throw most of them away.
+"""
+import io
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+class ImagePreprocessor:
+    """
+    Turns encoded images into a normalized NCHW float32 batch.
+
+    Buffers are per thread, so concurrent inference workers never share
+    one; the array returned by load_batch is a view into that buffer and is
+    only valid until the same thread calls load_batch again.
+    """
+    def __init__(self, size: Tuple[int, int] = (224, 224),
+                 image_mean: Sequence[float] = (0.5, 0.5, 0.5),
+                 image_std: Sequence[float] = (0.5, 0.5, 0.5),
+                 rescale_factor: float = 1 / 255,
+                 resample: int = Image.BILINEAR):
+        self.width, self.height = size
+        self.resample = resample
+
+        mean = np.asarray(image_mean, dtype=np.float32)
+        std = np.asarray(image_std, dtype=np.float32)
+        self._scale = (rescale_factor / std).reshape(3, 1, 1)
+        self._offset = (-mean / std).reshape(3, 1, 1)
+        self._local = threading.local()
+
+    @classmethod
+    def from_processor(cls, processor) -> Optional["ImagePreprocessor"]:
+        """
+        Builds a preprocessor matching a HF image processor that does a plain
+        resize to a fixed height/width. Returns None for processors that crop
+        or keep aspect ratio, which need the regular processor path.
+        """
+        size = getattr(processor, 'size', None)
+        if not isinstance(size, dict) or 'height' not in size or 'width' not in size:
+            return None
+        if getattr(processor, 'do_center_crop', False):
+            return None
+
+        rescale = getattr(processor, 'rescale_factor', 1 / 255) if getattr(processor, 'do_rescale', True) else 1.0
+        if getattr(processor, 'do_normalize', True):
+            mean, std = processor.image_mean, processor.image_std
+        else:
+            mean, std = (0.0, 0.0, 0.0), (1.0, 1.0, 1.0)
+
+        return cls(
+            size=(size['width'], size['height']),
+            image_mean=mean,
+            image_std=std,
+            rescale_factor=rescale,
+            resample=int(getattr(processor, 'resample', Image.BILINEAR))
+        )
+
+    def decode(self, image_bytes: bytes) -> Image.Image:
+        """
+        Decodes at the smallest JPEG DCT scale (1/2, 1/4, 1/8) that is still
+        at least the model input size, then resizes to exactly that size.
+        Non-JPEG formats ignore draft() and decode at full size.
+        """
+        image = Image.open(io.BytesIO(image_bytes))
+        image.draft('RGB', (self.width, self.height))
+        image = image.convert('RGB')
+        if image.size != (self.width, self.height):
+            image = image.resize((self.width, self.height), self.resample)
+        return image
+
+    def _buffer(self, count: int) -> np.ndarray:
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or buffer.shape[0] < count:
+            buffer = np.empty((count, 3, self.height, self.width), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer
+
+    def load_batch(self, images: List[bytes]) -> Tuple[np.ndarray, List[int], List[Exception]]:
+        """
+        Decodes and normalizes images into the thread's buffer.
+        Returns the filled slice, the input positions it holds, and the
+        decode errors of the images that were skipped.
+        """
+        buffer = self._buffer(len(images))
+        positions = []
+        errors = []
+
+        for i, image_bytes in enumerate(images):
+            try:
+                pixels = np.asarray(self.decode(image_bytes)).transpose(2, 0, 1)
+            except Exception as e:
+                errors.append(e)
+                continue
+
+            row = buffer[len(positions)]
+            np.multiply(pixels, self._scale, out=row)
+            row += self._offset
+            positions.append(i)
+
+        return buffer[:len(positions)], positions, errors
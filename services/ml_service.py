@@ -10,9 +10,10 @@ from dataclasses import dataclass, field
 from collections import OrderedDict
 
 from services.ml_core import (
-    ModelFactory, EnsembleVoter, ImagePreprocessor, 
+    ModelFactory, EnsembleVoter, ImagePreprocessor, VisionCascade,
     AdvancedVisionModel, AudioClassifier, TextTransformerEncoder
 )
+from services.ml_config import MLRuntimeConfig
 from services.ml_data import (
     DomainDatabase, KeywordDatabase, FeatureDatabase
 )
@@ -175,7 +176,7 @@ class MLService:
     def __init__(self):
         logger.info("Initializing ML Service...")
         
-        self.domain_db = DomainDatabase()
+        self.domain_db = DomainDatabase(MLRuntimeConfig().blocklist_snapshot_path)
         self.keyword_db = KeywordDatabase()
         self.feature_db = FeatureDatabase()
         
@@ -185,6 +186,15 @@ class MLService:
         
         self.ensemble = EnsembleVoter()
         self.cache = AdvancedCache(capacity=5000)
+
+        config = MLRuntimeConfig()
+        self.vision_cascade = None
+        if config.vision_cascade:
+            low = config.vision_cascade_low_size
+            self.vision_cascade = VisionCascade(
+                self.vision_model,
+                low_size=(low, low), band=config.vision_cascade_band
+            )
         self.monitor = MetricsEngine()
         
         logger.info("ML Service Initialized Successfully.")
@@ -266,6 +276,9 @@ class MLService:
         """
         start_time = time.time()
         
+        if self.vision_cascade is not None:
+            return self._scan_image_cascade(image_bytes, start_time)
+
         tensor = ImagePreprocessor.preprocess(image_bytes)
         if tensor is None:
             return self._create_error_result("image_decode_error", start_time)
@@ -290,6 +303,39 @@ class MLService:
             logger.error(f"Inference error: {e}")
             return self._create_error_result(str(e), start_time)
 
+    def _scan_image_cascade(self, image_bytes: bytes, start_time: float) -> ScanResult:
+        """
+        Scores at low resolution and re-runs at full resolution only for
+        images inside the ensemble's uncertainty band.
+        """
+        try:
+            result = self.vision_cascade.predict(image_bytes)
+            if result is None:
+                return self._create_error_result("image_decode_error", start_time)
+
+            score = result['score']
+            final_score, uncertainty = self.ensemble.vote({'vision': score})
+            
+            is_safe = final_score < 0.5
+            flags = ["nsfw_image"] if not is_safe else []
+            
+            return ScanResult(
+                is_safe=is_safe,
+                score=final_score,
+                uncertainty=uncertainty,
+                flags=flags,
+                details={
+                    'vision_score': score,
+                    'low_res_score': result['low_score'],
+                    'escalated': result['escalated'],
+                    'resolution': list(result['resolution'])
+                },
+                latency_ms=(time.time() - start_time) * 1000
+            )
+        except Exception as e:
+            logger.error(f"Inference error: {e}")
+            return self._create_error_result(str(e), start_time)
+
     async def scan_text(self, text: str) -> ScanResult:
         """
         Scans text using KeywordDatabase and Transformer model.
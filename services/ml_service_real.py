@@ -4,16 +4,28 @@ Real ML Service - Using actual pre-trained models
 import logging
 import asyncio
 import time
+import functools
+import dataclasses
 import torch
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
 from services.ml_core_real import (
-    ModelFactory, EnsembleVoter
+    EnsembleVoter, invoke_model
 )
 from services.ml_data import (
     DomainDatabase, KeywordDatabase
 )
+from services.ml_batching import MicroBatcher
+from services.ml_config import MLRuntimeConfig
+from services.ml_executor import BACKGROUND, get_inference_executor, InferenceUnavailable
+from services.ml_cache import VerdictCache, text_cache_key
+from services.ml_warmup import ModelWarmup
+from services.ml_cascade import TextCascade
+from services.ml_video import SceneChangeDetector, VideoScanner, video_fps
+from services.blocklist_sources import normalize_domain
+from services.blocklist_ingest import BlocklistIngestor
+from middleware.monitoring import track_ml_batch, track_cascade_stage, track_cascade_decision
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("RealMLService")
@@ -36,15 +48,88 @@ class RealMLService:
     def __init__(self):
         logger.info("Initializing Real ML Service...")
         
-        self.domain_db = DomainDatabase()
+        self.domain_db = DomainDatabase(MLRuntimeConfig().blocklist_snapshot_path)
         self.keyword_db = KeywordDatabase()
         
-        self.vision_model = ModelFactory.get_vision_model()
-        self.text_model = ModelFactory.get_text_model()
-        
         self.ensemble = EnsembleVoter()
         
-        logger.info("Real ML Service Initialized Successfully.")
+        config = MLRuntimeConfig()
+        self.blocklist = BlocklistIngestor(
+            self.domain_db,
+            lists=config.blocklist_lists,
+            json_path=config.blocklist_json_path,
+            delta_dir=config.blocklist_delta_dir,
+            snapshot_path=config.blocklist_snapshot_path
+        )
+        self.executor = get_inference_executor()
+        self.warmup = ModelWarmup(self.executor)
+        self.vision_batcher = MicroBatcher(
+            'vision',
+            functools.partial(invoke_model, 'vision', 'predict_batch'),
+            max_batch_size=config.vision_batch_size,
+            max_wait_ms=config.vision_batch_wait_ms,
+            on_batch=track_ml_batch,
+            executor=self.executor
+        )
+        self.text_batcher = MicroBatcher(
+            'text',
+            functools.partial(invoke_model, 'text', 'predict_batch'),
+            max_batch_size=config.text_batch_size,
+            max_wait_ms=config.text_batch_wait_ms,
+            on_batch=track_ml_batch,
+            executor=self.executor
+        )
+        self.text_cascade = None
+        if config.text_cascade:
+            self.text_cascade = TextCascade(
+                unsafe_threshold=config.text_cascade_unsafe_threshold,
+                safe_threshold=config.text_cascade_safe_threshold
+            )
+        self.text_cache = VerdictCache(
+            max_bytes=config.text_cache_max_bytes,
+            ttl_seconds=config.text_cache_ttl_s
+        )
+        
+        logger.info("Real ML Service Initialized (models load in the background).")
+
+    def start_warmup(self):
+        """
+        Starts loading and warming the models on the running event loop.
+        """
+        return self.warmup.start()
+
+    def is_ready(self, *kinds: str) -> bool:
+        return self.warmup.is_ready(*kinds)
+
+    def retry_failed_models(self, *kinds: str):
+        """
+        Reloads failed models in the background once their backoff has elapsed.
+        """
+        self.warmup.retry_failed(*kinds)
+
+    def start_blocklist_updates(self):
+        """
+        Applies pending blocklist delta files and keeps polling for new ones.
+        """
+        return self.blocklist.start(MLRuntimeConfig().blocklist_delta_poll_s)
+
+    def stop_blocklist_updates(self):
+        self.blocklist.stop()
+
+    async def rebuild_blocklist(self, include_database: bool = True) -> Dict:
+        return await self.blocklist.rebuild(include_database=include_database)
+
+    def get_stats(self) -> Dict:
+        return {
+            'executor': self.executor.get_stats(),
+            'text_cache': self.text_cache.get_stats(),
+            'text_cascade': self.text_cascade.get_stats() if self.text_cascade else None,
+            'blocklist': self.blocklist.get_stats(),
+            'batching': {
+                'vision': self.vision_batcher.get_stats(),
+                'text': self.text_batcher.get_stats()
+            }
+        }
 
     async def scan_text(self, text: str) -> ScanResult:
         """
@@ -52,9 +137,43 @@ class RealMLService:
         """
         start_time = time.time()
         
+        self.text_cache.ensure_version(self.text_cache_version())
+        cache_key = text_cache_key(text)
+        cached = self.text_cache.get(cache_key)
+        if cached is not None:
+            return dataclasses.replace(
+                cached,
+                details={**cached.details, 'cached': True},
+                latency_ms=(time.time() - start_time) * 1000
+            )
+        
+        stage_start = time.perf_counter()
         kw_weight, keywords = self.keyword_db.analyze_text(text)
         
-        model_score = self.text_model.predict(text)
+        if self.text_cascade is not None:
+            verdict = self.text_cascade.decide(text, kw_weight, keywords)
+            track_cascade_stage('keyword', time.perf_counter() - stage_start)
+            if verdict is not None:
+                track_cascade_decision('keyword', verdict)
+                result = ScanResult(
+                    is_safe=verdict,
+                    score=kw_weight,
+                    uncertainty=0.1,
+                    flags=["keywords_detected"] if keywords else [],
+                    details={
+                        'keywords': keywords,
+                        'model_score': None,
+                        'keyword_weight': kw_weight,
+                        'stage': 'keyword'
+                    },
+                    latency_ms=(time.time() - start_time) * 1000
+                )
+                self.text_cache.put(cache_key, result)
+                return result
+            stage_start = time.perf_counter()
+        
+        await self.warmup.ensure('text')
+        model_score = await self.text_batcher.submit(text)
         
         final_score, uncertainty = self.ensemble.vote({
             'text': model_score,
@@ -67,8 +186,12 @@ class RealMLService:
             flags.append("toxic_text")
         if keywords:
             flags.append("keywords_detected")
+        
+        if self.text_cascade is not None:
+            track_cascade_stage('model', time.perf_counter() - stage_start)
+            track_cascade_decision('model', is_safe)
             
-        return ScanResult(
+        result = ScanResult(
             is_safe=is_safe,
             score=final_score,
             uncertainty=uncertainty,
@@ -76,10 +199,67 @@ class RealMLService:
             details={
                 'keywords': keywords,
                 'model_score': model_score,
-                'keyword_weight': kw_weight
+                'keyword_weight': kw_weight,
+                'stage': 'model'
             },
             latency_ms=(time.time() - start_time) * 1000
         )
+        self.text_cache.put(cache_key, result)
+        return result
+
+    def text_cache_version(self) -> str:
+        """
+        Identifies the text model and keyword list that produced cached verdicts.
+        The model version comes from the warmup probe, since with worker
+        processes the model is never loaded in this process.
+        """
+        version = f"{self.warmup.model_version('text') or 'unknown'}|kw:{self.keyword_db.version}"
+        if self.text_cascade is not None:
+            version += f"|{self.text_cascade.version}"
+        return version
+
+    async def score_background(self, kind: str, items: List, chunk_size: int = 32) -> List[float]:
+        """
+        Raw model scores for bulk jobs, e.g. the baseline evaluation of a
+        /api/ml/train-file dataset.
+        Runs in the background inference lane, so queued chunks yield to
+        interactive device checks; no caching or keyword blending.
+        """
+        await self.warmup.ensure(kind)
+        scores = []
+        for i in range(0, len(items), chunk_size):
+            scores.extend(await self.executor.run(
+                invoke_model, kind, 'predict_batch', items[i:i + chunk_size], lane=BACKGROUND
+            ))
+        return scores
+
+    async def scan_video(self, video_path: str) -> Dict:
+        """
+        Scans a video file by scoring its scene-change keyframes in batches.
+        """
+        await self.warmup.ensure('vision')
+        config = MLRuntimeConfig()
+        scanner = VideoScanner(
+            functools.partial(self.executor.run, invoke_model, 'vision', 'predict_batch'),
+            batch_size=config.video_batch_size,
+            nsfw_threshold=config.video_nsfw_threshold,
+            stop_after=config.video_stop_after,
+            frame_stride=config.video_frame_stride,
+            max_frames=config.video_max_frames,
+            detector_factory=functools.partial(
+                SceneChangeDetector,
+                threshold=config.video_scene_threshold,
+                min_gap=config.video_min_keyframe_gap,
+                max_gap=config.video_max_keyframe_gap
+            )
+        )
+        
+        start_time = time.time()
+        result = await scanner.scan(video_path, fps=video_fps(video_path))
+        if result['frames_read'] == 0:
+            raise ValueError("Could not decode video")
+        result['latency_ms'] = (time.time() - start_time) * 1000
+        return result
 
     async def scan_image(self, image_bytes: bytes) -> ScanResult:
         """
@@ -88,7 +268,8 @@ class RealMLService:
         start_time = time.time()
         
         try:
-            score = self.vision_model.predict(image_bytes)
+            await self.warmup.ensure('vision')
+            score = await self.vision_batcher.submit(image_bytes)
             
             final_score, uncertainty = self.ensemble.vote({'vision': score})
             
@@ -103,6 +284,8 @@ class RealMLService:
                 details={'vision_score': score},
                 latency_ms=(time.time() - start_time) * 1000
             )
+        except InferenceUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Image scan error: {e}")
             return ScanResult(
@@ -120,19 +303,16 @@ class RealMLService:
         """
         start_time = time.time()
         
-        from urllib.parse import urlparse
-        try:
-            domain = urlparse(url).netloc
-        except:
-            domain = ""
+        domain = normalize_domain(url) or ""
         
-        if self.domain_db.is_blocked(domain):
+        match = self.domain_db.match(domain) if domain else None
+        if match is not None:
             return ScanResult(
                 is_safe=False,
                 score=1.0,
                 uncertainty=0.0,
                 flags=["domain_blocklist"],
-                details={'domain': domain},
+                details={'domain': domain, 'rule': match['rule'], 'category': match['category']},
                 latency_ms=(time.time() - start_time) * 1000
             )
         
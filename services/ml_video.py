@@ -0,0 +1,205 @@
+"""
+Video scanning for the vision model.
+Frames are decoded as a stream, only scene-change keyframes are scored
+(in batches) and scanning stops as soon as enough frames are clearly NSFW,
+instead of decoding a whole video up front and sampling it blindly.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def iter_video_frames(video_path: str, stride: int = 1,
+                      max_frames: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yields (frame_index, BGR frame) for every stride-th frame. Skipped
+    frames are only grabbed, not decoded to pixels.
+    """
+    stride = max(1, stride)
+    cap = cv2.VideoCapture(video_path)
+    index = 0
+    try:
+        while cap.isOpened() and (max_frames is None or index < max_frames):
+            if index % stride:
+                if not cap.grab():
+                    break
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield index, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def video_fps(video_path: str) -> float:
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return cap.get(cv2.CAP_PROP_FPS) or 0.0
+    finally:
+        cap.release()
+
+
+def encode_frame(frame: np.ndarray, max_side: int = 384, quality: int = 90) -> bytes:
+    """
+    Downscales a frame (the classifiers work at ~224px) and encodes it as
+    JPEG, the input format of the vision models.
+    """
+    height, width = frame.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1:
+        frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Frame encoding failed")
+    return buffer.tobytes()
+
+
+class SceneChangeDetector:
+    """
+    Picks keyframes by comparing color histograms of consecutive frames.
+
+    The distance is the total variation between normalized 3D color
+    histograms of a small thumbnail (0 = identical, 1 = disjoint). A frame
+    is a keyframe when the distance to the previous examined frame reaches
+    threshold and at least min_gap frames passed since the last keyframe,
+    or when max_gap frames passed without one, so long static shots are
+    still sampled.
+    """
+    def __init__(self, threshold: float = 0.35, min_gap: int = 5, max_gap: int = 150,
+                 bins: int = 8, thumbnail: Tuple[int, int] = (64, 36)):
+        self.threshold = threshold
+        self.min_gap = max(1, min_gap)
+        self.max_gap = max(self.min_gap, max_gap)
+        self.bins = bins
+        self.thumbnail = thumbnail
+
+        self._previous: Optional[np.ndarray] = None
+        self._last_keyframe: Optional[int] = None
+
+    def histogram(self, frame: np.ndarray) -> np.ndarray:
+        small = cv2.resize(frame, self.thumbnail, interpolation=cv2.INTER_AREA)
+        quantized = (small.reshape(-1, 3).astype(np.int32) * self.bins) >> 8
+        codes = (quantized[:, 0] * self.bins + quantized[:, 1]) * self.bins + quantized[:, 2]
+        hist = np.bincount(codes, minlength=self.bins ** 3).astype(np.float32)
+        return hist / hist.sum()
+
+    def is_keyframe(self, index: int, frame: np.ndarray) -> bool:
+        hist = self.histogram(frame)
+        previous, self._previous = self._previous, hist
+
+        if self._last_keyframe is None:
+            keyframe = True
+        else:
+            gap = index - self._last_keyframe
+            distance = 0.5 * float(np.abs(hist - previous).sum())
+            keyframe = gap >= self.max_gap or (gap >= self.min_gap and distance >= self.threshold)
+
+        if keyframe:
+            self._last_keyframe = index
+        return keyframe
+
+
+class VideoScanner:
+    """
+    Streams a video through scene-change detection and scores the
+    keyframes with the vision model in batches.
+
+    score_batch receives a list of JPEG-encoded frames and returns their
+    NSFW scores. Decoding runs on a worker thread one batch ahead of
+    scoring. Scanning stops once stop_after keyframes score at or above
+    nsfw_threshold (0 disables early stopping).
+    """
+    def __init__(self, score_batch: Callable[[List[bytes]], Awaitable[List[float]]],
+                 batch_size: int = 16, nsfw_threshold: float = 0.7, stop_after: int = 3,
+                 frame_stride: int = 2, max_frames: Optional[int] = None,
+                 detector_factory: Callable[[], SceneChangeDetector] = SceneChangeDetector,
+                 frame_source: Callable[..., Iterator[Tuple[int, np.ndarray]]] = iter_video_frames,
+                 encode: Callable[[np.ndarray], bytes] = encode_frame):
+        self.score_batch = score_batch
+        self.batch_size = max(1, batch_size)
+        self.nsfw_threshold = nsfw_threshold
+        self.stop_after = stop_after
+        self.frame_stride = frame_stride
+        self.max_frames = max_frames
+        self.detector_factory = detector_factory
+        self.frame_source = frame_source
+        self.encode = encode
+
+    def _next_batch(self, frames: Iterator[Tuple[int, np.ndarray]], detector: SceneChangeDetector,
+                    state: Dict[str, int]) -> Tuple[List[int], List[bytes]]:
+        indices, encoded = [], []
+        for index, frame in frames:
+            state['decoded'] += 1
+            state['last_index'] = index
+            if detector.is_keyframe(index, frame):
+                indices.append(index)
+                encoded.append(self.encode(frame))
+                if len(indices) >= self.batch_size:
+                    break
+        return indices, encoded
+
+    async def scan(self, video_path: str, fps: float = 0.0) -> Dict[str, Any]:
+        """
+        Returns per-segment scores (a segment runs from one keyframe to the
+        next) plus frames decoded versus scored.
+        """
+        loop = asyncio.get_running_loop()
+        frames = self.frame_source(video_path, stride=self.frame_stride, max_frames=self.max_frames)
+        detector = self.detector_factory()
+        state = {'decoded': 0, 'last_index': -1}
+
+        keyframes: List[Tuple[int, float]] = []
+        flagged = 0
+        stopped_early = False
+        pending = loop.run_in_executor(None, self._next_batch, frames, detector, state)
+        try:
+            while True:
+                indices, encoded = await pending
+                if not indices:
+                    break
+                pending = loop.run_in_executor(None, self._next_batch, frames, detector, state)
+
+                scores = await self.score_batch(encoded)
+                for index, score in zip(indices, scores):
+                    keyframes.append((index, float(score)))
+                    flagged += score >= self.nsfw_threshold
+                if self.stop_after and flagged >= self.stop_after:
+                    stopped_early = True
+                    break
+        finally:
+            if not pending.done():
+                await asyncio.wait([pending])
+            frames.close()
+
+        # After an early stop the prefetched batch has read past the last
+        # scored keyframe; report only the range that was actually scored
+        last_index = keyframes[-1][0] if stopped_early else state['last_index']
+        return self._summarize(keyframes, last_index, state['decoded'], fps, flagged, stopped_early)
+
+    def _summarize(self, keyframes: List[Tuple[int, float]], last_index: int, decoded: int, fps: float,
+                   flagged: int, stopped_early: bool) -> Dict[str, Any]:
+        segments = []
+        for i, (start, score) in enumerate(keyframes):
+            end = keyframes[i + 1][0] - 1 if i + 1 < len(keyframes) else last_index
+            segment = {'start_frame': start, 'end_frame': end, 'score': score}
+            if fps > 0:
+                segment['start_s'] = round(start / fps, 3)
+                segment['end_s'] = round((end + 1) / fps, 3)
+            segments.append(segment)
+
+        max_score = max((score for _, score in keyframes), default=0.0)
+        return {
+            'segments': segments,
+            'frames_read': last_index + 1,
+            'frames_decoded': decoded,
+            'frames_scored': len(keyframes),
+            'frames_flagged': flagged,
+            'max_score': max_score,
+            'is_nsfw': max_score >= self.nsfw_threshold,
+            'stopped_early': stopped_early,
+            'fps': fps
+        }
@@ -0,0 +1,158 @@
+"""
+Background model loading and warmup.
+Models are loaded after the server starts accepting connections, each one is
+exercised with a dummy inference, and per-model readiness is tracked so the
+API can report it and refuse ML work until the models are warm.
+"""
+import asyncio
+import io
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+from services.ml_config import MLRuntimeConfig
+
+logger = logging.getLogger("ModelWarmup")
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+def _dummy_image() -> bytes:
+    buf = io.BytesIO()
+    Image.new('RGB', (64, 64), color=(128, 128, 128)).save(buf, format='JPEG')
+    return buf.getvalue()
+
+
+def load_and_probe(kind: str) -> Dict[str, Any]:
+    """
+    Loads one model and runs a dummy inference through it.
+    Module-level so it can run on a thread or in an inference worker process;
+    the model's version is returned so the caller learns it even when the
+    model lives in another process.
+    """
+    from services.ml_core_real import ModelFactory
+
+    model = ModelFactory.get_model(kind)
+    start = time.perf_counter()
+    if kind == 'vision':
+        model.predict_batch([_dummy_image()])
+    else:
+        model.predict_batch(["warmup"])
+    return {
+        'probe_ms': (time.perf_counter() - start) * 1000,
+        'version': getattr(model, 'version', None)
+    }
+
+
+class ModelWarmup:
+    """
+    Tracks load state per model and loads each one at most once.
+    A failed load is retried by retry_failed(), with exponential backoff
+    between attempts, so a transient failure at startup does not leave the
+    model unavailable until the process restarts.
+    """
+    def __init__(self, executor, kinds=('text', 'vision'),
+                 retry_backoff_s: Optional[float] = None, retry_backoff_max_s: Optional[float] = None):
+        config = MLRuntimeConfig()
+        self.executor = executor
+        self.retry_backoff_s = config.warmup_retry_backoff_s if retry_backoff_s is None else retry_backoff_s
+        self.retry_backoff_max_s = (
+            config.warmup_retry_backoff_max_s if retry_backoff_max_s is None else retry_backoff_max_s
+        )
+        self.models: Dict[str, Dict[str, Any]] = {
+            kind: {'state': PENDING, 'load_time_s': None, 'probe_ms': None, 'version': None,
+                   'error': None, 'failures': 0}
+            for kind in kinds
+        }
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._retry_at: Dict[str, float] = {}
+
+    async def _load(self, kind: str):
+        status = self.models[kind]
+        status['state'] = LOADING
+        status['error'] = None
+        start = time.perf_counter()
+        logger.info(f"Warming up {kind} model...")
+
+        try:
+            probe = await self.executor.run(
+                load_and_probe, kind, timeout=MLRuntimeConfig().model_load_timeout_s
+            )
+            status['probe_ms'] = probe['probe_ms']
+            status['version'] = probe['version']
+            status['load_time_s'] = time.perf_counter() - start
+            status['state'] = READY
+            status['failures'] = 0
+            logger.info(f"[OK] {kind} model warm in {status['load_time_s']:.1f}s")
+        except Exception as e:
+            status['load_time_s'] = time.perf_counter() - start
+            status['state'] = FAILED
+            status['error'] = str(e)
+            status['failures'] += 1
+            backoff = min(self.retry_backoff_max_s, self.retry_backoff_s * 2 ** (status['failures'] - 1))
+            self._retry_at[kind] = time.monotonic() + backoff
+            logger.error(f"{kind} model warmup failed: {e} (retry in {backoff:.0f}s)")
+            raise
+
+    async def ensure(self, kind: str):
+        """
+        Returns once the model is ready, starting or joining its load if needed.
+        While a failed model is backing off, raises the error of its last load.
+        """
+        if self.models[kind]['state'] == READY:
+            return
+        task = self._tasks.get(kind)
+        if task is None or (task.done() and self.models[kind]['state'] == FAILED
+                            and time.monotonic() >= self._retry_at.get(kind, 0.0)):
+            task = asyncio.get_running_loop().create_task(self._load(kind))
+            self._tasks[kind] = task
+        await asyncio.shield(task)
+
+    async def warm_all(self):
+        for kind in self.models:
+            try:
+                await self.ensure(kind)
+            except Exception:
+                pass
+
+    def retry_failed(self, *kinds: str):
+        """
+        Starts a background reload of each failed model whose backoff has
+        elapsed, without waiting for it. Called on the request path, so
+        it must stay cheap when every model is ready.
+        """
+        now = time.monotonic()
+        for kind in kinds or tuple(self.models):
+            if self.models[kind]['state'] != FAILED or now < self._retry_at.get(kind, 0.0):
+                continue
+            task = self._tasks.get(kind)
+            if task is not None and not task.done():
+                continue
+            logger.info(f"Retrying {kind} model load (attempt {self.models[kind]['failures'] + 1})")
+            task = asyncio.get_running_loop().create_task(self._load(kind))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._tasks[kind] = task
+
+    def start(self) -> Optional[asyncio.Task]:
+        """
+        Schedules warm_all on the running loop without waiting for it.
+        """
+        return asyncio.get_running_loop().create_task(self.warm_all())
+
+    def is_ready(self, *kinds: str) -> bool:
+        kinds = kinds or tuple(self.models)
+        return all(self.models[kind]['state'] == READY for kind in kinds)
+
+    def model_version(self, kind: str) -> Optional[str]:
+        """
+        Version reported by the last successful load of the model, if any.
+        """
+        return self.models[kind]['version']
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        return {kind: dict(status) for kind, status in self.models.items()}
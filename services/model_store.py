@@ -0,0 +1,201 @@
+"""
+Local, versioned model artifact store.
+Each model is saved as a HuggingFace directory with safetensors weights, and a
+manifest records the source model id, the resolved hub revision and a sha256
+for every file. Models are then loaded from disk without touching the hub.
+
+Layout:
+    <root>/manifest.json
+    <root>/<kind>/config.json, model.safetensors, tokenizer/processor files
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.ml_config import MLRuntimeConfig
+
+logger = logging.getLogger("ModelStore")
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+CHUNK_SIZE = 1024 * 1024
+
+# kind -> (transformers task, model class, preprocessor class)
+MODEL_KINDS = {
+    'vision': ('image-classification', 'AutoModelForImageClassification', 'AutoImageProcessor'),
+    'text': ('text-classification', 'AutoModelForSequenceClassification', 'AutoTokenizer'),
+}
+
+
+class ModelStoreError(Exception):
+    """Raised when the store is missing a model or fails verification."""
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def directory_checksums(path: str) -> Dict[str, str]:
+    checksums = {}
+    for dirpath, _, filenames in os.walk(path):
+        for filename in sorted(filenames):
+            full = os.path.join(dirpath, filename)
+            checksums[os.path.relpath(full, path).replace(os.sep, '/')] = file_sha256(full)
+    return dict(sorted(checksums.items()))
+
+
+class ModelStore:
+    """
+    Reads and writes the on-disk model store.
+    """
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.abspath(root or MLRuntimeConfig().model_store_dir)
+        self.manifest_path = os.path.join(self.root, MANIFEST_NAME)
+
+    def load_manifest(self) -> Dict[str, Any]:
+        if not os.path.exists(self.manifest_path):
+            return {'format': MANIFEST_FORMAT, 'models': {}}
+        with open(self.manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != MANIFEST_FORMAT:
+            raise ModelStoreError(
+                f"Unsupported manifest format {manifest.get('format')} in {self.manifest_path}"
+            )
+        return manifest
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def entry(self, kind: str) -> Optional[Dict[str, Any]]:
+        return self.load_manifest()['models'].get(kind)
+
+    def model_dir(self, kind: str) -> str:
+        return os.path.join(self.root, kind)
+
+    def resolve(self, kind: str, model_id: str) -> Optional[str]:
+        """
+        Returns the local directory for a model if the store holds that model id.
+        """
+        entry = self.entry(kind)
+        if entry is None or entry['model_id'] != model_id:
+            return None
+        path = self.model_dir(kind)
+        return path if os.path.isdir(path) else None
+
+    def populate(self, kind: str, model_id: str, revision: str = "main") -> Dict[str, Any]:
+        """
+        Downloads a model from the hub, re-saves it with safetensors weights
+        and records it in the manifest. The previous copy is replaced only
+        once the new one has been written completely.
+        """
+        import transformers
+
+        task, model_cls, processor_cls = MODEL_KINDS[kind]
+        model = getattr(transformers, model_cls).from_pretrained(model_id, revision=revision)
+        processor = getattr(transformers, processor_cls).from_pretrained(model_id, revision=revision)
+
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{kind}-", dir=self.root)
+        try:
+            model.save_pretrained(staging, safe_serialization=True)
+            processor.save_pretrained(staging)
+            files = directory_checksums(staging)
+
+            target = self.model_dir(kind)
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            os.replace(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        entry = {
+            'model_id': model_id,
+            'revision': getattr(model.config, '_commit_hash', None) or revision,
+            'task': task,
+            'files': files,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        }
+        manifest = self.load_manifest()
+        manifest['models'][kind] = entry
+        self._write_manifest(manifest)
+        logger.info(f"[OK] Stored {kind} model {model_id}@{entry['revision']} in {target}")
+        return entry
+
+    def verify(self, kind: Optional[str] = None) -> List[str]:
+        """
+        Checks stored files against the manifest. Returns a list of problems;
+        an empty list means the store is intact.
+        """
+        models = self.load_manifest()['models']
+        kinds = [kind] if kind else sorted(models)
+        problems = []
+
+        for name in kinds:
+            entry = models.get(name)
+            if entry is None:
+                problems.append(f"{name}: not in manifest")
+                continue
+
+            path = self.model_dir(name)
+            if not os.path.isdir(path):
+                problems.append(f"{name}: directory {path} missing")
+                continue
+
+            expected = entry['files']
+            actual = directory_checksums(path)
+            for filename, checksum in expected.items():
+                if filename not in actual:
+                    problems.append(f"{name}: missing file {filename}")
+                elif actual[filename] != checksum:
+                    problems.append(f"{name}: checksum mismatch for {filename}")
+            for filename in actual.keys() - expected.keys():
+                problems.append(f"{name}: unexpected file {filename}")
+            if not any(f.endswith('.safetensors') for f in expected):
+                problems.append(f"{name}: no safetensors weights")
+
+        return problems
+
+
+def resolve_model_source(kind: str, model_id: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Picks where a classifier loads its weights from.
+
+    Returns the store directory and offline loading kwargs when the store
+    holds the model. Otherwise falls back to the hub id, unless
+    ML_MODEL_STORE_REQUIRED is set, in which case a missing or corrupt
+    store entry is an error.
+    """
+    config = MLRuntimeConfig()
+    store = ModelStore()
+    path = store.resolve(kind, model_id)
+
+    if path is not None and config.model_store_verify:
+        problems = store.verify(kind)
+        if problems:
+            raise ModelStoreError(f"Model store verification failed: {'; '.join(problems)}")
+
+    if path is not None:
+        return path, {'local_files_only': True, 'use_safetensors': True}
+
+    if config.model_store_required:
+        raise ModelStoreError(
+            f"{kind} model {model_id} not found in {store.root}. "
+            f"Run: python manage_model_store.py populate"
+        )
+
+    logger.warning(f"{kind} model {model_id} not in model store, loading from the HuggingFace hub")
+    return model_id, {}
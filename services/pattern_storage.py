@@ -98,6 +98,34 @@ class PatternStorage:
             
             return event.id
     
+    async def store_events(self, events: List[Dict[str, Any]]) -> List[int]:
+        """
+        Stores several events in one transaction and refreshes each affected
+        device's behavioral profile once. Each dict takes the same fields as
+        store_event. Returns the new event ids in input order.
+        """
+        if not events:
+            return []
+
+        async with async_session() as session:
+            rows = [PatternEvent(
+                device_id=event['device_id'],
+                event_type=event['event_type'],
+                confidence=event['confidence'],
+                threat_level=event['threat_level'],
+                threat_score=event['threat_score'],
+                context=event['context']
+            ) for event in events]
+            session.add_all(rows)
+            await session.flush()
+            event_ids = [row.id for row in rows]
+            await session.commit()
+
+        for device_id in dict.fromkeys(event['device_id'] for event in events):
+            await self._update_behavioral_profile(device_id)
+
+        return event_ids
+    
     async def get_events(self, device_id: str, hours: int = 24) -> List[Dict]:
         async with async_session() as session:
             cutoff = datetime.utcnow() - timedelta(hours=hours)
@@ -0,0 +1,167 @@
+"""
+Batch endpoint tests
+Tests per-item results, partial failures and batch limits of the /api/ml/*/batch endpoints
+"""
+import base64
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.ml_config import MLRuntimeConfig
+from services.ml_executor import InferenceTimeout
+
+client = TestClient(main.app)
+
+
+class StubMLService:
+    """Scores items from their content; items containing 'fail' raise"""
+
+    def __init__(self):
+        self.calls = []
+
+    def is_ready(self, *kinds):
+        return True
+
+    def retry_failed_models(self, *kinds):
+        pass
+
+    async def detect_nsfw_batch(self, images):
+        self.calls.append(('nsfw', len(images)))
+        return [InferenceTimeout("slow") if b"fail" in image else len(image) / 100 for image in images]
+
+    async def classify_text_batch(self, texts):
+        self.calls.append(('text', len(texts)))
+        return [
+            RuntimeError("model error") if "fail" in text
+            else {'is_harmful': "bad" in text, 'confidence': 0.9 if "bad" in text else 0.1,
+                  'classification': 'toxic' if "bad" in text else 'safe'}
+            for text in texts
+        ]
+
+    async def analyze_url_batch(self, urls):
+        self.calls.append(('url', len(urls)))
+        return [ValueError("unparseable") if "fail" in url else 0.95 if "porn" in url else 0.0 for url in urls]
+
+
+class StubPatternStorage:
+    def __init__(self):
+        self.events = []
+
+    async def store_events(self, events):
+        self.events.extend(events)
+        return list(range(len(events)))
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    async def allow(api_key):
+        return api_key
+
+    service, storage = StubMLService(), StubPatternStorage()
+    monkeypatch.setattr(main, 'verify_api_key', allow)
+    monkeypatch.setattr(main, 'ml_service', service)
+    monkeypatch.setattr(main, 'pattern_storage', storage)
+    return service, storage
+
+
+def b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+class TestBatchEndpoints:
+    """Test batch scanning through the API"""
+
+    def test_nsfw_partial_failures_keep_index_order(self, stubs):
+        service, storage = stubs
+        response = client.post("/api/ml/nsfw-check/batch", headers={"X-API-Key": "k"}, json={"items": [
+            {"image_base64": b64(b"x" * 75), "device_id": "d1"},
+            {"image_base64": "abc"},
+            {"image_base64": b64(b"fail")},
+            {"image_base64": b64(b"y" * 10)}
+        ]})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert [r["index"] for r in body["results"]] == [0, 1, 2, 3]
+        assert [r["ok"] for r in body["results"]] == [True, False, False, True]
+        assert body["succeeded"] == 2 and body["failed"] == 2
+        assert body["results"][0]["is_nsfw"] is True and body["results"][3]["is_nsfw"] is False
+        assert "Invalid base64" in body["results"][1]["error"] and not body["results"][1]["retryable"]
+        assert body["results"][2]["retryable"] is True
+        assert service.calls == [('nsfw', 3)]
+        assert [e['device_id'] for e in storage.events] == ['d1']
+
+    def test_text_batch_reports_oversized_and_failed_items(self, stubs, monkeypatch):
+        service, storage = stubs
+        monkeypatch.setattr(main.security_config, 'max_text_length', 20)
+        response = client.post("/api/ml/classify-text/batch", headers={"X-API-Key": "k"}, json={"items": [
+            {"text": "bad words", "device_id": "d2"},
+            {"text": "z" * 21},
+            {"text": "please fail"},
+            {"text": "hello"}
+        ]})
+
+        body = response.json()
+        assert [r["ok"] for r in body["results"]] == [True, False, False, True]
+        assert body["results"][0]["classification"] == 'toxic'
+        assert "exceeds limit" in body["results"][1]["error"]
+        assert body["results"][2]["error"] == "model error"
+        assert service.calls == [('text', 3)]
+        assert storage.events[0]['threat_level'] == 3
+
+    def test_url_batch(self, stubs):
+        response = client.post("/api/ml/threat-url/batch", headers={"X-API-Key": "k"}, json={"items": [
+            {"url": "https://fail.example"},
+            {"url": "https://pornhub.com/x"},
+            {"url": "https://example.org"}
+        ]})
+
+        body = response.json()
+        assert [r["ok"] for r in body["results"]] == [False, True, True]
+        assert body["results"][1]["is_blocked"] is True and body["results"][2]["is_blocked"] is False
+        assert body["results"][0]["error"] == "unparseable"
+
+    def test_oversized_batch_rejected(self, stubs, monkeypatch):
+        service, _ = stubs
+        monkeypatch.setattr(MLRuntimeConfig(), 'batch_max_items', 2)
+        response = client.post("/api/ml/threat-url/batch", headers={"X-API-Key": "k"},
+                               json={"items": [{"url": f"https://site{i}.com"} for i in range(3)]})
+
+        assert response.status_code == 413
+        assert service.calls == []
+
+    def test_storage_failure_keeps_scores(self, stubs, monkeypatch):
+        async def broken(events):
+            raise RuntimeError("database is locked")
+
+        _, storage = stubs
+        monkeypatch.setattr(storage, 'store_events', broken)
+        response = client.post("/api/ml/classify-text/batch", headers={"X-API-Key": "k"}, json={"items": [
+            {"text": "bad words", "device_id": "d2"},
+            {"text": "hello"}
+        ]})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["events_stored"] is False
+        assert [r["ok"] for r in body["results"]] == [True, True]
+
+    def test_alert_failure_is_best_effort(self, stubs, monkeypatch):
+        alerted = []
+
+        async def flaky_alert(score, device_id, parent_email):
+            alerted.append(device_id)
+            if device_id == 'd1':
+                raise RuntimeError("smtp down")
+
+        _, storage = stubs
+        monkeypatch.setattr(main, 'send_nsfw_alert', flaky_alert)
+        response = client.post("/api/ml/nsfw-check/batch", headers={"X-API-Key": "k"}, json={"items": [
+            {"image_base64": b64(b"x" * 90), "device_id": "d1"},
+            {"image_base64": b64(b"y" * 90), "device_id": "d2"}
+        ]})
+
+        assert response.status_code == 200
+        assert response.json()["events_stored"] is True
+        assert alerted == ['d1', 'd2']
+        assert len(storage.events) == 2
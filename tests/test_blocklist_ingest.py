@@ -0,0 +1,159 @@
+"""
+Blocklist ingestion tests
+Tests streamed index builds, versioned delta files and atomic swaps
+"""
+import asyncio
+import pytest
+from services.blocklist_ingest import (
+    BlocklistDelta, BlocklistIngestor, DeltaVersionError, DomainIndexBuilder, add_database_rows, apply_delta
+)
+from services.ml_data import DomainDatabase
+
+
+def write_delta(path, version, base, lines):
+    path.write_text(f"#version {version}\n#base {base}\n" + "\n".join(lines) + "\n")
+    return str(path)
+
+
+class TestDomainIndexBuilder:
+    """Test building an index from streamed sources"""
+
+    def test_streams_sources_first_one_wins(self):
+        builder = DomainIndexBuilder(chunk_size=3)
+        assert builder.add((f"site{i}.com" for i in range(10)), "adult") == 10
+        builder.add(["site1.com", "casino.net"], "gambling")
+
+        bloom, index = builder.build(min_capacity=100)
+        assert len(index) == 11 and builder.count == 12
+        assert index.get("site1.com") == "adult"
+        assert index.match("www.casino.net", bloom) == {'rule': 'casino.net', 'category': 'gambling'}
+
+
+class TestDatabaseRows:
+    """Test streaming GlobalBlocklist-style rows"""
+
+    @pytest.mark.asyncio
+    async def test_rows_are_batched_per_category(self):
+        async def rows():
+            for i in range(5):
+                yield f"bet{i}.com", "gambling"
+            yield "plain.com", None
+
+        builder = DomainIndexBuilder(chunk_size=2)
+        assert await add_database_rows(builder, rows()) == 6
+        bloom, index = builder.build(min_capacity=100)
+        assert index.get("bet4.com") == "gambling" and index.get("plain.com") == "adult"
+
+
+class TestBlocklistDelta:
+    """Test the delta file format"""
+
+    def test_load(self, tmp_path):
+        path = write_delta(tmp_path / "0002.delta", "2", "1",
+                           ["+new.com", "+bet.com gambling", "-old.com", "# comment", ""])
+        delta = BlocklistDelta.load(path)
+        assert (delta.version, delta.base, delta.size) == ("2", "1", 3)
+        assert delta.adds == {'adult': ['new.com'], 'gambling': ['bet.com']}
+        assert delta.removes == ['old.com']
+
+    def test_malformed_line_is_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            BlocklistDelta.load(write_delta(tmp_path / "bad.delta", "2", "1", ["new.com"]))
+        (tmp_path / "nohdr.delta").write_text("+new.com\n")
+        with pytest.raises(ValueError):
+            BlocklistDelta.load(str(tmp_path / "nohdr.delta"))
+
+    def test_apply_leaves_inputs_untouched(self):
+        db = DomainDatabase(populate=False, capacity=100)
+        db.add_many(["old.com", "kept.com"])
+        delta = BlocklistDelta(version="2", base="", adds={'gambling': ['bet.com']}, removes=['old.com'])
+
+        bloom, index = apply_delta(db.filter, db.index, delta)
+        assert index.get("bet.com") == "gambling" and "old.com" not in index and "kept.com" in index
+        assert "old.com" in db.index and "bet.com" not in db.index
+        assert not db.filter.check("bet.com") and bloom.check("bet.com")
+
+
+class TestBlocklistIngestor:
+    """Test delta chains and rebuilds against a live database"""
+
+    @pytest.mark.asyncio
+    async def test_apply_pending_follows_the_version_chain(self, tmp_path):
+        db = DomainDatabase(populate=False, capacity=100)
+        db.add_many(["old.com"])
+        write_delta(tmp_path / "b.delta", "v2", "v1", ["+second.com"])
+        write_delta(tmp_path / "a.delta", "v1", "", ["+first.com", "-old.com"])
+        write_delta(tmp_path / "c.delta", "x2", "x1", ["+other.com"])
+        ingestor = BlocklistIngestor(db, delta_dir=str(tmp_path))
+
+        previous = db.state
+        assert await ingestor.apply_pending() == 2
+        assert db.version == "v2"
+        assert db.is_blocked("cdn.second.com") and db.is_blocked("first.com")
+        assert not db.is_blocked("old.com") and not db.is_blocked("other.com")
+        assert previous[1].get("old.com") == "adult"
+        assert await ingestor.apply_pending() == 0
+        assert ingestor.get_stats()['deltas_applied'] == 2
+
+    @pytest.mark.asyncio
+    async def test_delta_for_another_version_is_rejected(self, tmp_path):
+        db = DomainDatabase(populate=False, capacity=100)
+        ingestor = BlocklistIngestor(db)
+        with pytest.raises(DeltaVersionError):
+            await ingestor.apply_delta_file(write_delta(tmp_path / "x.delta", "9", "8", ["+new.com"]))
+        assert db.version == "" and not db.is_blocked("new.com")
+
+    @pytest.mark.asyncio
+    async def test_rebuild_from_list_files(self, tmp_path):
+        hosts = tmp_path / "hosts.txt"
+        hosts.write_text("0.0.0.0 ads.example.com\nexample-blocked.net\n")
+        db = DomainDatabase(populate=False, capacity=100)
+        ingestor = BlocklistIngestor(db, lists=[str(hosts)])
+
+        stats = await ingestor.rebuild(include_database=False, version="5")
+        assert db.version == "5" and stats['rules'] == len(db.index)
+        assert db.is_blocked("x.example-blocked.net") and db.is_blocked("fr.pornhub.com")
+
+    @pytest.mark.asyncio
+    async def test_rebuild_is_shared_through_the_snapshot(self, tmp_path):
+        hosts = tmp_path / "hosts.txt"
+        hosts.write_text("rebuilt.net\n")
+        snapshot = str(tmp_path / "blocklist.bloom")
+        worker_a = DomainDatabase(populate=False, capacity=100)
+        worker_b = DomainDatabase(populate=False, capacity=100)
+        ingestor_a = BlocklistIngestor(worker_a, lists=[str(hosts)], delta_dir=str(tmp_path), snapshot_path=snapshot)
+        ingestor_b = BlocklistIngestor(worker_b, delta_dir=str(tmp_path), snapshot_path=snapshot)
+
+        await ingestor_a.rebuild(include_database=False, version="r1")
+        assert not await ingestor_a.reload_snapshot()
+        assert DomainDatabase(snapshot, populate=False).is_blocked("cdn.rebuilt.net")
+
+        write_delta(tmp_path / "0002.delta", "r2", "r1", ["+after.org"])
+        assert await ingestor_b.reload_snapshot()
+        assert not await ingestor_b.reload_snapshot()
+        assert await ingestor_b.apply_pending() == 1
+        assert worker_b.version == "r2"
+        assert worker_b.is_blocked("www.rebuilt.net") and worker_b.is_blocked("after.org")
+
+    @pytest.mark.asyncio
+    async def test_malformed_delta_is_rejected_once(self, tmp_path):
+        db = DomainDatabase(populate=False, capacity=100)
+        write_delta(tmp_path / "a.delta", "v1", "", ["not-a-delta-line"])
+        write_delta(tmp_path / "b.delta", "v1", "", ["+good.com"])
+        ingestor = BlocklistIngestor(db, delta_dir=str(tmp_path))
+
+        assert await ingestor.apply_pending() == 1
+        assert db.version == "v1" and db.is_blocked("good.com")
+        assert (tmp_path / "a.delta.rejected").exists() and not (tmp_path / "a.delta").exists()
+        assert ingestor.get_stats()['rejected_deltas'] == ["a.delta"]
+        assert await ingestor.apply_pending() == 0
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_the_poller(self, tmp_path):
+        ingestor = BlocklistIngestor(DomainDatabase(populate=False, capacity=100), delta_dir=str(tmp_path))
+        task = ingestor.start(0.01)
+        await asyncio.sleep(0.03)
+
+        ingestor.stop()
+        await asyncio.sleep(0)
+        assert task.cancelled()
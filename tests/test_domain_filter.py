@@ -0,0 +1,128 @@
+"""
+Domain filter tests
+Tests Bloom filter membership, bulk APIs, false positive rate, suffix rules and snapshots
+"""
+import pytest
+from services.blocklist_sources import iter_domain_file, normalize_domain
+from services.ml_data import (
+    BLOOM_HEADER_SIZE, BloomFilter, BloomSnapshotError, DomainDatabase, DomainSuffixIndex
+)
+
+
+class TestBloomFilter:
+    """Test single-digest double hashing and bulk operations"""
+
+    def test_scalar_and_bulk_set_the_same_bits(self):
+        domains = [f"site{i}.com" for i in range(2000)]
+        scalar = BloomFilter(2000, 0.01)
+        bulk = BloomFilter(2000, 0.01)
+        for d in domains:
+            scalar.add(d)
+        bulk.add_many(domains)
+
+        assert scalar.bit_array == bulk.bit_array
+        assert bulk.check_many(domains).all()
+        assert all(bulk.check(d) for d in domains)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(5000, 0.01)
+        bloom.add_many([f"blocked{i}.com" for i in range(5000)])
+
+        probes = [f"other{i}.org" for i in range(20000)]
+        hits = bloom.check_many(probes)
+        assert hits.mean() < 0.02
+        assert list(hits) == [bloom.check(p) for p in probes]
+        assert bloom.check_many([]).shape == (0,)
+
+    def test_domain_database_blocks_listed_domains(self):
+        db = DomainDatabase()
+        assert db.is_blocked("pornhub.com")
+        assert db.is_blocked("cdn.xvideos.com")
+        assert db.is_blocked("fr.pornhub.com")
+        assert not db.is_blocked("wikipedia.org")
+        assert not db.is_blocked("notpornhub.com")
+
+
+class TestDomainSuffixIndex:
+    """Test parent-domain rule matching"""
+
+    def test_match_walks_parent_domains(self):
+        index = DomainSuffixIndex()
+        index.add("example.com", "gambling")
+        index.add("ads.example.com", "ads")
+        index.add("xxx", "adult")
+
+        assert index.match("a.b.example.com") == {'rule': 'example.com', 'category': 'gambling'}
+        assert index.match("x.ads.example.com")['category'] == "ads"
+        assert index.match("anything.xxx")['rule'] == "xxx"
+        assert index.match("example.org") is None
+        assert index.match("badexample.com") is None
+
+        index.discard("example.com")
+        assert index.match("a.b.example.com") is None
+        assert index.nbytes == 2 * 9
+
+        restored = DomainSuffixIndex.from_bytes(index.to_bytes())
+        assert restored.get("ads.example.com") == "ads" and "example.com" not in restored
+        restored.add("example.com", "adult")
+        assert restored.match("www.example.com")['category'] == "adult"
+
+    def test_bloom_false_positives_are_not_blocked(self):
+        db = DomainDatabase(populate=False, capacity=20, fp_rate=0.3)
+        db.add_many([f"blocked{i}.com" for i in range(20)])
+
+        false_positives = [d for d in (f"benign{i}.org" for i in range(2000)) if db.filter.check(d)]
+        assert false_positives
+        assert not any(db.is_blocked(d) for d in false_positives)
+        assert db.match("cdn.blocked7.com") == {'rule': 'blocked7.com', 'category': 'adult'}
+
+
+class TestBloomSnapshot:
+    """Test the memory-mapped on-disk format"""
+
+    def test_roundtrip(self, tmp_path):
+        domains = [f"site{i}.com" for i in range(3000)]
+        bloom = BloomFilter(3000, 0.01)
+        bloom.add_many(domains)
+        path = str(tmp_path / "blocklist.bloom")
+        bloom.save(path, version="1.2.3")
+
+        loaded = BloomFilter.load(path)
+        assert (loaded.size, loaded.hash_count, loaded.version) == (bloom.size, bloom.hash_count, "1.2.3")
+        assert bytes(loaded.bit_array) == bytes(bloom.bit_array)
+        assert loaded.check("site42.com") and loaded.check_many(domains).all()
+        with pytest.raises(TypeError):
+            loaded.add_many(["new.com"])
+
+    def test_corrupt_snapshot_is_rejected(self, tmp_path):
+        bloom = BloomFilter(1000, 0.01)
+        bloom.add("pornhub.com")
+        path = tmp_path / "blocklist.bloom"
+        bloom.save(str(path))
+        data = bytearray(path.read_bytes())
+        data[BLOOM_HEADER_SIZE] ^= 0xFF
+        path.write_bytes(bytes(data))
+
+        with pytest.raises(BloomSnapshotError):
+            BloomFilter.load(str(path))
+        assert BloomFilter.load(str(path), verify=False).size == bloom.size
+        db = DomainDatabase(str(path))
+        assert db.is_blocked("pornhub.com") and db.filter.size != bloom.size
+
+    def test_domain_database_maps_snapshot(self, tmp_path):
+        built = DomainDatabase(populate=False, capacity=1000)
+        built.add_many(["example-blocked.net"], "gambling")
+        path = str(tmp_path / "blocklist.bloom")
+        built.save_snapshot(path, version="7")
+
+        db = DomainDatabase(path)
+        assert db.filter.version == "7"
+        assert db.match("www.example-blocked.net") == {'rule': 'example-blocked.net', 'category': 'gambling'}
+        assert not db.is_blocked("pornhub.com")
+
+    def test_domain_file_parsing(self, tmp_path):
+        path = tmp_path / "hosts.txt"
+        path.write_text("# comment\n0.0.0.0 Ads.Example.com\n127.0.0.1 localhost\n"
+                        "https://bad.example.org/path\nnot-a-domain\n\n")
+        assert list(iter_domain_file(str(path))) == ["ads.example.com", "bad.example.org"]
+        assert normalize_domain("HTTP://User@Site.COM:8080/x") == "site.com"
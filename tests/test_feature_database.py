@@ -0,0 +1,71 @@
+"""
+Feature database tests
+Tests exact and IVF similarity search and memory-mapped persistence
+"""
+import math
+import numpy as np
+from services.ml_data import FeatureDatabase
+
+
+def clustered_vectors(n=4000, dim=32, clusters=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dim))
+
+
+def make_db(vectors):
+    db = FeatureDatabase(populate=False)
+    db.add_many([f"v{i}" for i in range(len(vectors))], vectors, ["nsfw" if i % 2 else "safe" for i in range(len(vectors))])
+    return db
+
+
+class TestExactSearch:
+    """Test the vectorized brute-force search"""
+
+    def test_matches_pure_python_cosine(self):
+        db = FeatureDatabase()
+        query = [math.cos(j / 7) for j in range(128)]
+
+        expected = []
+        for fv in db.vectors:
+            dot = sum(q * v for q, v in zip(query, fv.vector))
+            norm = math.sqrt(sum(q * q for q in query)) * math.sqrt(sum(v * v for v in fv.vector))
+            expected.append((dot / (norm + 1e-10), fv.id))
+        expected.sort(reverse=True)
+
+        results = db.search(query, k=5)
+        assert [r['id'] for r in results] == [i for _, i in expected[:5]]
+        assert np.allclose([r['score'] for r in results], [score for score, _ in expected[:5]], atol=1e-4)
+
+
+class TestIVFIndex:
+    """Test approximate search and persistence"""
+
+    def test_recall_against_exact(self):
+        vectors = clustered_vectors()
+        db = make_db(vectors)
+        db.build_index(n_lists=40)
+
+        rng = np.random.default_rng(1)
+        hits = 0
+        for row in rng.choice(len(vectors), 50, replace=False):
+            query = vectors[row] + 0.05 * rng.normal(size=vectors.shape[1])
+            exact = {r['id'] for r in db.search(query, k=10, n_probe=None)}
+            approx = {r['id'] for r in db.search(query, k=10, n_probe=4)}
+            hits += len(exact & approx)
+        assert hits / 500 >= 0.9
+
+    def test_save_and_mmap_load(self, tmp_path):
+        db = make_db(clustered_vectors(n=500))
+        db.build_index(n_lists=10)
+        db.save(str(tmp_path))
+
+        loaded = FeatureDatabase.load(str(tmp_path))
+        assert isinstance(loaded.matrix, np.memmap)
+        assert len(loaded) == 500 and loaded.index.n_lists == 10
+
+        query = db.matrix[123]
+        assert loaded.search(query, k=3) == db.search(query, k=3)
+
+        loaded.add("extra", query, "safe")
+        assert len(loaded) == 501 and loaded.index is None
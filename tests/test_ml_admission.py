@@ -0,0 +1,90 @@
+"""
+ML admission control tests
+Tests priority-based load shedding, latency feedback and recovery
+"""
+import time
+import pytest
+from services.ml_admission import (
+    AdmissionController, AdmissionRejected, CRITICAL, NORMAL, LOW
+)
+from services.ml_executor import InferenceQueueFull, InferenceTimeout
+
+
+class FakeQueue:
+    def __init__(self, queued=0, capacity=10):
+        self.queued = queued
+        self.capacity = capacity
+
+    def __call__(self):
+        return self.queued, self.capacity
+
+
+class TestAdmissionController:
+    """Test admission decisions"""
+
+    def test_sheds_low_priority_first(self):
+        queue = FakeQueue()
+        controller = AdmissionController(queue_fn=queue)
+        assert controller.check(LOW)[0] is True
+
+        queue.queued = 7
+        assert controller.check(LOW)[0] is False
+        assert controller.check(NORMAL)[0] is True
+
+        queue.queued = 10
+        assert controller.check(NORMAL)[0] is False
+        assert controller.check(CRITICAL)[0] is True
+
+        stats = controller.get_stats()
+        assert stats['shed'] == {CRITICAL: 0, NORMAL: 1, LOW: 1}
+
+    def test_rejection_carries_retry_after(self):
+        controller = AdmissionController(queue_fn=FakeQueue(queued=10), retry_after_s=2)
+
+        with pytest.raises(AdmissionRejected) as exc_info:
+            with controller.admit(LOW):
+                pass
+        assert exc_info.value.retry_after == 2
+
+        with controller.admit(CRITICAL):
+            pass
+
+    def test_latency_feedback_and_decay(self):
+        controller = AdmissionController(
+            target_latency_ms=100, ewma_alpha=1.0, decay_half_life_s=0.05, queue_fn=FakeQueue()
+        )
+        controller.observe(80)
+        assert controller.check(LOW)[0] is False
+
+        time.sleep(0.15)
+        assert controller.check(LOW)[0] is True
+
+    def test_batch_latency_is_recorded_per_item(self):
+        controller = AdmissionController(target_latency_ms=100, ewma_alpha=1.0, queue_fn=FakeQueue())
+
+        with controller.admit(LOW, items=20):
+            time.sleep(0.2)
+        assert controller.latency_ms() < 20
+
+        with controller.admit(NORMAL, items=0):
+            time.sleep(0.2)
+        assert controller.latency_ms() < 20
+        assert controller.check(NORMAL)[0] is True
+
+    def test_fast_failures_do_not_lower_latency(self):
+        controller = AdmissionController(target_latency_ms=100, ewma_alpha=1.0, queue_fn=FakeQueue())
+        controller.observe(80)
+
+        with pytest.raises(InferenceQueueFull):
+            with controller.admit(NORMAL):
+                raise InferenceQueueFull("queue full")
+        with pytest.raises(ValueError):
+            with controller.admit(NORMAL):
+                raise ValueError("bad input")
+        assert controller.latency_ms() > 70
+
+        with pytest.raises(InferenceTimeout):
+            with controller.admit(NORMAL):
+                time.sleep(0.15)
+                raise InferenceTimeout("slow")
+        assert controller.latency_ms() > 140
@@ -0,0 +1,78 @@
+"""
+Micro-batching tests
+Tests that concurrent requests share forward passes and get their own results
+"""
+import pytest
+import asyncio
+from services.ml_batching import MicroBatcher
+
+
+class TestMicroBatcher:
+    """Test dynamic batching of concurrent requests"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_batch(self):
+        """Requests arriving inside the window should run as one batch"""
+        calls = []
+
+        def batch_fn(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher('test', batch_fn, max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(5)])
+
+        assert results == [0, 2, 4, 6, 8]
+        assert len(calls) == 1
+        assert batcher.get_stats()['avg_batch_size'] == 5
+
+    @pytest.mark.asyncio
+    async def test_batch_size_cap(self):
+        """Batches should never exceed max_batch_size"""
+        sizes = []
+
+        def batch_fn(items):
+            sizes.append(len(items))
+            return items
+
+        batcher = MicroBatcher('test', batch_fn, max_batch_size=4, max_wait_ms=20)
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(10)])
+
+        assert results == list(range(10))
+        assert max(sizes) <= 4
+        assert sum(sizes) == 10
+
+    @pytest.mark.asyncio
+    async def test_batch_failure_propagates(self):
+        """A failing forward pass should fail every caller in the batch"""
+        def batch_fn(items):
+            raise ValueError("boom")
+
+        batcher = MicroBatcher('test', batch_fn, max_batch_size=4, max_wait_ms=5)
+        with pytest.raises(ValueError):
+            await batcher.submit(1)
+
+    @pytest.mark.asyncio
+    async def test_batches_overlap_up_to_executor_workers(self):
+        """Batches should run concurrently, one per executor worker"""
+        class SlowExecutor:
+            max_workers = 2
+
+            def __init__(self):
+                self.running = 0
+                self.peak = 0
+
+            async def run(self, fn, items):
+                self.running += 1
+                self.peak = max(self.peak, self.running)
+                await asyncio.sleep(0.03)
+                self.running -= 1
+                return fn(items)
+
+        executor = SlowExecutor()
+        batcher = MicroBatcher('test', lambda items: items, max_batch_size=2, max_wait_ms=1, executor=executor)
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(8)])
+
+        assert results == list(range(8))
+        assert executor.peak == 2
+        assert batcher.get_stats()['batches'] == 4
@@ -0,0 +1,171 @@
+"""
+ML result cache tests
+Tests perceptual-hash matching, TTL expiry, LRU eviction and in-flight coalescing
+"""
+import asyncio
+import io
+import time
+import pytest
+from PIL import Image, ImageDraw
+from services.ml_cache import (
+    PerceptualHashCache, SingleFlight, VerdictCache, compute_dhash, hamming_distance, text_cache_key
+)
+
+
+def make_image(size=(640, 480), fmt='JPEG', quality=90, shift=0):
+    image = Image.new('RGB', size, color=(30, 60, 90))
+    draw = ImageDraw.Draw(image)
+    w, h = size
+    draw.rectangle([w // 4 + shift, h // 4, w // 2 + shift, h // 2], fill=(240, 200, 160))
+    draw.ellipse([w // 2, h // 2, w - 20, h - 20], fill=(200, 30, 30))
+    buf = io.BytesIO()
+    image.save(buf, format=fmt, quality=quality)
+    return buf.getvalue()
+
+
+class TestPerceptualHash:
+    """Test near-duplicate detection"""
+
+    def test_reencoded_thumbnail_is_near_duplicate(self):
+        """A re-encoded, downscaled copy should hash within a few bits"""
+        original = compute_dhash(make_image())
+        thumbnail = compute_dhash(make_image(size=(160, 120), quality=40))
+        assert hamming_distance(original, thumbnail) <= 4
+
+    def test_cache_returns_near_duplicate_score(self):
+        """Lookups within the Hamming tolerance should hit"""
+        cache = PerceptualHashCache(max_entries=10, max_distance=4)
+        cache.put(compute_dhash(make_image()), 0.91)
+
+        assert cache.get(compute_dhash(make_image(size=(320, 240), quality=50))) == 0.91
+        assert cache.get_stats()['hits'] == 1
+
+    def test_distant_hash_misses(self):
+        """Hashes further than the tolerance should miss"""
+        cache = PerceptualHashCache(max_entries=10, max_distance=2)
+        cache.put(0b0, 0.5)
+
+        assert cache.get(0b1111) is None
+        assert cache.get_stats()['misses'] == 1
+
+
+class TestCacheEviction:
+    """Test TTL and LRU bounds"""
+
+    def test_ttl_expiry(self):
+        cache = PerceptualHashCache(max_entries=10, ttl_seconds=0.01)
+        cache.put(42, 0.3)
+        time.sleep(0.02)
+
+        assert cache.get(42) is None
+        assert len(cache) == 0
+
+    def test_expired_closest_match_falls_back_to_live_one(self):
+        cache = PerceptualHashCache(max_entries=10, ttl_seconds=0.05, max_distance=4)
+        cache.put(0b1000, 0.2)
+        time.sleep(0.03)
+        cache.put(0b1001, 0.8)
+        time.sleep(0.03)
+
+        assert cache.get(0b1000) == 0.8
+        assert len(cache) == 1
+        assert cache.get_stats()['expirations'] == 1
+
+    def test_lru_eviction(self):
+        cache = PerceptualHashCache(max_entries=2, max_distance=0)
+        cache.put(1, 'a')
+        cache.put(2, 'b')
+        cache.get(1)
+        cache.put(4, 'c')
+
+        assert cache.get(2) is None
+        assert cache.get(1) == 'a'
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_model_version_change_invalidates(self):
+        cache = PerceptualHashCache(max_distance=0)
+        cache.ensure_version("torch:vit")
+        cache.put(7, 0.9)
+        cache.ensure_version("torch:vit")
+        assert cache.get(7) == 0.9
+
+        cache.ensure_version("onnx:model_int8.onnx:vit")
+        assert cache.get(7) is None
+        assert cache.get_stats()['invalidations'] == 1
+
+
+class TestVerdictCache:
+    """Test normalized-text verdict caching"""
+
+    def test_case_and_whitespace_folded(self):
+        assert text_cache_key("Free  Movies\nOnline") == text_cache_key("free movies online ")
+
+    def test_version_change_invalidates(self):
+        cache = VerdictCache()
+        cache.ensure_version("model-a|kw:1")
+        cache.put(text_cache_key("hello"), {'score': 0.1})
+        cache.ensure_version("model-a|kw:2")
+
+        assert cache.get(text_cache_key("hello")) is None
+        assert cache.get_stats()['invalidations'] == 1
+
+    def test_size_aware_eviction(self):
+        cache = VerdictCache(max_bytes=2000)
+        for i in range(50):
+            cache.put(text_cache_key(str(i)), 'x' * 100)
+
+        assert cache.current_bytes <= 2000
+        assert cache.get_stats()['evictions'] > 0
+        assert cache.get(text_cache_key("49")) == 'x' * 100
+
+
+class TestSingleFlight:
+    """Test coalescing of identical in-flight scans"""
+
+    @pytest.mark.asyncio
+    async def test_identical_calls_share_one_execution(self):
+        calls = []
+        coalesced = []
+        flight = SingleFlight('text', on_coalesced=coalesced.append)
+
+        async def scan(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return f"result:{key}"
+
+        results = await asyncio.gather(
+            *[flight.run('a', lambda: scan('a')) for _ in range(5)],
+            flight.run('b', lambda: scan('b'))
+        )
+
+        assert results == ['result:a'] * 5 + ['result:b']
+        assert calls == ['a', 'b']
+        assert coalesced == ['text'] * 4
+        assert len(flight) == 0
+
+        await flight.run('a', lambda: scan('a'))
+        assert calls == ['a', 'b', 'a']
+
+    @pytest.mark.asyncio
+    async def test_errors_and_cancellation(self):
+        flight = SingleFlight('url')
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("scan failed")
+
+        results = await asyncio.gather(*[flight.run('x', fail) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+        async def slow():
+            await asyncio.sleep(0.02)
+            return 1.0
+
+        leader = asyncio.ensure_future(flight.run('y', slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.run('y', slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == 1.0
+        assert flight.get_stats()['coalesced'] == 3
@@ -0,0 +1,35 @@
+"""
+ML cascade tests
+Tests early-exit decisions and escalation accounting
+"""
+from services.ml_cascade import TextCascade
+
+
+class TestTextCascade:
+    """Test the keyword-first text cascade"""
+
+    def test_strong_keyword_decides_unsafe(self):
+        cascade = TextCascade(unsafe_threshold=0.9)
+        assert cascade.decide("xxx video", 1.0, ["xxx"]) is False
+        assert cascade.decide("some borderline word", 0.6, ["borderline"]) is None
+
+    def test_safe_exits(self):
+        cascade = TextCascade(unsafe_threshold=0.9, safe_threshold=-1)
+        assert cascade.decide("👍 123 !!", 0.0, []) is True
+        assert cascade.decide("you are an idiot", 0.0, []) is None
+
+        cascade = TextCascade(unsafe_threshold=0.9, safe_threshold=0.0)
+        assert cascade.decide("see you at school", 0.0, []) is True
+
+    def test_escalation_rate(self):
+        cascade = TextCascade(unsafe_threshold=0.9)
+        cascade.decide("xxx", 1.0, ["xxx"])
+        cascade.decide("hello there", 0.0, [])
+        cascade.decide("hello again", 0.0, [])
+        cascade.decide("42", 0.0, [])
+
+        stats = cascade.get_stats()
+        assert stats['keyword_unsafe'] == 1
+        assert stats['keyword_safe'] == 1
+        assert stats['escalated'] == 2
+        assert stats['escalation_rate'] == 0.5
@@ -0,0 +1,125 @@
+"""
+Inference executor tests
+Tests that blocking model calls leave the event loop free, fail fast under overload
+and schedule interactive work ahead of background work
+"""
+import pytest
+import asyncio
+import time
+from services.ml_executor import (
+    BACKGROUND, INTERACTIVE, InferenceExecutor, InferenceQueueFull, InferenceTimeout
+)
+
+
+class TestInferenceExecutor:
+    """Test bounded, off-loop inference execution"""
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self):
+        """Other coroutines should run while a blocking call is in progress"""
+        executor = InferenceExecutor(max_workers=1, max_queue=4)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        result, _ = await asyncio.gather(
+            executor.run(lambda: time.sleep(0.1) or 42),
+            ticker()
+        )
+
+        assert result == 42
+        assert len(ticks) == 5
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_queue_full_rejected(self):
+        """Calls beyond workers + queue capacity should be rejected immediately"""
+        executor = InferenceExecutor(max_workers=1, max_queue=1)
+        slow = [asyncio.ensure_future(executor.run(time.sleep, 0.1)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(InferenceQueueFull):
+            await executor.run(time.sleep, 0.1)
+
+        await asyncio.gather(*slow)
+        assert executor.get_stats()['rejected'] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        """Slow calls should surface as InferenceTimeout"""
+        executor = InferenceExecutor(max_workers=1, max_queue=1)
+
+        with pytest.raises(InferenceTimeout):
+            await executor.run(time.sleep, 0.2, timeout=0.05)
+
+        assert executor.get_stats()['timeouts'] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timed_out_call_holds_its_slot_until_it_finishes(self):
+        """A timeout must not free capacity while the model call is still running"""
+        executor = InferenceExecutor(max_workers=1, max_queue=0)
+
+        with pytest.raises(InferenceTimeout):
+            await executor.run(time.sleep, 0.2, timeout=0.05)
+        assert executor.running == 1
+        with pytest.raises(InferenceQueueFull):
+            await executor.run(time.sleep, 0)
+
+        await asyncio.sleep(0.25)
+        assert executor.running == 0
+        assert await executor.run(lambda: 7) == 7
+        executor.shutdown()
+
+
+class TestPriorityLanes:
+    """Test interactive and background scheduling lanes"""
+
+    async def _run_in_order(self, executor, lanes):
+        order = []
+        blocker = asyncio.ensure_future(executor.run(time.sleep, 0.05))
+        await asyncio.sleep(0)
+
+        calls = []
+        for i, lane in enumerate(lanes):
+            calls.append(asyncio.ensure_future(executor.run(order.append, (lane, i), lane=lane)))
+            await asyncio.sleep(0)
+
+        await asyncio.gather(blocker, *calls)
+        return order
+
+    @pytest.mark.asyncio
+    async def test_interactive_preempts_queued_background(self):
+        executor = InferenceExecutor(max_workers=1, max_queue=8, background_share=0.0)
+        order = await self._run_in_order(executor, [BACKGROUND, BACKGROUND, INTERACTIVE, INTERACTIVE])
+
+        assert [lane for lane, _ in order] == [INTERACTIVE, INTERACTIVE, BACKGROUND, BACKGROUND]
+        assert executor.get_stats()['lanes'][BACKGROUND]['dispatched'] == 2
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_background_minimum_share(self):
+        executor = InferenceExecutor(max_workers=1, max_queue=8, background_share=0.5)
+        order = await self._run_in_order(executor, [BACKGROUND] * 3 + [INTERACTIVE] * 3)
+
+        assert [lane for lane, _ in order][:4] == [INTERACTIVE, BACKGROUND, INTERACTIVE, BACKGROUND]
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_lanes_have_separate_queue_limits(self):
+        executor = InferenceExecutor(max_workers=1, max_queue=0, max_background_queue=1)
+        blocker = asyncio.ensure_future(executor.run(time.sleep, 0.05))
+        await asyncio.sleep(0)
+
+        with pytest.raises(InferenceQueueFull):
+            await executor.run(time.sleep, 0, lane=INTERACTIVE)
+        queued = asyncio.ensure_future(executor.run(time.sleep, 0, lane=BACKGROUND))
+        await asyncio.sleep(0)
+
+        await asyncio.gather(blocker, queued)
+        assert executor.queued == 0 and executor.running == 0
+        executor.shutdown()
@@ -0,0 +1,37 @@
+"""
+ONNX backend tests
+Tests the score comparison used for torch/ONNX parity checks
+"""
+import pytest
+from services.ml_core_onnx import compare_scores
+
+
+class TestCompareScores:
+    """Test drift summaries between two backends"""
+
+    def test_identical_scores(self):
+        report = compare_scores([0.1, 0.5, 0.9], [0.1, 0.5, 0.9], tolerance=0.02)
+
+        assert report['samples'] == 3
+        assert report['max_abs_diff'] == 0.0 and report['mean_abs_diff'] == 0.0
+        assert report['over_tolerance'] == 0 and report['drift'] is False
+
+    def test_drift_over_tolerance(self):
+        reference = [0.10, 0.50, 0.90, 0.30]
+        candidate = [0.11, 0.45, 0.90, 0.40]
+        report = compare_scores(reference, candidate, tolerance=0.02)
+
+        assert report['max_abs_diff'] == pytest.approx(0.10)
+        assert report['mean_abs_diff'] == pytest.approx(0.04)
+        assert report['over_tolerance'] == 2
+        assert report['drift'] is True
+
+    def test_differences_within_tolerance_are_not_drift(self):
+        report = compare_scores([0.2, 0.8], [0.21, 0.79], tolerance=0.02)
+
+        assert report['over_tolerance'] == 0 and report['drift'] is False
+        assert report['tolerance'] == 0.02
+
+    def test_empty_inputs(self):
+        report = compare_scores([], [], tolerance=0.02)
+        assert report['samples'] == 0 and report['max_abs_diff'] == 0.0 and report['drift'] is False
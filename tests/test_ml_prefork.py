@@ -0,0 +1,33 @@
+"""
+Pre-fork memory accounting tests
+Tests /proc based per-process memory reporting
+"""
+import os
+import subprocess
+import sys
+import pytest
+from services.ml_prefork import child_pids, memory_report, read_smaps_rollup
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists('/proc/self/smaps_rollup'), reason="Requires Linux /proc smaps_rollup"
+)
+
+
+class TestMemoryReport:
+    """Test RSS vs shared page accounting"""
+
+    def test_smaps_rollup_totals(self):
+        usage = read_smaps_rollup()
+        assert usage['Rss'] > 0
+        assert usage['Shared'] + usage['Private'] == usage['Rss']
+
+    def test_report_includes_children(self):
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)'])
+        try:
+            assert child.pid in child_pids(os.getpid())
+            report = memory_report()
+            assert report['workers'] >= 1
+            assert report['total_pss_kb'] <= report['total_rss_kb']
+        finally:
+            child.kill()
+            child.wait()
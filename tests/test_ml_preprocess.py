@@ -0,0 +1,51 @@
+"""
+Image preprocessing tests
+Tests draft-mode decoding against the full-resolution path
+"""
+import io
+import numpy as np
+from types import SimpleNamespace
+from PIL import Image, ImageDraw
+from services.ml_preprocess import ImagePreprocessor
+
+
+def make_jpeg(size=(2400, 1800)):
+    image = Image.new('RGB', size, color=(40, 90, 160))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse([size[0] // 4, size[1] // 4, size[0] // 2, size[1] // 2], fill=(230, 180, 140))
+    buf = io.BytesIO()
+    image.save(buf, format='JPEG', quality=90)
+    return buf.getvalue()
+
+
+class TestImagePreprocessor:
+    """Test the fast vision preprocessing path"""
+
+    def test_batch_matches_full_decode(self):
+        preprocessor = ImagePreprocessor()
+        image_bytes = make_jpeg()
+        batch, positions, errors = preprocessor.load_batch([image_bytes])
+
+        full = Image.open(io.BytesIO(image_bytes)).convert('RGB').resize((224, 224), Image.BILINEAR)
+        reference = np.asarray(full, dtype=np.float32).transpose(2, 0, 1) / 127.5 - 1.0
+
+        assert batch.shape == (1, 3, 224, 224)
+        assert batch.dtype == np.float32
+        assert positions == [0] and errors == []
+        assert np.abs(batch[0] - reference).mean() < 0.02
+
+    def test_undecodable_images_skipped(self):
+        preprocessor = ImagePreprocessor(size=(32, 32))
+        batch, positions, errors = preprocessor.load_batch([b'not an image', make_jpeg((200, 100))])
+
+        assert positions == [1]
+        assert len(errors) == 1
+        assert batch.shape == (1, 3, 32, 32)
+
+    def test_cropping_processor_not_supported(self):
+        plain = SimpleNamespace(size={'height': 224, 'width': 224}, image_mean=[0.5] * 3,
+                                image_std=[0.5] * 3, resample=2)
+        cropping = SimpleNamespace(size={'shortest_edge': 256}, do_center_crop=True)
+
+        assert ImagePreprocessor.from_processor(plain).width == 224
+        assert ImagePreprocessor.from_processor(cropping) is None
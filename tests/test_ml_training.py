@@ -0,0 +1,41 @@
+"""
+Model training tests
+Tests baseline evaluation of training files through the background scorer
+"""
+import pytest
+from services.ml_training import ModelTrainer
+
+
+class FakeScorer:
+    def __init__(self, scores):
+        self.scores = scores
+        self.calls = []
+
+    async def __call__(self, kind, items):
+        self.calls.append((kind, len(items)))
+        return self.scores[:len(items)]
+
+
+class TestTrainFileEvaluation:
+    """Test scoring a labelled file before training"""
+
+    @pytest.mark.asyncio
+    async def test_text_file_is_scored_in_the_background(self, tmp_path):
+        path = tmp_path / "text.csv"
+        path.write_text("text,label\nhello there,0\nyou idiot,1\nnice day,0\nshut up,1\n")
+        scorer = FakeScorer([0.1, 0.9, 0.7, 0.2])
+        trainer = ModelTrainer(scorer=scorer)
+        trainer.max_eval_samples = 3
+
+        result = await trainer.train_from_file(str(path), 'text')
+
+        assert scorer.calls == [('text', 3)]
+        assert result['stats']['baseline'] == {'samples': 3, 'accuracy': 2 / 3}
+
+    @pytest.mark.asyncio
+    async def test_without_scorer_no_baseline(self, tmp_path):
+        path = tmp_path / "text.csv"
+        path.write_text("text,label\nhello,0\n")
+
+        result = await ModelTrainer().train_from_file(str(path), 'text')
+        assert result['success'] and result['stats']['baseline'] is None
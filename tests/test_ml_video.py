@@ -0,0 +1,76 @@
+"""
+Video scanning tests
+Tests scene-change keyframe selection, batched scoring and early stopping
+"""
+import pytest
+import numpy as np
+from services.ml_video import SceneChangeDetector, VideoScanner
+
+
+def solid(color, size=(72, 128)):
+    frame = np.empty(size + (3,), dtype=np.uint8)
+    frame[:] = color
+    return frame
+
+
+SCENES = [(0, 0, 0), (250, 250, 250), (0, 0, 250)]
+
+
+def three_scenes(video_path, stride=1, max_frames=None):
+    """30 frames: three 10-frame scenes of different colors"""
+    for index in range(0, 30, stride):
+        yield index, solid(SCENES[index // 10])
+
+
+class TestSceneChangeDetector:
+    """Test keyframe selection"""
+
+    def test_keyframe_per_scene(self):
+        detector = SceneChangeDetector(threshold=0.35, min_gap=2, max_gap=100)
+        keyframes = [i for i, frame in three_scenes(None) if detector.is_keyframe(i, frame)]
+        assert keyframes == [0, 10, 20]
+
+    def test_max_gap_samples_static_shots(self):
+        detector = SceneChangeDetector(min_gap=2, max_gap=8)
+        keyframes = [i for i in range(20) if detector.is_keyframe(i, solid((40, 40, 40)))]
+        assert keyframes == [0, 8, 16]
+
+
+class TestVideoScanner:
+    """Test batched keyframe scoring"""
+
+    def make_scanner(self, scores, **kwargs):
+        batches = []
+        remaining = list(scores)
+
+        async def score_batch(frames):
+            batches.append(len(frames))
+            return [remaining.pop(0) for _ in frames]
+
+        scanner = VideoScanner(
+            score_batch, frame_source=three_scenes, encode=lambda frame: frame.tobytes()[:4],
+            detector_factory=lambda: SceneChangeDetector(min_gap=2, max_gap=100), **kwargs
+        )
+        return scanner, batches
+
+    @pytest.mark.asyncio
+    async def test_segments_and_frame_counts(self):
+        scanner, batches = self.make_scanner([0.1, 0.9, 0.2], batch_size=2, frame_stride=1, stop_after=0)
+        result = await scanner.scan("video.mp4", fps=10.0)
+
+        assert batches == [2, 1]
+        assert [(s['start_frame'], s['end_frame']) for s in result['segments']] == [(0, 9), (10, 19), (20, 29)]
+        assert result['segments'][1]['start_s'] == 1.0
+        assert result['frames_decoded'] == 30 and result['frames_scored'] == 3
+        assert result['is_nsfw'] is True and result['max_score'] == 0.9
+
+    @pytest.mark.asyncio
+    async def test_stops_early_once_enough_frames_flagged(self):
+        scanner, batches = self.make_scanner([0.95, 0.2, 0.3], batch_size=1, frame_stride=1, stop_after=1)
+        result = await scanner.scan("video.mp4")
+
+        assert result['stopped_early'] is True
+        assert result['frames_scored'] == 1
+        assert batches == [1]
+        assert [(s['start_frame'], s['end_frame']) for s in result['segments']] == [(0, 0)]
+        assert result['frames_read'] == 1
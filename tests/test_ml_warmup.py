@@ -0,0 +1,103 @@
+"""
+Model warmup tests
+Tests per-model readiness tracking for background model loading
+"""
+import pytest
+import asyncio
+from services.ml_warmup import ModelWarmup, READY, FAILED, PENDING
+
+
+class FakeExecutor:
+    def __init__(self, delay=0.01, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+
+    async def run(self, fn, kind, timeout=None):
+        self.calls.append(kind)
+        await asyncio.sleep(self.delay)
+        if kind in self.fail:
+            raise RuntimeError(f"{kind} weights missing")
+        return {'probe_ms': 1.0, 'version': f"{kind}:v1"}
+
+
+class TestModelWarmup:
+    """Test background loading state"""
+
+    @pytest.mark.asyncio
+    async def test_warm_all_marks_models_ready(self):
+        warmup = ModelWarmup(FakeExecutor())
+        assert not warmup.is_ready()
+        assert warmup.get_status()['text']['state'] == PENDING
+
+        await warmup.start()
+
+        assert warmup.is_ready()
+        assert warmup.get_status()['vision']['load_time_s'] > 0
+        assert warmup.model_version('text') == "text:v1"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_load(self):
+        executor = FakeExecutor(delay=0.05)
+        warmup = ModelWarmup(executor)
+
+        await asyncio.gather(*(warmup.ensure('text') for _ in range(5)))
+
+        assert executor.calls == ['text']
+        assert warmup.is_ready('text')
+        assert not warmup.is_ready('vision')
+
+    @pytest.mark.asyncio
+    async def test_failed_model_reported_and_retried(self):
+        executor = FakeExecutor(fail={'vision'})
+        warmup = ModelWarmup(executor, retry_backoff_s=0)
+
+        await warmup.warm_all()
+
+        assert warmup.is_ready('text')
+        assert warmup.get_status()['vision']['state'] == FAILED
+        assert "weights missing" in warmup.get_status()['vision']['error']
+
+        executor.fail.clear()
+        await warmup.ensure('vision')
+        assert warmup.get_status()['vision']['state'] == READY
+
+    @pytest.mark.asyncio
+    async def test_failed_startup_load_is_retried_with_backoff(self):
+        executor = FakeExecutor(fail={'vision'})
+        warmup = ModelWarmup(executor, retry_backoff_s=0.05, retry_backoff_max_s=1)
+        await warmup.warm_all()
+        assert warmup.get_status()['vision']['failures'] == 1
+
+        warmup.retry_failed('vision')
+        assert executor.calls.count('vision') == 1
+
+        await asyncio.sleep(0.06)
+        warmup.retry_failed('vision')
+        await asyncio.sleep(0.05)
+        assert warmup.get_status()['vision']['failures'] == 2
+
+        executor.fail.clear()
+        await asyncio.sleep(0.11)
+        warmup.retry_failed('vision')
+        warmup.retry_failed('vision')
+        await asyncio.sleep(0.05)
+        assert warmup.is_ready('vision')
+        assert executor.calls.count('vision') == 3
+        assert warmup.get_status()['vision']['failures'] == 0
+
+    @pytest.mark.asyncio
+    async def test_ensure_respects_backoff(self):
+        executor = FakeExecutor(fail={'vision'})
+        warmup = ModelWarmup(executor, retry_backoff_s=0.05, retry_backoff_max_s=1)
+        await warmup.warm_all()
+
+        with pytest.raises(RuntimeError, match="weights missing"):
+            await warmup.ensure('vision')
+        assert executor.calls.count('vision') == 1
+
+        executor.fail.clear()
+        await asyncio.sleep(0.06)
+        await warmup.ensure('vision')
+        assert warmup.is_ready('vision')
+        assert executor.calls.count('vision') == 2
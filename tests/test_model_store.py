@@ -0,0 +1,59 @@
+"""
+Model store tests
+Tests manifest checksums and offline model resolution
+"""
+import json
+import os
+import pytest
+from services.ml_config import MLRuntimeConfig
+from services.model_store import (
+    ModelStore, ModelStoreError, directory_checksums, resolve_model_source
+)
+
+
+def make_store(root, model_id="org/model"):
+    model_dir = os.path.join(root, 'text')
+    os.makedirs(model_dir)
+    with open(os.path.join(model_dir, 'model.safetensors'), 'wb') as f:
+        f.write(b'weights')
+    with open(os.path.join(model_dir, 'config.json'), 'w') as f:
+        f.write('{}')
+
+    manifest = {'format': 1, 'models': {'text': {
+        'model_id': model_id, 'revision': 'abc123', 'task': 'text-classification',
+        'files': directory_checksums(model_dir), 'created_at': '2026-01-01T00:00:00Z'
+    }}}
+    with open(os.path.join(root, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+    return ModelStore(root)
+
+
+class TestModelStore:
+    """Test checksum verification and resolution"""
+
+    def test_intact_store_verifies(self, tmp_path):
+        store = make_store(str(tmp_path))
+        assert store.verify() == []
+        assert store.resolve('text', 'org/model') == os.path.join(str(tmp_path), 'text')
+        assert store.resolve('text', 'org/other') is None
+
+    def test_tampered_weights_detected(self, tmp_path):
+        store = make_store(str(tmp_path))
+        with open(os.path.join(str(tmp_path), 'text', 'model.safetensors'), 'wb') as f:
+            f.write(b'corrupt')
+
+        assert store.verify('text') == ["text: checksum mismatch for model.safetensors"]
+
+    def test_required_store_refuses_hub_fallback(self, tmp_path, monkeypatch):
+        config = MLRuntimeConfig()
+        monkeypatch.setattr(config, 'model_store_dir', str(tmp_path))
+        monkeypatch.setattr(config, 'model_store_required', True)
+
+        with pytest.raises(ModelStoreError):
+            resolve_model_source('vision', 'org/vision-model')
+
+        make_store(str(tmp_path / 'sub'))
+        monkeypatch.setattr(config, 'model_store_dir', str(tmp_path / 'sub'))
+        source, kwargs = resolve_model_source('text', 'org/model')
+        assert source.endswith('text')
+        assert kwargs['local_files_only'] is True
@@ -34,6 +34,27 @@ class TestPatternPersistence:
         assert len(events) >= 10
         assert all(e['device_id'] == device_id for e in events)
 
+    @pytest.mark.asyncio
+    async def test_bulk_store_returns_ids_in_order(self, pattern_storage):
+        """Batch writes should store every event and return ids in input order"""
+        device_id = "test_device_006"
+
+        event_ids = await pattern_storage.store_events([{
+            'device_id': device_id,
+            'event_type': 'text',
+            'confidence': score,
+            'threat_level': 3,
+            'threat_score': score,
+            'context': {'batch': True}
+        } for score in [0.1, 0.5, 0.9]])
+
+        assert len(event_ids) == 3
+        assert event_ids == sorted(event_ids)
+
+        events = await pattern_storage.get_events(device_id, hours=24)
+        stored = {e['id']: e['threat_score'] for e in events}
+        assert [stored[i] for i in event_ids] == [0.1, 0.5, 0.9]
+
 class TestTemporalAnalysis:
     """Test temporal pattern detection"""
     
@@ -0,0 +1,87 @@
+"""
+Text batching tests
+Tests length bucketing and the bucketed text predict_batch path
+"""
+from services.ml_core_real import RealTextToxicityClassifier, bucket_by_length
+
+
+class FakeTokenizer:
+    """One token per word plus [CLS] and [SEP]; records every call"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts, truncation=False, max_length=None):
+        self.calls += 1
+        ids = [[101] + [1] * len(text.split()) + [102] for text in texts]
+        if truncation:
+            ids = [seq[:max_length] for seq in ids]
+        return {'input_ids': ids}
+
+
+class FakePipeline:
+    def __init__(self):
+        self.tokenizer = FakeTokenizer()
+
+
+def make_classifier(buckets):
+    classifier = RealTextToxicityClassifier.__new__(RealTextToxicityClassifier)
+    classifier.classifier = FakePipeline()
+    classifier.length_buckets = buckets
+    classifier.max_length = buckets[-1]
+    classifier.chunking = False
+    classifier.forward_calls = []
+
+    def forward_ids(batch_ids):
+        """Scores a text by its word count and records every forward pass"""
+        classifier.forward_calls.append(batch_ids)
+        return [(len(ids) - 2) / 100 for ids in batch_ids]
+
+    classifier._forward_ids = forward_ids
+    return classifier
+
+
+def words(n):
+    return " ".join(["w"] * n)
+
+
+class TestLengthBuckets:
+    """Test grouping positions by length"""
+
+    def test_smallest_fitting_bucket(self):
+        grouped = bucket_by_length([3, 16, 17, 32, 600], (16, 32, 512))
+        assert grouped == {16: [0, 1], 32: [2, 3], 512: [4]}
+
+    def test_order_kept_within_bucket(self):
+        assert bucket_by_length([5, 1, 4, 2], (8,)) == {8: [0, 1, 2, 3]}
+
+
+class TestBucketedPredictBatch:
+    """Test the non-chunked batch path"""
+
+    def test_scores_come_back_in_input_order(self):
+        classifier = make_classifier((8, 32, 64))
+        texts = [words(3), words(40), words(5), words(20), words(1)]
+
+        assert classifier.predict_batch(texts) == [0.03, 0.40, 0.05, 0.20, 0.01]
+
+    def test_one_forward_pass_per_bucket_padded_to_bucket(self):
+        classifier = make_classifier((8, 32, 64))
+        texts = [words(3), words(40), words(5), words(20), words(1)]
+        classifier.predict_batch(texts)
+
+        calls = classifier.forward_calls
+        assert [len(batch) for batch in calls] == [3, 1, 1]
+        assert [len(ids) for ids in calls[0]] == [5, 7, 3]
+        assert [max(len(ids) for ids in batch) for batch in calls] == [7, 22, 42]
+
+    def test_texts_are_tokenized_once(self):
+        classifier = make_classifier((8, 32, 64))
+        classifier.predict_batch([words(3), words(40), words(20)])
+
+        assert classifier.classifier.tokenizer.calls == 1
+
+    def test_empty_batch(self):
+        classifier = make_classifier((8,))
+        assert classifier.predict_batch([]) == []
+        assert classifier.forward_calls == []
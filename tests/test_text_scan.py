@@ -0,0 +1,68 @@
+"""
+Text scan tests
+Tests that scan_text caches model verdicts but never model errors
+"""
+import pytest
+from services.ml_service_real import RealMLService
+
+
+class FlakyTextBatcher:
+    def __init__(self, score=0.9):
+        self.score = score
+        self.fail = True
+        self.calls = 0
+
+    async def submit(self, text):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("CUDA error: device-side assert triggered")
+        return self.score
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = RealMLService()
+
+    async def ready(kind):
+        return None
+
+    monkeypatch.setattr(service.warmup, 'ensure', ready)
+    monkeypatch.setattr(service, 'text_cache_version', lambda: "test")
+    service.text_cascade = None
+    service.text_batcher = FlakyTextBatcher()
+    return service
+
+
+class TestScanTextCaching:
+    """Test verdict caching around model errors"""
+
+    @pytest.mark.asyncio
+    async def test_model_error_is_raised_and_not_cached(self, service):
+        with pytest.raises(RuntimeError):
+            await service.scan_text("you are a terrible person")
+        assert service.text_cache.get_stats()['entries'] == 0
+
+        service.text_batcher.fail = False
+        result = await service.scan_text("you are a terrible person")
+        assert result.details['model_score'] == 0.9 and 'cached' not in result.details
+
+        cached = await service.scan_text("you are a terrible person")
+        assert cached.details['cached'] is True
+        assert service.text_batcher.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_skips_model_readiness(self, service, monkeypatch):
+        service.text_batcher.fail = False
+        await service.scan_text("you are a terrible person")
+
+        async def not_ready(kind):
+            raise RuntimeError("text model still loading")
+
+        monkeypatch.setattr(service.warmup, 'ensure', not_ready)
+        cached = await service.scan_text("you are a terrible person")
+        assert cached.details['cached'] is True
+
+    def test_cache_version_follows_probed_model(self, service):
+        service.warmup.models['text']['version'] = "onnx:model.onnx"
+        version = RealMLService.text_cache_version(service)
+        assert version.startswith("onnx:model.onnx|kw:")
@@ -0,0 +1,96 @@
+"""
+Chunked text classification tests
+Tests sliding-window splitting, window caps and score aggregation
+"""
+import pytest
+from services.ml_config import MLRuntimeConfig
+from services.ml_core_real import (
+    aggregate_window_scores, score_text_windows, split_token_windows
+)
+
+
+class FakeTokenizer:
+    """One token per word, with <s> ... </s> special tokens"""
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def __call__(self, texts, add_special_tokens=False, truncation=False):
+        return {'input_ids': [[len(word) for word in text.split()] for text in texts]}
+
+    def build_inputs_with_special_tokens(self, ids):
+        return [0] + ids + [2]
+
+
+class TestTokenWindows:
+    """Test window splitting"""
+
+    def test_short_text_single_window(self):
+        assert split_token_windows(list(range(10)), window=16, stride=4, max_windows=8) == [list(range(10))]
+
+    def test_windows_overlap_and_cover_end(self):
+        windows = split_token_windows(list(range(100)), window=32, stride=8, max_windows=8)
+
+        assert all(len(w) == 32 for w in windows)
+        assert windows[0][0] == 0 and windows[-1][-1] == 99
+        for prev, cur in zip(windows, windows[1:]):
+            assert prev[-1] - cur[0] + 1 >= 8
+
+    def test_window_cap_spreads_over_text(self):
+        windows = split_token_windows(list(range(10000)), window=32, stride=8, max_windows=4)
+
+        assert len(windows) == 4
+        assert windows[0][0] == 0 and windows[-1][-1] == 9999
+
+
+class TestWindowAggregation:
+    """Test combining window scores"""
+
+    def test_aggregation_methods(self):
+        scores = [0.1, 0.9, 0.2, 0.7]
+        assert aggregate_window_scores(scores, 'max') == 0.9
+        assert abs(aggregate_window_scores(scores, 'mean') - 0.475) < 1e-9
+        assert abs(aggregate_window_scores(scores, 'topk', top_k=2) - 0.8) < 1e-9
+
+    def test_toxic_tail_of_long_text_is_found(self, monkeypatch):
+        config = MLRuntimeConfig()
+        monkeypatch.setattr(config, 'text_chunk_stride', 2)
+        monkeypatch.setattr(config, 'text_max_windows', 8)
+        monkeypatch.setattr(config, 'text_chunk_aggregation', 'max')
+        calls = []
+
+        def forward_ids(batch):
+            calls.append(len(batch))
+            return [0.95 if 9 in ids else 0.05 for ids in batch]
+
+        long_text = "ok " * 40 + "ninechars"
+        scores = score_text_windows(FakeTokenizer(), forward_ids, [long_text, "fine"],
+                                    max_length=18, buckets=(8, 18))
+
+        assert scores[0] == 0.95
+        assert scores[1] == 0.05
+        assert len(calls) == 2
+
+    def test_forward_error_is_raised(self):
+        def forward_ids(batch):
+            raise RuntimeError("out of memory")
+
+        with pytest.raises(RuntimeError):
+            score_text_windows(FakeTokenizer(), forward_ids, ["some text"], max_length=18, buckets=(8, 18))
+
+    def test_forward_passes_are_capped_per_call(self, monkeypatch):
+        config = MLRuntimeConfig()
+        monkeypatch.setattr(config, 'text_chunk_stride', 2)
+        monkeypatch.setattr(config, 'text_max_windows', 8)
+        monkeypatch.setattr(config, 'text_forward_batch_size', 5)
+        calls = []
+
+        def forward_ids(batch):
+            calls.append(len(batch))
+            return [0.1] * len(batch)
+
+        scores = score_text_windows(FakeTokenizer(), forward_ids, ["ok " * 200] * 4,
+                                    max_length=18, buckets=(18,))
+
+        assert scores == [0.1] * 4
+        assert sum(calls) == 32 and max(calls) == 5
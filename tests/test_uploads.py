@@ -0,0 +1,49 @@
+"""
+Image upload tests
+Tests raw and multipart streaming uploads with early size cutoff
+"""
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from middleware.uploads import read_image_upload
+
+app = FastAPI()
+
+
+@app.post("/upload")
+async def upload(request: Request):
+    image_bytes = await read_image_upload(request, max_mb=1)
+    return {"size": len(image_bytes), "head": image_bytes[:4].hex()}
+
+
+client = TestClient(app)
+
+
+class TestImageUpload:
+    """Test streaming image upload parsing"""
+
+    def test_raw_octet_stream(self):
+        response = client.post("/upload", content=b"\xff\xd8\xff\xe0" + b"x" * 100,
+                               headers={"Content-Type": "application/octet-stream"})
+        assert response.status_code == 200
+        assert response.json() == {"size": 104, "head": "ffd8ffe0"}
+
+    def test_multipart_picks_file_part(self):
+        response = client.post(
+            "/upload",
+            data={"device_id": "abc"},
+            files={"image": ("photo.jpg", b"\x89PNG" + b"y" * 50, "image/jpeg")}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"size": 54, "head": "89504e47"}
+
+    def test_oversized_upload_rejected(self):
+        response = client.post("/upload", content=b"z" * (1024 * 1024 + 1),
+                               headers={"Content-Type": "image/jpeg"})
+        assert response.status_code == 413
+
+        response = client.post("/upload", files={"image": ("big.jpg", b"z" * (1024 * 1024 + 1))})
+        assert response.status_code == 413
+
+    def test_unsupported_content_type(self):
+        response = client.post("/upload", json={"image_base64": "abc"})
+        assert response.status_code == 415
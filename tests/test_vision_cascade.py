@@ -0,0 +1,64 @@
+"""
+Vision cascade tests
+Tests low-resolution early exits and full-resolution escalation
+"""
+import pytest
+from services.ml_core import ImagePreprocessor, VisionCascade
+
+
+class FakeVisionModel:
+    """Returns a fixed score per input resolution"""
+
+    def __init__(self, low_score, high_score):
+        self.scores = {224: low_score, 640: high_score}
+        self.calls = []
+
+    def predict(self, size):
+        self.calls.append(size)
+        return self.scores[size]
+
+
+@pytest.fixture(autouse=True)
+def fake_preprocessing(monkeypatch):
+    monkeypatch.setattr(ImagePreprocessor, 'decode', staticmethod(lambda image_bytes: image_bytes or None))
+    monkeypatch.setattr(ImagePreprocessor, 'to_tensor',
+                        staticmethod(lambda img, target_size, interpolation=None: target_size[0]))
+
+
+class TestVisionCascade:
+    """Test the two-resolution vision cascade"""
+
+    def test_confident_low_res_score_exits_early(self):
+        model = FakeVisionModel(low_score=0.05, high_score=0.9)
+        cascade = VisionCascade(model)
+
+        result = cascade.predict(b"image")
+
+        assert result['escalated'] is False
+        assert result['score'] == 0.05
+        assert model.calls == [224]
+
+    def test_uncertain_score_escalates_to_full_res(self):
+        model = FakeVisionModel(low_score=0.55, high_score=0.9)
+        cascade = VisionCascade(model)
+
+        result = cascade.predict(b"image")
+
+        assert result['escalated'] is True
+        assert result['score'] == 0.9 and result['low_score'] == 0.55
+        assert result['resolution'] == (640, 640)
+        assert model.calls == [224, 640]
+
+    def test_escalation_rate_and_decode_errors(self):
+        cascade = VisionCascade(FakeVisionModel(low_score=0.5, high_score=0.5))
+        cascade.predict(b"a")
+        cascade.predict(b"b")
+
+        assert cascade.predict(b"") is None
+        assert cascade.get_stats()['escalation_rate'] == 1.0
+
+    def test_band_width_is_configurable(self):
+        model = FakeVisionModel(low_score=0.25, high_score=0.9)
+
+        assert VisionCascade(model).predict(b"image")['escalated'] is False
+        assert VisionCascade(model, band=0.3).predict(b"image")['escalated'] is True
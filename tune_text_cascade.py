@@ -0,0 +1,93 @@
+"""
+Tune the keyword-first text cascade thresholds against a labeled dataset.
+
+Scores every text once with the keyword stage and the transformer, then
+replays the cascade for a grid of thresholds and reports accuracy against
+the labels and the share of texts escalated to the model.
+
+Input is JSON lines with "text" and "label" (1 = harmful, 0 = safe).
+
+Usage:
+    python tune_text_cascade.py --data labeled_texts.jsonl
+    python tune_text_cascade.py --data labeled_texts.jsonl --unsafe 0.8,0.9,1.0 --safe -1,0,0.3
+"""
+import argparse
+import json
+import sys
+import time
+
+from services.ml_cascade import TextCascade
+from services.ml_data import KeywordDatabase
+
+
+def load_samples(path: str):
+    samples = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                samples.append((row['text'], int(row['label'])))
+    return samples
+
+
+def parse_grid(value: str):
+    return [float(v) for v in value.split(',') if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep text cascade thresholds")
+    parser.add_argument('--data', required=True, help="JSON lines with text and label")
+    parser.add_argument('--unsafe', default="0.7,0.8,0.9,1.0", help="unsafe thresholds to try")
+    parser.add_argument('--safe', default="-1,0,0.2,0.3", help="safe thresholds to try")
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    samples = load_samples(args.data)
+    if not samples:
+        print(f"[ERROR] No samples in {args.data}")
+        sys.exit(1)
+
+    from services.ml_core_real import ModelFactory, EnsembleVoter
+    keyword_db = KeywordDatabase()
+    model = ModelFactory.get_text_model()
+    ensemble = EnsembleVoter()
+
+    print(f"[INFO] Scoring {len(samples)} texts...")
+    texts = [text for text, _ in samples]
+    keyword_results = [keyword_db.analyze_text(text) for text in texts]
+
+    start = time.perf_counter()
+    model_scores = []
+    for i in range(0, len(texts), args.batch_size):
+        model_scores.extend(model.predict_batch(texts[i:i + args.batch_size]))
+    model_ms = (time.perf_counter() - start) * 1000 / len(texts)
+
+    model_verdicts = [
+        ensemble.vote({'text': score, 'metadata': kw_weight})[0] >= 0.5
+        for score, (kw_weight, _) in zip(model_scores, keyword_results)
+    ]
+    labels = [label for _, label in samples]
+    baseline = sum(int(v) == l for v, l in zip(model_verdicts, labels)) / len(labels)
+    print(f"[INFO] Model-only accuracy: {baseline:.3f} ({model_ms:.1f} ms/text)\n")
+
+    print(f"{'unsafe':>7} {'safe':>6} {'accuracy':>9} {'escalated':>10} {'est ms/text':>12}")
+    for unsafe in parse_grid(args.unsafe):
+        for safe in parse_grid(args.safe):
+            cascade = TextCascade(unsafe_threshold=unsafe, safe_threshold=safe)
+            correct = 0
+            for text, (kw_weight, keywords), model_harmful, label in zip(
+                texts, keyword_results, model_verdicts, labels
+            ):
+                verdict = cascade.decide(text, kw_weight, keywords)
+                harmful = model_harmful if verdict is None else not verdict
+                correct += int(harmful) == label
+            stats = cascade.get_stats()
+            print(f"{unsafe:>7.2f} {safe:>6.2f} {correct / len(labels):>9.3f} "
+                  f"{stats['escalation_rate']:>10.1%} {stats['escalation_rate'] * model_ms:>12.1f}")
+
+    print("\n[OK] Set ML_TEXT_CASCADE=true with the chosen "
+          "ML_TEXT_CASCADE_UNSAFE_THRESHOLD / ML_TEXT_CASCADE_SAFE_THRESHOLD")
+
+
+if __name__ == "__main__":
+    main()
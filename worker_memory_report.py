@@ -0,0 +1,53 @@
+"""
+Report per-worker memory for a gunicorn deployment started with gunicorn.conf.py.
+Shows how much of each worker's RSS is pages shared with the master (the
+preloaded model weights) versus private to the worker.
+
+Usage:
+    python worker_memory_report.py                 # master pid from the gunicorn pidfile
+    python worker_memory_report.py --pid 12345
+"""
+import argparse
+import os
+import sys
+
+from services.ml_prefork import memory_report
+
+
+def mb(kb: int) -> str:
+    return f"{kb / 1024:8.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker RSS vs shared memory report")
+    parser.add_argument('--pid', type=int, help="gunicorn master pid")
+    parser.add_argument('--pidfile', default=os.getenv("GUNICORN_PIDFILE", "/tmp/anti-lust-gunicorn.pid"))
+    args = parser.parse_args()
+
+    pid = args.pid
+    if pid is None:
+        try:
+            with open(args.pidfile, 'r') as f:
+                pid = int(f.read().strip())
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Cannot read master pid from {args.pidfile}: {e}")
+            sys.exit(1)
+
+    report = memory_report(pid)
+    print(f"{'pid':>8} {'role':>7} {'RSS MB':>8} {'PSS MB':>8} {'shared':>8} {'private':>8}")
+    for proc_pid, usage in report['processes'].items():
+        role = 'master' if proc_pid == pid else 'worker'
+        print(f"{proc_pid:>8} {role:>7} {mb(usage['Rss'])} {mb(usage['Pss'])} "
+              f"{mb(usage['Shared'])} {mb(usage['Private'])}")
+
+    print(f"\n[INFO] {report['workers']} workers")
+    print(f"[INFO] Sum of RSS: {mb(report['total_rss_kb']).strip()} MB "
+          f"(counts shared pages once per process)")
+    print(f"[INFO] Sum of PSS: {mb(report['total_pss_kb']).strip()} MB (actual footprint)")
+    print(f"[INFO] Workers: {mb(report['worker_shared_kb']).strip()} MB shared, "
+          f"{mb(report['worker_private_kb']).strip()} MB private")
+    print(f"[OK] {report['sharing_ratio']:.0%} of summed RSS is shared pages")
+
+
+if __name__ == "__main__":
+    main()